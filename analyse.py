@@ -3,8 +3,10 @@ Script complet pour analyser l'OPCVM IE0002XZSHO1
 Combine le scraping et l'analyse financière
 """
 import json
-from scraping import OPCVMScraper
+import instrumentation
 from calcul import FinancialCalculator
+from database import DEFAULT_DATABASE
+from http_cache import DEFAULT_CACHE_DIR
 
 def load_data_from_file(filename="opcvm_data.json"):
     """
@@ -21,26 +23,53 @@ def load_data_from_file(filename="opcvm_data.json"):
         print(f"Erreur lecture fichier: {e}")
         return None
 
-def main():
+@instrumentation.profiled('analyse')
+@instrumentation.traced('analyse')
+def main(isin="IE0002XZSHO1", data_file="opcvm_data.json", csv_file="analyse_opcvm.csv",
+         json_file="analyse_opcvm.json", database=DEFAULT_DATABASE, engine="python", extended=False,
+         scrape=True, cache_dir=DEFAULT_CACHE_DIR):
     """
     Fonction principale - Analyse complète de l'OPCVM
+    csv_file, json_file, database: exports des résultats (None pour désactiver)
+    scrape: récupère les données si data_file est absent
+    cache_dir: cache disque des réponses HTTP du scraping (None pour désactiver)
     """
-    print("ANALYSE COMPLÈTE OPCVM - IE0002XZSHO1")
+    print(f"ANALYSE COMPLÈTE OPCVM - {isin}")
     print("=" * 70)
     
     # Option 1: Charger depuis un fichier existant 
-    historical_data = load_data_from_file("opcvm_data.json")
+    historical_data = load_data_from_file(data_file)
+    series = None
     
-    # Option 2: Scraper de nouvelles données si nécessaire
+    # Option 2: Scraper de nouvelles données si nécessaire (série typée, sans conversion en chaînes)
     if not historical_data:
+        if not scrape:
+            return
+        
         print("Scraping de nouvelles données...")
         
-        scraper = OPCVMScraper("IE0002XZSHO1")
-        result = scraper.scrape_all_sources()
+        # Imports locaux: requests n'est chargé que si l'on scrape
+        from http_cache import ResponseCache
+        from scraping import OPCVMScraper
         
-        if result and result.get('historical_data'):
-            historical_data = result['historical_data']
-            print(f"{len(historical_data)} points de données récupérés")
+        cache = ResponseCache(cache_dir) if cache_dir else None
+        scraper = OPCVMScraper(isin, cache=cache)
+        series = scraper.scrape_series()
+        
+        # Yahoo Finance seul fournit une série typée: sinon toutes les sources (Investing.com)
+        if series is None:
+            from timeseries_store import PriceSeries
+            
+            print("Série typée indisponible, essai de toutes les sources...")
+            result = scraper.scrape_all_sources()
+            if result and result.get('historical_data'):
+                series = PriceSeries.from_historical_data(result['historical_data'])
+        
+        if cache is not None:
+            cache.print_summary()
+        
+        if series is not None:
+            print(f"{len(series)} points de données récupérés")
         else:
             print("Impossible de récupérer les données")
             return
@@ -54,17 +83,24 @@ def main():
     
     try:
         # Création du calculateur
-        calculator = FinancialCalculator(historical_data)
+        if series is not None:
+            calculator = series.to_calculator(engine=engine)
+        else:
+            calculator = FinancialCalculator(historical_data, engine=engine)
         
         # Analyse de toutes les périodes
-        results = calculator.analyze_all_periods()
+        results = calculator.analyze_all_periods(extended)
         
         if results:   
             # Export des résultats
             print(f"\n EXPORT DES RÉSULTATS")
             print("="*30)
-            calculator.export_to_csv(results, "analyse_opcvm.csv")
-            calculator.export_to_json(results, "analyse_opcvm.json")
+            if csv_file:
+                calculator.export_to_csv(results, csv_file)
+            if json_file:
+                calculator.export_to_json(results, json_file)
+            if database:
+                calculator.export_to_sqlite(results, isin, database)
             
             # Résumé final
             print(f"\n RÉSUMÉ EXÉCUTIF")
@@ -77,4 +113,6 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
+    # OPCVM_TRACE=trace.jsonl OPCVM_METRICS=metriques.prom OPCVM_PROFILE=profils python analyse.py
+    instrumentation.enable_from_env()
     main()
\ No newline at end of file
@@ -0,0 +1,313 @@
+"""
+Analyse en lot d'un univers d'OPCVM (plusieurs ISIN)
+Charge ou scrape chaque série puis répartit les calculs sur un pool de processus
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+from datetime import datetime
+from itertools import islice
+
+from exporters import AtomicFile, CSVExporter, NDJSONExporter, period_rows
+
+# Colonnes du rapport consolidé
+BATCH_FIELDS = ['isin', 'periode', 'performance', 'volatilite', 'rendement_espere',
+                'max_drawdown', 'nb_points', 'date_debut', 'date_fin',
+                'prix_debut', 'prix_fin']
+
+
+def read_isin_file(filename):
+    """
+    Lit une liste d'ISIN (un par ligne, lignes vides et commentaires # ignorés)
+    Une ligne peut préciser les symboles Yahoo: ISIN;SYM1,SYM2
+    Retourne une liste de tuples (isin, symboles ou None)
+    """
+    funds = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            
+            isin, _, symbols = line.partition(';')
+            symbols = [s.strip() for s in symbols.split(',') if s.strip()]
+            funds.append((isin.strip(), symbols or None))
+    
+    return funds
+
+
+def load_or_scrape(isin, symbols=None, data_dir="data"):
+    """
+    Charge la série d'un ISIN depuis data_dir/<ISIN>.json, sinon la scrape et la sauvegarde
+    """
+    filename = os.path.join(data_dir, f"{isin}.json")
+    
+    if os.path.exists(filename):
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f).get('historical_data', [])
+    
+    # Import local: requests n'est nécessaire que si l'on scrape
+    from scraping import OPCVMScraper
+    
+    scraper = OPCVMScraper(isin, symbols=symbols)
+    result = scraper.scrape_all_sources()
+    
+    if not result or not result.get('historical_data'):
+        return None
+    
+    os.makedirs(data_dir, exist_ok=True)
+    scraper.save_to_json(result, filename)
+    return result['historical_data']
+
+
+def analyze_fund(isin, symbols=None, data_dir="data", engine="numpy", cache_dir=None):
+    """
+    Analyse complète d'un fonds (exécutée dans un processus du pool)
+    cache_dir: cache disque des résultats partagé par les processus (seuls les fonds modifiés sont recalculés)
+    Retourne (isin, résultats, erreur) sans jamais lever d'exception
+    """
+    # Imports locaux: chargés dans les processus du pool, pas au démarrage de la ligne de commande
+    from calcul import FinancialCalculator
+    from results_cache import ResultsCache
+    
+    sortie = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(sortie):
+            historical_data = load_or_scrape(isin, symbols, data_dir)
+            if not historical_data:
+                return isin, None, "Aucune donnée récupérée"
+            
+            cache = ResultsCache(directory=cache_dir) if cache_dir else None
+            calculator = FinancialCalculator(historical_data, engine=engine, cache=cache)
+            return isin, calculator.analyze_all_periods(), None
+    
+    except Exception as e:
+        return isin, None, f"{type(e).__name__}: {e}"
+
+
+def _analyze_fund_chunk(chunk):
+    return [analyze_fund(*args) for args in chunk]
+
+
+def iter_batch(funds, workers=None, chunksize=4, data_dir="data", engine="numpy", cache_dir=None):
+    """
+    Analyse un univers de fonds sur un pool de processus
+    funds: liste (ou itérable) d'ISIN ou de tuples (isin, symboles)
+    Génère (isin, résultats, erreur) dans l'ordre de funds, au fur et à mesure des calculs
+    Au plus 2 paquets de chunksize fonds par processus sont en cours à la fois, complétés dès
+    qu'un paquet se termine; les paquets terminés avant un paquet précédent attendent dans un
+    tampon de réordonnancement: les soumissions s'arrêtent quand il en contient autant
+    (mémoire bornée quel que soit le nombre de fonds)
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    
+    tasks = iter(funds)
+    max_pending = 2 * (workers or os.cpu_count() or 1)
+    
+    def next_chunk():
+        chunk = []
+        for fund in islice(tasks, chunksize):
+            isin, symbols = fund if isinstance(fund, tuple) else (fund, None)
+            chunk.append((isin, symbols, data_dir, engine, cache_dir))
+        return chunk
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        running = {}        # future -> numéro du paquet
+        termines = {}       # numéro du paquet -> résultats arrivés en avance
+        soumis = suivant = 0
+        epuise = False
+        
+        while True:
+            # Fenêtre de soumission bornée, complétée à chaque paquet terminé
+            while not epuise and len(running) < max_pending and len(termines) < max_pending:
+                chunk = next_chunk()
+                if not chunk:
+                    epuise = True
+                    break
+                running[executor.submit(_analyze_fund_chunk, chunk)] = soumis
+                soumis += 1
+            
+            if suivant not in termines:
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    termines[running.pop(future)] = future.result()
+                continue
+            
+            for isin, metrics, error in termines.pop(suivant):
+                if error:
+                    print(f"   {isin}: échec ({error})")
+                else:
+                    print(f"   {isin}: {len(metrics)} périodes analysées")
+                yield isin, metrics, error
+            suivant += 1
+
+
+def run_batch(funds, workers=None, chunksize=4, data_dir="data", engine="numpy", cache_dir=None):
+    """
+    Analyse un univers de fonds sur un pool de processus
+    Retourne (résultats par ISIN, erreurs par ISIN)
+    """
+    results = {}
+    errors = {}
+    
+    for isin, metrics, error in iter_batch(funds, workers, chunksize, data_dir, engine, cache_dir):
+        if error:
+            errors[isin] = error
+        else:
+            results[isin] = metrics
+    
+    return results, errors
+
+
+def stream_batch(batch, csv_file=None, ndjson_file=None, append=False):
+    """
+    Écrit les résultats de iter_batch au fil de l'eau (CSV et/ou JSON par ligne, .gz compressés)
+    Aucun résultat n'est conservé en mémoire; les fichiers ne sont remplacés qu'en fin de lot
+    append: ajoute les lignes aux fichiers existants au lieu de les remplacer
+    Les échecs sont écrits dans le JSON par ligne ({'isin', 'erreur'})
+    Retourne (nombre de fonds analysés, erreurs par ISIN)
+    """
+    nb_succes = 0
+    errors = {}
+    
+    with contextlib.ExitStack() as stack:
+        csv_out = stack.enter_context(CSVExporter(csv_file, BATCH_FIELDS, append)) if csv_file else None
+        ndjson_out = stack.enter_context(NDJSONExporter(ndjson_file, append=append)) if ndjson_file else None
+        
+        for isin, metrics, error in batch:
+            if error:
+                errors[isin] = error
+                if ndjson_out:
+                    ndjson_out.write({'isin': isin, 'erreur': error})
+                continue
+    
+            nb_succes += 1
+            for row in period_rows(metrics, isin):
+                if csv_out:
+                    csv_out.write(row)
+                if ndjson_out:
+                    ndjson_out.write(row)
+    
+    for filename in (csv_file, ndjson_file):
+        if filename:
+            print(f"Rapport consolidé exporté vers {filename}")
+    
+    return nb_succes, errors
+
+
+def export_batch_to_csv(results, filename="analyse_batch.csv"):
+    """
+    Exporte les résultats de tous les fonds dans un seul CSV (une ligne par fonds et période)
+    """
+    try:
+        with CSVExporter(filename, BATCH_FIELDS) as exporter:
+            for isin, periods in results.items():
+                exporter.write_rows(period_rows(periods, isin))
+        
+        print(f"Rapport consolidé exporté vers {filename}")
+    
+    except Exception as e:
+        print(f"Erreur export CSV: {e}")
+
+
+def export_batch_to_json(results, errors, filename="analyse_batch.json"):
+    """
+    Exporte le rapport consolidé (résultats et erreurs) en JSON
+    """
+    try:
+        rapport = {
+            'analyse_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'nb_fonds': len(results) + len(errors),
+            'nb_succes': len(results),
+            'nb_echecs': len(errors),
+            'metriques_par_fonds': results,
+            'erreurs': errors
+        }
+        
+        with AtomicFile(filename) as jsonfile:
+            json.dump(rapport, jsonfile, indent=2, ensure_ascii=False)
+        
+        print(f"Rapport consolidé exporté vers {filename}")
+    
+    except Exception as e:
+        print(f"Erreur export JSON: {e}")
+
+
+def add_arguments(parser):
+    """
+    Options de l'analyse en lot (partagées avec la sous-commande batch de cli.py)
+    """
+    parser.add_argument('isins', nargs='*', help="ISIN à analyser")
+    parser.add_argument('--file', help="Fichier d'ISIN (un par ligne)")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus (défaut: nb de cœurs)")
+    parser.add_argument('--chunksize', type=int, default=4, help="Nombre de fonds envoyés à la fois à un processus")
+    parser.add_argument('--data-dir', default="data", help="Répertoire des séries <ISIN>.json")
+    parser.add_argument('--engine', default="numpy", choices=['python', 'numpy'])
+    parser.add_argument('--cache-dir', default=None, help="Cache disque des résultats (ne recalcule que les fonds modifiés)")
+    parser.add_argument('--csv', default="analyse_batch.csv")
+    parser.add_argument('--json', default="analyse_batch.json")
+    parser.add_argument('--stream', action='store_true',
+                        help="Écrit les lignes au fil des calculs (mémoire constante, sans rapport JSON consolidé)")
+    parser.add_argument('--ndjson', default=None, help="Export JSON par ligne (.ndjson, .jsonl), écrit en flux")
+    parser.add_argument('--gzip', action='store_true', help="Compresse les exports en flux (.gz)")
+    parser.add_argument('--append', action='store_true', help="Ajoute aux exports en flux existants")
+    
+
+def run(args, parser):
+    """
+    Exécute l'analyse en lot à partir des options de add_arguments
+    """
+    funds = [(isin, None) for isin in args.isins]
+    if args.file:
+        funds.extend(read_isin_file(args.file))
+    
+    if not funds:
+        parser.error("Aucun ISIN fourni")
+    
+    print(f"ANALYSE EN LOT - {len(funds)} fonds")
+    print("=" * 70)
+    
+    if args.stream or args.ndjson or args.gzip or args.append:
+        suffix = '.gz' if args.gzip else ''
+        csv_file = args.csv + suffix if args.csv and not args.csv.endswith('.gz') else args.csv
+        ndjson_file = args.ndjson + suffix if args.ndjson and not args.ndjson.endswith('.gz') else args.ndjson
+        
+        batch = iter_batch(funds, args.workers, args.chunksize, args.data_dir, args.engine, args.cache_dir)
+        nb_succes, errors = stream_batch(batch, csv_file or None, ndjson_file, args.append)
+        print(f"\n{nb_succes} fonds analysés, {len(errors)} échecs")
+        return
+    
+    results, errors = run_batch(funds, args.workers, args.chunksize, args.data_dir, args.engine,
+                              args.cache_dir)
+    
+    print(f"\n{len(results)} fonds analysés, {len(errors)} échecs")
+    export_batch_to_csv(results, args.csv)
+    export_batch_to_json(results, errors, args.json)
+
+
+def main():
+    """
+    Point d'entrée: python batch.py ISIN1 ISIN2 ... ou python batch.py --file isins.txt
+    """
+    parser = argparse.ArgumentParser(description="Analyse en lot de plusieurs OPCVM")
+    add_arguments(parser)
+    parser.add_argument('--limits', help="Limites de débit, reprises et disjoncteurs (fichier JSON)")
+    args = parser.parse_args()
+    
+    if args.limits:
+        from rate_limit import configure_limits
+        
+        try:
+            configure_limits(args.limits)
+        except (OSError, ValueError) as e:
+            parser.error(f"Fichier de limites {args.limits}: {e}")
+    
+    run(args, parser)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Benchmarks de FinancialCalculator et du traitement des réponses du scraper
+Séries synthétiques déterministes (synthetic.py), temps (meilleur de plusieurs essais),
+débit en points par seconde et mémoire maximale (tracemalloc), résultats enregistrés en JSON
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from calcul import ENGINES, FinancialCalculator
+from scraping import build_result, get_fund_info, parse_yahoo_chart, parse_yahoo_chart_series
+from synthetic import generate_historical_data, generate_universe
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules dont l'import au démarrage est à éviter (chargés seulement par les commandes qui s'en servent)
+HEAVY_MODULES = ('numpy', 'requests', 'aiohttp', 'scraping')
+
+
+def measure(func, points, repeat=3, memory=True):
+    """
+    Mesure une étape: meilleur temps sur repeat essais, débit et pic mémoire (un essai de plus)
+    """
+    temps = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            debut = time.perf_counter()
+            func()
+            temps.append(time.perf_counter() - debut)
+        
+        peak = None
+        if memory:
+            tracemalloc.start()
+            try:
+                func()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    
+    meilleur = min(temps)
+    return {
+        'secondes': round(meilleur, 6),
+        'points_par_seconde': round(points / meilleur) if meilleur > 0 else None,
+        'memoire_max_mo': round(peak / 1e6, 3) if peak is not None else None
+    }
+
+
+def yahoo_payload(series):
+    """
+    Corps de réponse chart Yahoo Finance équivalent à une série synthétique
+    """
+    timestamps = (series.days.astype(np.int64) * 86400).tolist()
+    return json.dumps({'chart': {'result': [{
+        'meta': {'gmtoffset': 0},
+        'timestamp': timestamps,
+        'indicators': {'quote': [{'close': series.prices.tolist()}]}
+    }]}}).encode('utf-8')
+
+
+def benchmark_calculator(universe, engine, repeat, memory, directory):
+    """
+    Étapes du calculateur pour un moteur, sur tous les fonds de l'univers
+    """
+    histories = [series.to_historical_data() for series in universe.values()]
+    points = sum(len(series) for series in universe.values())
+    
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        calculators = [FinancialCalculator(data, engine=engine) for data in histories]
+        periods = calculators[0].get_period_dates(extended=True)
+        views = [c.filter_data_by_period(periods['Origine']) for c in calculators]
+        results = [c.analyze_all_periods(extended=True) for c in calculators]
+    
+    def for_each(method):
+        def run():
+            for c, view in zip(calculators, views):
+                getattr(c, method)(view)
+        return run
+    
+    def filter_all():
+        for c in calculators:
+            for start in periods.values():
+                c.filter_data_by_period(start)
+    
+    def export(method, extension):
+        def run():
+            for i, (c, r) in enumerate(zip(calculators, results)):
+                getattr(c, method)(r, os.path.join(directory, f"bench_{i}.{extension}"))
+        return run
+    
+    steps = [
+        ('__init__', lambda: [FinancialCalculator(data, engine=engine) for data in histories]),
+        ('from_arrays', lambda: [FinancialCalculator.from_arrays(s.days, s.prices, engine=engine)
+                                 for s in universe.values()]),
+        ('filter_data_by_period', filter_all),
+        ('calculate_performance', for_each('calculate_performance')),
+        ('calculate_volatility', for_each('calculate_volatility')),
+        ('calculate_expected_return', for_each('calculate_expected_return')),
+        ('calculate_max_drawdown', for_each('calculate_max_drawdown')),
+        ('compute_metrics', for_each('compute_metrics')),
+        ('analyze_all_periods', lambda: [c.analyze_all_periods(extended=True) for c in calculators]),
+        ('rolling_metrics', lambda: [c.rolling_metrics() for c in calculators]),
+        ('export_to_csv', export('export_to_csv', 'csv')),
+        ('export_to_json', export('export_to_json', 'json'))
+    ]
+    
+    for name, func in steps:
+        yield name, measure(func, points, repeat, memory)
+
+
+def benchmark_scraper(universe, repeat, memory):
+    """
+    Traitement des réponses Yahoo Finance: décodage JSON + dictionnaires, décodage typé, résultat
+    """
+    payloads = [yahoo_payload(series) for series in universe.values()]
+    histories = [series.to_historical_data() for series in universe.values()]
+    points = sum(len(series) for series in universe.values())
+    fund_info = get_fund_info('XS0000000000')
+    
+    steps = [
+        ('parse_yahoo_chart', lambda: [parse_yahoo_chart(json.loads(p), 'BENCH') for p in payloads]),
+        ('parse_yahoo_chart_series', lambda: [parse_yahoo_chart_series(p, 'BENCH') for p in payloads]),
+        ('build_result', lambda: [build_result(fund_info, data) for data in histories])
+    ]
+    
+    for name, func in steps:
+        yield name, measure(func, points, repeat, memory)
+
+
+def startup_commands(directory):
+    """
+    Commandes dont on mesure le démarrage à froid (fichiers d'entrée créés dans directory)
+    """
+    data_file = os.path.join(directory, "opcvm_data.json")
+    with open(data_file, 'w', encoding='utf-8') as f:
+        json.dump({'fund_info': {'isin': 'XS0000000000'}, 'historical_data': generate_historical_data(500)}, f)
+    
+    cli = os.path.join(PACKAGE_DIR, "cli.py")
+    return [
+        ('python -c pass', ['-c', 'pass']),
+        ('cli.py --help', [cli, '--help']),
+        ('cli.py analyse', [cli, 'analyse', '--input', data_file, '--no-scrape',
+                            '--csv', '', '--json', '', '--sqlite', '']),
+        ('cli.py export', [cli, 'export', 'XS0000000000', '--input', data_file,
+                           '--output', os.path.join(directory, "export.csv")]),
+        ('import analyse', ['-c', 'import analyse'])
+    ]
+
+
+def benchmark_startup(repeat=5):
+    """
+    Démarrage à froid des points d'entrée (nouveau processus à chaque essai, meilleur temps)
+    et modules lourds importés (python -X importtime)
+    """
+    env = dict(os.environ, PYTHONPATH=PACKAGE_DIR)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        for name, args in startup_commands(directory):
+            temps = []
+            for _ in range(repeat):
+                debut = time.perf_counter()
+                subprocess.run([sys.executable] + args, cwd=directory, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+                temps.append(time.perf_counter() - debut)
+            
+            trace = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=directory, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+            importes = set(re.findall(r'\|\s+([\w.]+)\s*$', trace, re.MULTILINE))
+            
+            yield name, {
+                'secondes': round(min(temps), 6),
+                'points_par_seconde': None,
+                'memoire_max_mo': None,
+                'modules_lourds': [module for module in HEAVY_MODULES if module in importes]
+            }
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plateforme': platform.platform(),
+        'processeur': platform.processor()
+    }
+
+
+def run_startup_benchmarks(repeat=5):
+    """
+    Benchmark du démarrage à froid seul (même format de rapport que run_benchmarks)
+    """
+    resultats = []
+    for step, mesure in benchmark_startup(repeat):
+        ligne = {'taille': 0, 'nb_fonds': 0, 'groupe': 'demarrage', 'etape': step}
+        ligne.update(mesure)
+        resultats.append(ligne)
+        lourds = ', '.join(mesure['modules_lourds']) or 'aucun'
+        print(f"   {step:<28} {mesure['secondes'] * 1000:>8.1f} ms  modules lourds: {lourds}")
+    
+    return {
+        'benchmark_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'environnement': environment(),
+        'parametres': {'essais': repeat},
+        'resultats': resultats
+    }
+
+
+def run_benchmarks(sizes, nb_funds=1, engines=ENGINES, repeat=3, memory=True, seed=0):
+    """
+    Exécute tous les benchmarks et retourne le rapport (dictionnaire sérialisable en JSON)
+    """
+    resultats = []
+    
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            universe = generate_universe(nb_funds, size, seed=seed)
+            
+            groupes = [(engine, benchmark_calculator(universe, engine, repeat, memory, directory))
+                       for engine in engines]
+            groupes.append(('scraper', benchmark_scraper(universe, repeat, memory)))
+            
+            for groupe, steps in groupes:
+                for step, mesure in steps:
+                    ligne = {'taille': size, 'nb_fonds': nb_funds, 'groupe': groupe, 'etape': step}
+                    ligne.update(mesure)
+                    resultats.append(ligne)
+                    print(f"   {size:>10} x{nb_funds} {groupe:<8} {step:<28} {mesure['secondes']:>10.4f}s"
+                          f"  {mesure['points_par_seconde'] or 0:>14,} pts/s"
+                          + (f"  {mesure['memoire_max_mo']:>9.1f} Mo" if mesure['memoire_max_mo'] is not None else ""))
+    
+    return {
+        'benchmark_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'environnement': environment(),
+        'parametres': {'tailles': sizes, 'nb_fonds': nb_funds, 'moteurs': list(engines),
+                       'essais': repeat, 'graine': seed},
+        'resultats': resultats
+    }
+
+
+def compare_reports(report, baseline):
+    """
+    Affiche le rapport de temps entre deux exécutions (> 1: plus lent que la référence)
+    """
+    reference = {(r['taille'], r['nb_fonds'], r['groupe'], r['etape']): r['secondes']
+                 for r in baseline['resultats']}
+    
+    print(f"\nCOMPARAISON AVEC {baseline['benchmark_date']}")
+    print("=" * 70)
+    for r in report['resultats']:
+        avant = reference.get((r['taille'], r['nb_fonds'], r['groupe'], r['etape']))
+        if avant:
+            ratio = r['secondes'] / avant
+            alerte = "  <-- régression" if ratio > 1.2 else ""
+            print(f"   {r['taille']:>10} {r['groupe']:<8} {r['etape']:<28} x{ratio:.2f}{alerte}")
+
+
+def main():
+    """
+    Point d'entrée: python benchmark.py --sizes 1000,100000 --funds 4 --output benchmark.json
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks du calculateur et du scraper")
+    parser.add_argument('--sizes', default="1000,10000,100000",
+                        help="Nombre de points par série, séparés par des virgules (1000 à 10000000)")
+    parser.add_argument('--funds', type=int, default=1, help="Nombre de fonds synthétiques")
+    parser.add_argument('--engines', default=','.join(ENGINES), help="Moteurs de calcul à mesurer")
+    parser.add_argument('--repeat', type=int, default=3, help="Nombre d'essais par étape (meilleur temps retenu)")
+    parser.add_argument('--no-memory', action='store_true', help="Ne pas mesurer la mémoire (tracemalloc)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default="benchmark.json")
+    parser.add_argument('--compare', help="Rapport JSON d'une exécution précédente")
+    parser.add_argument('--startup', action='store_true',
+                        help="Mesure seulement le démarrage à froid des points d'entrée (cli.py, analyse.py)")
+    args = parser.parse_args()
+    
+    if args.startup:
+        print("BENCHMARKS - démarrage à froid")
+        print("=" * 70)
+        report = run_startup_benchmarks(max(args.repeat, 5))
+    else:
+        sizes = [int(size) for size in args.sizes.split(',')]
+        engines = [engine for engine in args.engines.split(',') if engine]
+    
+        print(f"BENCHMARKS - tailles {sizes}, {args.funds} fonds")
+        print("=" * 70)
+    
+        report = run_benchmarks(sizes, args.funds, engines, args.repeat, not args.no_memory, args.seed)
+    
+    with open(args.output, 'w', encoding='utf-8') as jsonfile:
+        json.dump(report, jsonfile, indent=2, ensure_ascii=False)
+    print(f"\nRésultats enregistrés dans {args.output}")
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_reports(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,66 +3,697 @@ Calculateur de métriques financières pour OPCVM
 Calcule Performance, Volatilité, Rendement espéré et Max Drawdown
 """
 import json
-import csv
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
 from datetime import datetime, timedelta
+from itertools import islice
 import math
+import zlib
+
+import instrumentation
+from database import DEFAULT_DATABASE, OPCVMDatabase
+from exporters import AtomicFile, CSVExporter, NDJSONExporter, period_rows
+from lazy_import import LazyModule
+
+# NumPy n'est importé qu'au premier calcul avec le moteur numpy
+np = LazyModule('numpy')
+
+# Moteurs de calcul disponibles
+ENGINES = ('python', 'numpy')
+
+
+def _np_daily_returns(prices):
+    """
+    Rendements quotidiens vectorisés (les prix précédents <= 0 sont ignorés)
+    """
+    if len(prices) < 2:
+        return np.empty(0, dtype=np.float64)
+    
+    prix_precedents = prices[:-1]
+    prix_actuels = prices[1:]
+    valides = prix_precedents > 0
+    
+    return prix_actuels[valides] / prix_precedents[valides] - 1
+
+
+def _np_volatility(daily_returns):
+    """
+    Volatilité annualisée en % à partir d'un tableau de rendements
+    """
+    if len(daily_returns) < 2:
+        return 0.0
+    
+    moyenne = daily_returns.mean()
+    variance = ((daily_returns - moyenne) ** 2).mean()
+    
+    return round(float(math.sqrt(variance) * math.sqrt(252) * 100), 2)
+
+
+def _np_expected_return(daily_returns):
+    """
+    Rendement espéré annualisé en % à partir d'un tableau de rendements
+    """
+    if len(daily_returns) == 0:
+        return 0.0
+    
+    return round(float(daily_returns.mean() * 252 * 100), 2)
+
+
+def _np_max_drawdown(prices):
+    """
+    Max Drawdown en % via le pic courant (np.maximum.accumulate)
+    """
+    if len(prices) < 2:
+        return 0.0
+    
+    pics = np.maximum.accumulate(prices)
+    drawdowns = (prices / pics - 1) * 100
+    
+    return round(float(min(drawdowns.min(), 0.0)), 2)
+
+
+def _np_performance(prices):
+    """
+    Performance totale en % à partir d'un tableau de prix
+    """
+    if len(prices) < 2 or prices[0] <= 0:
+        return 0.0
+    
+    return round(float((prices[-1] / prices[0] - 1) * 100), 2)
+
+
+def period_start_dates(first_date, extended=False):
+    """
+    Dates de début des périodes d'analyse
+    first_date: premier point de l'historique (début de la période Origine)
+    extended: ajoute 1M, 5Y, 10Y et l'historique complet (Origine)
+    """
+    today = datetime.now()
+    current_year = today.year
+    
+    periods = {
+        'YTD': datetime(current_year, 1, 1),        # Début d'année
+        '3M': today - timedelta(days=90),           # 3 mois
+        '6M': today - timedelta(days=180),          # 6 mois
+        '1Y': today - timedelta(days=365),          # 1 an
+        '3Y': today - timedelta(days=1095)          # 3 ans
+    }
+    
+    if extended:
+        periods.update({
+            '1M': today - timedelta(days=30),       # 1 mois
+            '5Y': today - timedelta(days=1825),     # 5 ans
+            '10Y': today - timedelta(days=3650),    # 10 ans
+            'Origine': first_date                   # Depuis la création
+        })
+    
+    return periods
+
+
+class PeriodView(Sequence):
+    """
+    Vue sans copie sur une tranche contiguë des données triées (offset + longueur)
+    """
+    
+    def __init__(self, data, offset, length):
+        self.data = data
+        self.offset = offset
+        self.length = length
+    
+    def __len__(self):
+        return self.length
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return PeriodView(self.data, self.offset + start, max(stop - start, 0))
+        
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("Index hors de la période")
+        
+        return self.data[self.offset + index]
+    
+    def __iter__(self):
+        return islice(self.data, self.offset, self.offset + self.length)
+    
+    def __repr__(self):
+        return f"PeriodView(offset={self.offset}, length={self.length})"
+
+
+class RollingMetrics:
+    """
+    Séries de métriques glissantes (une valeur par date, tableaux compacts float64)
+    """
+    
+    FIELDS = ('rendement', 'volatilite', 'sharpe', 'drawdown', 'max_drawdown')
+    
+    def __init__(self, window, dates, series):
+        self.window = window
+        self.dates = dates
+        self.series = series
+    
+    def __len__(self):
+        return len(self.dates)
+    
+    def __getitem__(self, field):
+        return self.series[field]
+    
+    def iter_rows(self):
+        """
+        Parcourt les séries ligne par ligne (une ligne par date)
+        """
+        colonnes = [self.series[field] for field in self.FIELDS]
+        for i, date in enumerate(self.dates):
+            row = {'date': date.strftime('%Y-%m-%d')}
+            for field, valeurs in zip(self.FIELDS, colonnes):
+                row[field] = round(valeurs[i], 4)
+            yield row
+    
+    def to_dict(self):
+        """
+        Représentation sérialisable (colonnes) pour l'export JSON
+        """
+        rapport = {
+            'fenetre': self.window,
+            'dates': [date.strftime('%Y-%m-%d') for date in self.dates]
+        }
+        for field in self.FIELDS:
+            rapport[field] = [round(valeur, 4) for valeur in self.series[field]]
+        return rapport
+
+
+def _combine_drawdown(gauche, droite):
+    """
+    Agrège deux segments de prix consécutifs décrits par (plus haut, plus bas, max drawdown)
+    Le pire drawdown est dans l'un des segments ou va du plus haut de gauche au plus bas de droite
+    """
+    haut_g, bas_g, mdd_g = gauche
+    haut_d, bas_d, mdd_d = droite
+    mdd = min(mdd_g, mdd_d)
+    if haut_g > 0:
+        mdd = min(mdd, bas_d / haut_g - 1)
+    return (max(haut_g, haut_d), min(bas_g, bas_d), mdd)
+
+
+class _DrawdownQueue:
+    """
+    File des prix d'une fenêtre glissante (deux piles) avec l'agrégat (plus haut, plus bas,
+    max drawdown) de toute la fenêtre: ajout, retrait du plus ancien et agrégat en O(1) amorti
+    """
+    
+    def __init__(self):
+        self._entree = []       # (prix, agrégat du bas de la pile jusqu'à ce prix)
+        self._sortie = []       # agrégat de ce prix jusqu'au bas de la pile (sommet: plus ancien)
+    
+    def push(self, price):
+        element = (price, price, 0.0)
+        if self._entree:
+            element = _combine_drawdown(self._entree[-1][1], element)
+        self._entree.append((price, element))
+    
+    def popleft(self):
+        if not self._sortie:
+            agregat = None
+            while self._entree:
+                price, _ = self._entree.pop()
+                element = (price, price, 0.0)
+                agregat = _combine_drawdown(element, agregat) if agregat else element
+                self._sortie.append(agregat)
+        self._sortie.pop()
+    
+    def aggregate(self):
+        if not self._sortie:
+            return self._entree[-1][1]
+        if not self._entree:
+            return self._sortie[-1]
+        return _combine_drawdown(self._sortie[-1], self._entree[-1][1])
+
+
+class _IncrementalWindow:
+    """
+    État courant d'une période en mode incrémental
+    
+    Tranche [offset, end) de data avec sommes des rendements (décalés d'une
+    constante) et file des prix (_DrawdownQueue) pour le max drawdown. Un
+    nouveau point ou l'éviction d'un ancien point coûte O(1) amorti, y compris
+    quand le pic sort de la fenêtre (série en baisse).
+    """
+    
+    def __init__(self, data, offset):
+        self.data = data
+        self.offset = offset
+        self.end = offset
+        self._reset()
+    
+    def _reset(self):
+        self.decalage = None
+        self.nb_rendements = 0
+        self.somme = 0.0
+        self.somme_carres = 0.0
+        self.prix = _DrawdownQueue()
+    
+    def _return_at(self, i):
+        """
+        Rendement entre les points i-1 et i (None si le prix précédent est <= 0)
+        """
+        prix_precedent = self.data[i-1]['price']
+        if prix_precedent > 0:
+            return (self.data[i]['price'] / prix_precedent) - 1
+        return None
+    
+    def push(self):
+        """
+        Intègre le point data[end] à la fenêtre
+        """
+        i = self.end
+        price = self.data[i]['price']
+        
+        if i > self.offset:
+            rendement = self._return_at(i)
+            if rendement is not None:
+                if self.decalage is None:
+                    self.decalage = rendement
+                rendement -= self.decalage
+                self.nb_rendements += 1
+                self.somme += rendement
+                self.somme_carres += rendement * rendement
+        
+        self.prix.push(price)
+        self.end += 1
+    
+    def evict_before(self, start_date):
+        """
+        Retire les points antérieurs à start_date (début de période qui avance)
+        """
+        while self.offset < self.end and self.data[self.offset]['date'] < start_date:
+            i = self.offset
+            
+            if i + 1 < self.end:
+                rendement = self._return_at(i + 1)
+                if rendement is not None:
+                    rendement -= self.decalage
+                    self.nb_rendements -= 1
+                    self.somme -= rendement
+                    self.somme_carres -= rendement * rendement
+            
+            self.prix.popleft()
+            self.offset += 1
+        
+        if self.offset == self.end:
+            self._reset()
+        elif self.nb_rendements == 0:
+            self.somme = self.somme_carres = 0.0
+    
+    def metrics(self):
+        """
+        Métriques de la fenêtre, au même format que compute_metrics
+        """
+        prix_initial = self.data[self.offset]['price']
+        prix_final = self.data[self.end - 1]['price']
+        
+        if prix_initial <= 0:
+            performance = 0.0
+        else:
+            performance = round(((prix_final / prix_initial) - 1) * 100, 2)
+        
+        if self.nb_rendements < 2:
+            volatilite = 0.0
+        else:
+            moyenne_decalee = self.somme / self.nb_rendements
+            variance = max(self.somme_carres / self.nb_rendements - moyenne_decalee * moyenne_decalee, 0.0)
+            volatilite = round(math.sqrt(variance) * math.sqrt(252) * 100, 2)
+        
+        if self.nb_rendements == 0:
+            rendement_espere = 0.0
+        else:
+            rendement_espere = round((self.somme / self.nb_rendements + self.decalage) * 252 * 100, 2)
+        
+        return {
+            'performance': performance,
+            'volatilite': volatilite,
+            'rendement_espere': rendement_espere,
+            'max_drawdown': round(self.prix.aggregate()[2] * 100, 2)
+        }
+
 
 class FinancialCalculator:
-    def __init__(self, data):
+    def __init__(self, data, engine='python', incremental=False, cache=None):
         """
         Initialise le calculateur avec les données historiques
         data: liste de dictionnaires avec 'date' et 'price'
+        engine: 'python' (boucles pures) ou 'numpy' (calculs vectorisés)
+        incremental: maintient l'état de chaque période pour les ajouts via append()
+        cache: cache des résultats (results_cache.ResultsCache), None pour tout recalculer
         """
         if not data:
             raise ValueError("Aucune donnée fournie")
         
+        if engine not in ENGINES:
+            raise ValueError(f"Moteur de calcul inconnu: {engine} (choix: {', '.join(ENGINES)})")
+        self.engine = engine
+        
         # Conversion des dates si nécessaire et tri
-        self.data = []
+        self._data = []
         for item in data:
             if isinstance(item['date'], str):
                 date_obj = datetime.strptime(item['date'], '%Y-%m-%d')
             else:
                 date_obj = item['date']
             
-            self.data.append({
+            self._data.append({
                 'date': date_obj,
                 'price': float(item['price'])
             })
         
         # Tri par date croissante
-        self.data.sort(key=lambda x: x['date'])
+        self._data.sort(key=lambda x: x['date'])
+        
+        # Index des dates (trié) pour découper les périodes par recherche binaire
+        self._date_list = [item['date'] for item in self._data]
+        
+        # Moteur NumPy: prix en float64 et dates en datetime64
+        if self.engine == 'numpy':
+            self._set_arrays(np.array(self._date_list, dtype='datetime64[us]'),
+                             np.array([item['price'] for item in self._data], dtype=np.float64))
+        
+        self._finish_init(incremental, cache)
+    
+    @classmethod
+    def from_arrays(cls, days, prices, engine='numpy', incremental=False, cache=None):
+        """
+        Crée un calculateur à partir de tableaux typés, sans passer par des chaînes de dates
+        days: jours depuis le 01/01/1970 (entiers), prices: prix (float64)
+        Avec le moteur NumPy, les prix déjà triés en float64 sont utilisés sans copie (ex: tranche
+        mmap); les jours sont convertis en datetime64[us], ce qui copie la colonne des dates
+        """
+        if len(days) == 0:
+            raise ValueError("Aucune donnée fournie")
+        if len(days) != len(prices):
+            raise ValueError("Dates et prix de longueurs différentes")
+        
+        days = np.asarray(days)
+        prices = np.asarray(prices, dtype=np.float64)
+        
+        # Tri par date croissante si nécessaire
+        if len(days) > 1 and np.any(days[1:] < days[:-1]):
+            ordre = np.argsort(days, kind='stable')
+            days = days[ordre]
+            prices = prices[ordre]
+        
+        dates = days.astype('datetime64[D]').astype('datetime64[us]')
+        
+        if engine == 'python':
+            data = [{'date': date, 'price': price} for date, price in zip(dates.tolist(), prices.tolist())]
+            return cls(data, engine='python', incremental=incremental, cache=cache)
+        
+        if engine not in ENGINES:
+            raise ValueError(f"Moteur de calcul inconnu: {engine} (choix: {', '.join(ENGINES)})")
+        
+        calculator = cls.__new__(cls)
+        calculator.engine = engine
+        # Dictionnaires et index Python construits seulement s'ils sont demandés
+        calculator._data = None
+        calculator._date_list = None
+        calculator._set_arrays(dates, prices)
+        calculator._finish_init(incremental, cache)
+        return calculator
+    
+    def _set_arrays(self, dates, prices):
+        self._dates = dates
+        self._prices = prices
+        # Tampons à capacité doublée pour append()
+        self._dates_buffer = self._dates
+        self._prices_buffer = self._prices
+    
+    def _finish_init(self, incremental, cache=None):
+        self.cache = cache
+        
+        # États des périodes en mode incrémental (None: recalcul complet)
+        self._windows = None
+        if incremental:
+            self.start_incremental()
+        
+        print(f"   Période: {self._date_range_label()}")
+    
+    @property
+    def data(self):
+        """
+        Données sous forme de liste de dictionnaires 'date' / 'price' (triée)
+        """
+        if self._data is None:
+            self._data = [{'date': date, 'price': price}
+                          for date, price in zip(self._dates.tolist(), self._prices.tolist())]
+        return self._data
+    
+    @property
+    def _date_index(self):
+        if self._date_list is None:
+            self._date_list = self._dates.tolist()
+        return self._date_list
+    
+    def __len__(self):
+        if self.engine == 'numpy':
+            return len(self._prices)
+        return len(self._data)
+    
+    def _first_date(self):
+        if self.engine == 'numpy':
+            return self._dates[0].item()
+        return self._data[0]['date']
+    
+    def _last_date(self):
+        if self.engine == 'numpy':
+            return self._dates[-1].item()
+        return self._data[-1]['date']
+    
+    def _date_range_label(self):
+        return f"{self._first_date().strftime('%Y-%m-%d')} → {self._last_date().strftime('%Y-%m-%d')}"
+    
+    def start_incremental(self, extended=False):
+        """
+        Active le mode incrémental: un état glissant par période d'analyse
+        """
+        self._windows = {}
+        for period_name, start_date in self.get_period_dates(extended).items():
+            self._windows[period_name] = self._build_window(start_date)
+    
+    def _build_window(self, start_date):
+        offset, length = self.get_period_bounds(start_date)
+        window = _IncrementalWindow(self.data, offset)
+        for _ in range(length):
+            window.push()
+        return window
+    
+    def append(self, date, price):
+        """
+        Ajoute un nouveau point (postérieur au dernier) et met à jour l'état en O(1) amorti
+        """
+        if isinstance(date, str):
+            date = datetime.strptime(date, '%Y-%m-%d')
+        price = float(price)
+        
+        if date <= self._last_date():
+            raise ValueError(f"Date {date.strftime('%Y-%m-%d')} antérieure ou égale au dernier point")
+        
+        self.data.append({'date': date, 'price': price})
+        self._date_index.append(date)
+        
+        if self.engine == 'numpy':
+            self._append_arrays(date, price)
+        
+        if self._windows is not None:
+            for window in self._windows.values():
+                window.push()
+    
+    def _append_arrays(self, date, price):
+        """
+        Ajout dans les tableaux NumPy avec capacité doublée (O(1) amorti)
+        """
+        n = len(self._prices)
         
-        print(f"   Période: {self.data[0]['date'].strftime('%Y-%m-%d')} → {self.data[-1]['date'].strftime('%Y-%m-%d')}")
+        if n == len(self._prices_buffer):
+            nouvelle_capacite = max(2 * n, 16)
+            dates_buffer = np.empty(nouvelle_capacite, dtype='datetime64[us]')
+            prices_buffer = np.empty(nouvelle_capacite, dtype=np.float64)
+            dates_buffer[:n] = self._dates
+            prices_buffer[:n] = self._prices
+            self._dates_buffer = dates_buffer
+            self._prices_buffer = prices_buffer
+        
+        self._dates_buffer[n] = np.datetime64(date, 'us')
+        self._prices_buffer[n] = price
+        self._dates = self._dates_buffer[:n + 1]
+        self._prices = self._prices_buffer[:n + 1]
     
-    def get_period_dates(self):
+    def get_period_dates(self, extended=False):
         """
         Définit les dates de début pour chaque période d'analyse
+        extended: ajoute 1M, 5Y, 10Y et l'historique complet (Origine)
+        """
+        return period_start_dates(self._first_date(), extended)
+    
+    def get_period_bounds(self, start_date, end_date=None):
         """
-        today = datetime.now()
-        current_year = today.year
+        Retourne (offset, longueur) de la période [start_date, end_date] par recherche binaire
+        Les données étant triées, une période est toujours une tranche contiguë
+        """
+        if self.engine == 'numpy':
+            debut = int(np.searchsorted(self._dates, np.datetime64(start_date, 'us'), side='left'))
+            if end_date is None:
+                fin = len(self._dates)
+            else:
+                fin = int(np.searchsorted(self._dates, np.datetime64(end_date, 'us'), side='right'))
+        else:
+            debut = bisect_left(self._date_index, start_date)
+            if end_date is None:
+                fin = len(self._date_index)
+            else:
+                fin = bisect_right(self._date_index, end_date)
         
-        periods = {
-            'YTD': datetime(current_year, 1, 1),        # Début d'année
-            '3M': today - timedelta(days=90),           # 3 mois
-            '6M': today - timedelta(days=180),          # 6 mois
-            '1Y': today - timedelta(days=365),          # 1 an
-            '3Y': today - timedelta(days=1095)          # 3 ans
-        }
+        return debut, max(fin - debut, 0)
+    
+    def filter_data_by_period(self, start_date, end_date=None):
+        """
+        Filtre les données à partir d'une date de début (et jusqu'à une date de fin optionnelle)
+        Retourne une vue sans copie sur self.data
+        """
+        offset, length = self.get_period_bounds(start_date, end_date)
+        return PeriodView(self.data, offset, length)
+    
+    def _price_array(self, period_data):
+        """
+        Convertit une période (liste de dictionnaires ou tableau) en tableau float64
+        """
+        if isinstance(period_data, np.ndarray):
+            return period_data
+        
+        # Vue sur nos propres données: tranche du tableau de prix, sans copie
+        if isinstance(period_data, PeriodView) and period_data.data is self.data:
+            return self._prices[period_data.offset:period_data.offset + period_data.length]
         
-        return periods
+        return np.fromiter((item['price'] for item in period_data), dtype=np.float64, count=len(period_data))
+    
+    def compute_metrics(self, period_data):
+        """
+        Calcule toutes les métriques d'une période en un seul passage
+        
+        Un seul parcours des prix: moyenne/variance des rendements (Welford),
+        pic courant et drawdown, premier/dernier prix. Aucune liste intermédiaire.
+        Retourne un dictionnaire performance, volatilite, rendement_espere, max_drawdown
+        """
+        if instrumentation.enabled():
+            return self._compute_metrics_traced(period_data)
+        return self._compute_metrics(period_data)
     
-    def filter_data_by_period(self, start_date):
+    def _compute_metrics_traced(self, period_data):
         """
-        Filtre les données à partir d'une date de début
+        compute_metrics instrumenté: durée de chaque métrique (moteur numpy)
+        ou du passage unique qui les calcule toutes (moteur python)
         """
-        filtered = [item for item in self.data if item['date'] >= start_date]
-        return filtered
+        with instrumentation.span('calcul_metriques', moteur=self.engine, nb_points=len(period_data)):
+            instrumentation.count('points_analyses_total', len(period_data), moteur=self.engine)
+            if self.engine != 'numpy':
+                return self._compute_metrics(period_data)
+            
+            prices = self._price_array(period_data)
+            with instrumentation.span('metrique_rendements_quotidiens'):
+                daily_returns = _np_daily_returns(prices)
+            
+            metrics = {}
+            for name, func, values in [('performance', _np_performance, prices),
+                                       ('volatilite', _np_volatility, daily_returns),
+                                       ('rendement_espere', _np_expected_return, daily_returns),
+                                       ('max_drawdown', _np_max_drawdown, prices)]:
+                with instrumentation.span(f"metrique_{name}"):
+                    metrics[name] = func(values)
+            
+            return metrics
+    
+    def _compute_metrics(self, period_data):
+        if self.engine == 'numpy':
+            prices = self._price_array(period_data)
+            daily_returns = _np_daily_returns(prices)
+            return {
+                'performance': _np_performance(prices),
+                'volatilite': _np_volatility(daily_returns),
+                'rendement_espere': _np_expected_return(daily_returns),
+                'max_drawdown': _np_max_drawdown(prices)
+            }
+        
+        nb_points = 0
+        prix_initial = prix_precedent = peak = None
+        
+        # État de Welford sur les rendements quotidiens
+        nb_rendements = 0
+        moyenne = 0.0
+        m2 = 0.0
+        
+        max_drawdown = 0.0
+        
+        for item in period_data:
+            price = item['price']
+            nb_points += 1
+            
+            if prix_initial is None:
+                prix_initial = peak = price
+            else:
+                if prix_precedent > 0:
+                    rendement = (price / prix_precedent) - 1
+                    nb_rendements += 1
+                    delta = rendement - moyenne
+                    moyenne += delta / nb_rendements
+                    m2 += delta * (rendement - moyenne)
+                
+                if price > peak:
+                    peak = price
+            
+            current_drawdown = ((price / peak) - 1) * 100
+            if current_drawdown < max_drawdown:
+                max_drawdown = current_drawdown
+            
+            prix_precedent = price
+        
+        if nb_points < 2:
+            return {'performance': 0.0, 'volatilite': 0.0, 'rendement_espere': 0.0, 'max_drawdown': 0.0}
+        
+        # Performance
+        if prix_initial <= 0:
+            performance = 0.0
+        else:
+            performance = round(((prix_precedent / prix_initial) - 1) * 100, 2)
+        
+        # Volatilité annualisée (252 jours de trading)
+        if nb_rendements < 2:
+            volatilite = 0.0
+        else:
+            volatilite = round(math.sqrt(m2 / nb_rendements) * math.sqrt(252) * 100, 2)
+        
+        # Rendement espéré annualisé
+        if nb_rendements == 0:
+            rendement_espere = 0.0
+        else:
+            rendement_espere = round(moyenne * 252 * 100, 2)
+        
+        return {
+            'performance': performance,
+            'volatilite': volatilite,
+            'rendement_espere': rendement_espere,
+            'max_drawdown': round(max_drawdown, 2)
+        }
     
     def calculate_performance(self, period_data):
         """
         Calcule la performance totale en pourcentage
         Performance = ((Prix_final / Prix_initial) - 1) × 100
         """
+        if self.engine == 'numpy':
+            return _np_performance(self._price_array(period_data))
+        
         if len(period_data) < 2:
             return 0.0
         
@@ -77,8 +708,11 @@ class FinancialCalculator:
     
     def calculate_daily_returns(self, period_data):
         """
-        Calcule les rendements quotidiens
+        Calcule les rendements quotidiens (liste, quel que soit le moteur)
         """
+        if self.engine == 'numpy':
+            return _np_daily_returns(self._price_array(period_data)).tolist()
+        
         if len(period_data) < 2:
             return []
         
@@ -98,85 +732,102 @@ class FinancialCalculator:
         Calcule la volatilité annualisée en pourcentage
         
         """
-        daily_returns = self.calculate_daily_returns(period_data)
+        if self.engine == 'numpy':
+            return _np_volatility(_np_daily_returns(self._price_array(period_data)))
         
-        if len(daily_returns) < 2:
-            return 0.0
-        
-        # Calcul de l'écart-type
-        moyenne = sum(daily_returns) / len(daily_returns)
-        variance = sum((r - moyenne) ** 2 for r in daily_returns) / len(daily_returns)
-        ecart_type = math.sqrt(variance)
-        
-        # Annualisation (252 jours de trading)
-        volatilite_annualisee = ecart_type * math.sqrt(252) * 100
-        
-        return round(volatilite_annualisee, 2)
+        return self.compute_metrics(period_data)['volatilite']
     
     def calculate_expected_return(self, period_data):
         """
         Calcule le rendement espéré annualisé en pourcentage
         """
-        daily_returns = self.calculate_daily_returns(period_data)
+        if self.engine == 'numpy':
+            return _np_expected_return(_np_daily_returns(self._price_array(period_data)))
         
-        if len(daily_returns) == 0:
-            return 0.0
-        
-        # Moyenne des rendements quotidiens
-        moyenne_quotidienne = sum(daily_returns) / len(daily_returns)
-        
-        # Annualisation
-        rendement_espere_annuel = moyenne_quotidienne * 252 * 100
-        
-        return round(rendement_espere_annuel, 2)
+        return self.compute_metrics(period_data)['rendement_espere']
     
     def calculate_max_drawdown(self, period_data):
         """
         Calcule le Maximum Drawdown en pourcentage
         """
-        if len(period_data) < 2:
-            return 0.0
+        if self.engine == 'numpy':
+            return _np_max_drawdown(self._price_array(period_data))
         
-        prices = [item['price'] for item in period_data]
+        return self.compute_metrics(period_data)['max_drawdown']
+    
+    def analyze_period(self, period_name, start_date, end_date=None):
+        """
+        Analyse complète d'une période
+        Avec un cache, une période dont la fenêtre de données n'a pas changé n'est pas recalculée
+        """
+        print(f"   Analyse {period_name}...")
         
-        # Calcul du drawdown à chaque point
-        peak = prices[0]  # Premier pic
-        max_drawdown = 0.0
+        with instrumentation.span('analyse_periode', periode=period_name, moteur=self.engine) as span:
+            metrics = self._analyze_period_cached(period_name, start_date, end_date)
+            span.set(nb_points=metrics['nb_points'] if metrics else 0)
         
-        for price in prices:
-            # Nouveau pic
-            if price > peak:
-                peak = price
-            
-            # Calcul du drawdown actuel
-            current_drawdown = ((price / peak) - 1) * 100
-            
-            # Mise à jour du max drawdown (plus négatif)
-            if current_drawdown < max_drawdown:
-                max_drawdown = current_drawdown
+        return metrics
+    
+    def _analyze_period_cached(self, period_name, start_date, end_date=None):
+        if self.cache is None:
+            return self._analyze_period(period_name, start_date, end_date)
+        
+        offset, length = self.get_period_bounds(start_date, end_date)
+        if length < 2:
+            print(f"Données insuffisantes pour {period_name}")
+            return None
+        
+        key = self.fingerprint(offset, length)
+        metrics = self.cache.get(key)
+        instrumentation.count('cache_periodes_total', resultat='absent' if metrics is None else 'present')
+        if metrics is None:
+            metrics = self._analyze_period(period_name, start_date, end_date)
+            if metrics:
+                self.cache.put(key, metrics)
         
-        return round(max_drawdown, 2)
+        return metrics
     
-    def analyze_period(self, period_name, start_date):
+    def fingerprint(self, offset, length):
         """
-        Analyse complète d'une période
+        Empreinte d'une fenêtre [offset, offset + length): longueur et dernière date de la série,
+        bornes de la fenêtre et CRC32 de ses prix
         """
-        print(f"   Analyse {period_name}...")
+        if self.engine == 'numpy':
+            prix = np.ascontiguousarray(self._prices[offset:offset + length])
+            premiere = self._dates[offset].item()
+            derniere = self._dates[offset + length - 1].item()
+        else:
+            prix = array('d', (item['price'] for item in islice(self._data, offset, offset + length)))
+            premiere = self._data[offset]['date']
+            derniere = self._data[offset + length - 1]['date']
+        
+        return '|'.join([
+            str(len(self)),
+            self._last_date().strftime('%Y-%m-%d'),
+            premiere.strftime('%Y-%m-%d'),
+            derniere.strftime('%Y-%m-%d'),
+            str(length),
+            f"{zlib.crc32(prix):08x}"
+        ])
+    
+    def _analyze_period(self, period_name, start_date, end_date=None):
+        if self.engine == 'numpy' and self._windows is None:
+            return self._analyze_period_numpy(period_name, start_date, end_date)
         
         # Filtrage des données
-        period_data = self.filter_data_by_period(start_date)
+        period_data = self.filter_data_by_period(start_date, end_date)
         
         if len(period_data) < 2:
             print(f"Données insuffisantes pour {period_name}")
             return None
         
-        # Calcul des métriques
-        metrics = {
-            'performance': self.calculate_performance(period_data),
-            'volatilite': self.calculate_volatility(period_data),
-            'rendement_espere': self.calculate_expected_return(period_data),
-            'max_drawdown': self.calculate_max_drawdown(period_data)
-        }
+        # Mode incrémental: état de la période mis à jour au lieu d'un recalcul
+        window = self._current_window(period_name, start_date, end_date)
+        if window is not None:
+            metrics = window.metrics()
+        else:
+            # Calcul des métriques (un seul passage sur la période)
+            metrics = self.compute_metrics(period_data)
         
         # Informations complémentaires
         metrics.update({
@@ -189,13 +840,52 @@ class FinancialCalculator:
         
         return metrics
     
-    def analyze_all_periods(self):
+    def _current_window(self, period_name, start_date, end_date):
         """
-        Analyse toutes les périodes définies
+        État incrémental de la période, avancé jusqu'à start_date (None hors mode incrémental)
         """
-
+        if self._windows is None or end_date is not None or period_name not in self._windows:
+            return None
+        
+        window = self._windows[period_name]
+        if window.offset < len(self.data) and self.data[window.offset]['date'] < start_date:
+            window.evict_before(start_date)
+        elif window.offset > 0 and self.data[window.offset - 1]['date'] >= start_date:
+            # Début de période reculé: reconstruction de l'état
+            window = self._windows[period_name] = self._build_window(start_date)
+        
+        return window
+    
+    def _analyze_period_numpy(self, period_name, start_date, end_date=None):
+        """
+        Analyse d'une période sur les tableaux NumPy (rendements calculés une seule fois)
+        """
+        offset, length = self.get_period_bounds(start_date, end_date)
+        prices = self._prices[offset:offset + length]
+        dates = self._dates[offset:offset + length]
+        
+        if len(prices) < 2:
+            print(f"Données insuffisantes pour {period_name}")
+            return None
         
-        periods = self.get_period_dates()
+        metrics = self.compute_metrics(prices)
+        
+        metrics.update({
+            'nb_points': len(prices),
+            'date_debut': str(dates[0].astype('datetime64[D]')),
+            'date_fin': str(dates[-1].astype('datetime64[D]')),
+            'prix_debut': round(float(prices[0]), 2),
+            'prix_fin': round(float(prices[-1]), 2)
+        })
+        
+        return metrics
+    
+    @instrumentation.traced('analyse_periodes')
+    def analyze_all_periods(self, extended=False):
+        """
+        Analyse toutes les périodes définies
+        """
+        periods = self.get_period_dates(extended)
         results = {}
         
         for period_name, start_date in periods.items():
@@ -211,37 +901,145 @@ class FinancialCalculator:
         
         return results
     
+    @instrumentation.traced('metriques_glissantes')
+    def rolling_metrics(self, window=252, risk_free_rate=0.0):
+        """
+        Calcule les métriques glissantes sur une fenêtre de `window` rendements, en O(n)
+        
+        Pour chaque date (à partir de la première fenêtre complète):
+        - rendement: performance en % sur la fenêtre
+        - volatilite: volatilité annualisée en % (sommes glissantes des rendements)
+        - sharpe: (rendement annualisé - risk_free_rate) / volatilité annualisée
+        - drawdown: perte en % depuis le plus haut de la fenêtre
+        - max_drawdown: pire drawdown des prix de la fenêtre (file à deux piles, voir _DrawdownQueue)
+        Comme compute_metrics, aucun rendement n'est calculé après un prix nul ou négatif.
+        """
+        if window < 2:
+            raise ValueError("La fenêtre doit contenir au moins 2 rendements")
+        
+        if self.engine == 'numpy':
+            prices = self._prices.tolist()
+        else:
+            prices = [item['price'] for item in self.data]
+        
+        n = len(prices)
+        series = {field: array('d') for field in RollingMetrics.FIELDS}
+        
+        if n <= window:
+            return RollingMetrics(window, [], series)
+        
+        # Rendements décalés par une constante pour limiter les erreurs d'arrondi
+        # (None après un prix nul ou négatif)
+        rendements = [None] * n
+        for i in range(1, n):
+            if prices[i-1] > 0:
+                rendements[i] = (prices[i] / prices[i-1]) - 1
+        decalage = next((r for r in rendements if r is not None), 0.0)
+        somme = 0.0
+        somme_carres = 0.0
+        nb_rendements = 0
+        
+        # Prix de la fenêtre (window + 1 derniers prix)
+        fenetre = _DrawdownQueue()
+        
+        racine_252 = math.sqrt(252)
+        
+        for i in range(n):
+            price = prices[i]
+            
+            # Sommes glissantes sur les `window` derniers rendements
+            r = rendements[i]
+            if r is not None:
+                r -= decalage
+                somme += r
+                somme_carres += r * r
+                nb_rendements += 1
+            if i > window:
+                r = rendements[i - window]
+                if r is not None:
+                    r -= decalage
+                    somme -= r
+                    somme_carres -= r * r
+                    nb_rendements -= 1
+            
+            fenetre.push(price)
+            if i > window:
+                fenetre.popleft()
+            
+            if i < window:
+                continue
+            
+            if nb_rendements:
+                moyenne_decalee = somme / nb_rendements
+                rendement_annuel = (moyenne_decalee + decalage) * 252
+            else:
+                moyenne_decalee = rendement_annuel = 0.0
+            
+            if nb_rendements >= 2:
+                variance = max(somme_carres / nb_rendements - moyenne_decalee * moyenne_decalee, 0.0)
+                volatilite = math.sqrt(variance) * racine_252
+            else:
+                volatilite = 0.0
+            
+            plus_haut, _, max_drawdown = fenetre.aggregate()
+            drawdown = price / plus_haut - 1 if plus_haut > 0 else 0.0
+            prix_debut = prices[i - window]
+            
+            series['rendement'].append(((price / prix_debut) - 1) * 100 if prix_debut > 0 else 0.0)
+            series['volatilite'].append(volatilite * 100)
+            series['sharpe'].append((rendement_annuel - risk_free_rate) / volatilite if volatilite > 0 else 0.0)
+            series['drawdown'].append(drawdown * 100)
+            series['max_drawdown'].append(max_drawdown * 100)
+        
+        if self.engine == 'numpy':
+            dates = self._dates[window:].tolist()
+        else:
+            dates = self._date_index[window:]
+        
+        return RollingMetrics(window, dates, series)
     
-    
+    @instrumentation.traced('export_csv')
     def export_to_csv(self, results, filename="analyse_financiere.csv"):
         """
         Exporte les résultats vers un fichier CSV
+        Accepte les résultats par période ou des métriques glissantes (RollingMetrics)
         """
         if not results:
             print("Aucune donnée à exporter")
             return
         
+        if isinstance(results, RollingMetrics):
+            return self._export_rolling_to_csv(results, filename)
+        
+        # Colonnes
+        fieldnames = ['periode', 'performance', 'volatilite', 'rendement_espere', 
+                     'max_drawdown', 'nb_points', 'date_debut', 'date_fin', 
+                     'prix_debut', 'prix_fin']
+        
         try:
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                # Colonnes
-                fieldnames = ['periode', 'performance', 'volatilite', 'rendement_espere', 
-                             'max_drawdown', 'nb_points', 'date_debut', 'date_fin', 
-                             'prix_debut', 'prix_fin']
-                
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                # Données
-                for period, metrics in results.items():
-                    row = {'periode': period}
-                    row.update(metrics)
-                    writer.writerow(row)
+            # Fichier temporaire renommé en fin d'écriture (.gz: compressé)
+            with CSVExporter(filename, fieldnames) as exporter:
+                exporter.write_rows(period_rows(results))
             
             print(f"Résultats exportés vers {filename}")
             
         except Exception as e:
             print(f"Erreur export CSV: {e}")
     
+    def _export_rolling_to_csv(self, rolling, filename):
+        """
+        Exporte des métriques glissantes vers un fichier CSV (une ligne par date)
+        """
+        try:
+            with CSVExporter(filename, ['date'] + list(RollingMetrics.FIELDS)) as exporter:
+                exporter.write_rows(rolling.iter_rows())
+            
+            print(f"Métriques glissantes exportées vers {filename}")
+            
+        except Exception as e:
+            print(f"Erreur export CSV: {e}")
+    
+    @instrumentation.traced('export_json')
     def export_to_json(self, results, filename="analyse_financiere.json"):
         """
         Exporte les résultats vers un fichier JSON
@@ -255,23 +1053,83 @@ class FinancialCalculator:
             rapport = {
                 'analyse_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 'donnees_source': {
-                    'nb_points_total': len(self.data),
-                    'periode_complete': f"{self.data[0]['date'].strftime('%Y-%m-%d')} → {self.data[-1]['date'].strftime('%Y-%m-%d')}"
-                },
-                'metriques_par_periode': results,
-                'definitions': {
+                    'nb_points_total': len(self),
+                    'periode_complete': self._date_range_label()
+                }
+            }
+            
+            if isinstance(results, RollingMetrics):
+                rapport['metriques_glissantes'] = results.to_dict()
+                rapport['definitions'] = {
+                    'rendement': 'Performance en % sur la fenêtre glissante',
+                    'volatilite': 'Volatilité annualisée en % sur la fenêtre glissante',
+                    'sharpe': 'Ratio de Sharpe annualisé sur la fenêtre glissante',
+                    'drawdown': 'Perte en % depuis le plus haut de la fenêtre',
+                    'max_drawdown': 'Pire drawdown observé dans la fenêtre'
+                }
+            else:
+                rapport['metriques_par_periode'] = results
+                rapport['definitions'] = {
                     'performance': 'Rendement total en % ((Prix_fin/Prix_début)-1)*100',
                     'volatilite': 'Volatilité annualisée en % (écart-type quotidien * √252)',
                     'rendement_espere': 'Rendement espéré annualisé en % (moyenne quotidienne * 252)',
                     'max_drawdown': 'Plus grande perte en % depuis un pic précédent'
                 }
-            }
             
-            with open(filename, 'w', encoding='utf-8') as jsonfile:
+            with AtomicFile(filename) as jsonfile:
                 json.dump(rapport, jsonfile, indent=2, ensure_ascii=False)
             
             print(f"Rapport complet exporté vers {filename}")
             
         except Exception as e:
             print(f"Erreur export JSON: {e}")
+    
+    @instrumentation.traced('export_ndjson')
+    def export_to_ndjson(self, results, filename="analyse_financiere.ndjson", isin=None, append=False):
+        """
+        Exporte les résultats en JSON par ligne (une ligne par période, ou par date pour des
+        métriques glissantes), écrits en flux; .gz: compressé
+        append: ajoute les lignes au fichier existant (historique des analyses successives)
+        """
+        if not results:
+            print("Aucune donnée à exporter")
+            return
+        
+        if isinstance(results, RollingMetrics):
+            rows = results.iter_rows()
+        else:
+            rows = period_rows(results, isin)
+        
+        try:
+            with NDJSONExporter(filename, append=append) as exporter:
+                exporter.write_rows(rows)
+            
+            print(f"{exporter.count} lignes exportées vers {filename}")
+        
+        except Exception as e:
+            print(f"Erreur export NDJSON: {e}")
+
+    @instrumentation.traced('export_sqlite')
+    def export_to_sqlite(self, results, isin, database=DEFAULT_DATABASE):
+        """
+        Enregistre les résultats par période dans la base SQLite (table metrics)
+        La date d'arrêté est la dernière date des données: les calculs précédents sont conservés
+        database: nom de fichier ou OPCVMDatabase déjà ouverte
+        """
+        if not results:
+            print("Aucune donnée à exporter")
+            return
+
+        try:
+            db = database if isinstance(database, OPCVMDatabase) else OPCVMDatabase(database)
+            try:
+                nb = db.save_metrics(isin, results, as_of_date=self._last_date())
+            finally:
+                if db is not database:
+                    db.close()
+            
+            print(f"{nb} périodes enregistrées dans {db.filename}")
+        
+        except Exception as e:
+            print(f"Erreur export SQLite: {e}")
 
@@ -0,0 +1,205 @@
+"""
+Point d'entrée unique en ligne de commande
+    python cli.py scrape  [ISIN] [--symbols SYM1,SYM2] [--json opcvm_data.json] [--incremental]
+    python cli.py analyse [ISIN] [--input opcvm_data.json] [--engine python|numpy]
+    python cli.py batch   ISIN1 ISIN2 ... | --file isins.txt
+    python cli.py export  ISIN --input opcvm_data.json --output opcvm.db
+Seul argparse est importé au démarrage: chaque sous-commande importe ce dont elle a besoin
+(requests uniquement pour le scraping, numpy uniquement pour le moteur numpy et le stockage binaire)
+"""
+import argparse
+import os
+import sys
+
+DEFAULT_ISIN = "IE0002XZSHO1"
+
+
+def storage_kind(path):
+    """
+    Format d'un fichier de données d'après son extension (répertoire: stockage binaire)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.db', '.sqlite', '.sqlite3'):
+        return 'sqlite'
+    if extension in ('.json', '.csv'):
+        return extension[1:]
+    return 'store'
+
+
+def load_history(isin, path):
+    """
+    Historique d'un ISIN (liste de dictionnaires date/price/source) depuis un fichier JSON ou CSV
+    du scraper, une base SQLite ou un répertoire du stockage binaire
+    """
+    kind = storage_kind(path)
+    
+    if kind == 'json':
+        import json
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('historical_data', [])
+    
+    if kind == 'csv':
+        import csv
+        
+        with open(path, 'r', newline='', encoding='utf-8') as csvfile:
+            return [{'date': row['date'], 'price': float(row['price']), 'source': row.get('source', '')}
+                    for row in csv.DictReader(csvfile)]
+    
+    if kind == 'sqlite':
+        from database import OPCVMDatabase
+        
+        with OPCVMDatabase(path) as db:
+            return db.load_prices(isin)
+    
+    from timeseries_store import TimeSeriesStore
+    
+    return TimeSeriesStore(path).load(isin, mmap=False).to_historical_data()
+
+
+def write_history(isin, historical_data, path):
+    """
+    Écrit l'historique d'un ISIN au format déduit de path (voir load_history)
+    """
+    kind = storage_kind(path)
+    
+    if kind == 'json':
+        import json
+        
+        from scraping import build_result, get_fund_info
+        
+        with open(path, 'w', encoding='utf-8') as jsonfile:
+            json.dump(build_result(get_fund_info(isin), historical_data), jsonfile, indent=2, ensure_ascii=False)
+    
+    elif kind == 'csv':
+        import csv
+        
+        with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=['date', 'price', 'source'], extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(historical_data)
+    
+    elif kind == 'sqlite':
+        from database import OPCVMDatabase
+        
+        with OPCVMDatabase(path) as db:
+            db.upsert_prices(isin, historical_data)
+    
+    else:
+        from timeseries_store import PriceSeries, TimeSeriesStore
+        
+        TimeSeriesStore(path).merge(isin, PriceSeries.from_historical_data(historical_data))
+    
+    print(f"{len(historical_data)} points de {isin} exportés vers {path}")
+
+
+def command_scrape(args, parser):
+    from scraping import main
+    
+    symbols = [s.strip() for s in args.symbols.split(',') if s.strip()] if args.symbols else None
+    main(args.isin, symbols, args.csv or None, args.json or None, args.sqlite or None, args.incremental,
+         args.cache_dir or None)
+
+
+def command_analyse(args, parser):
+    from analyse import main
+    
+    main(args.isin, args.input, args.csv or None, args.json or None, args.sqlite or None,
+         args.engine, args.extended, scrape=not args.no_scrape, cache_dir=args.cache_dir or None)
+
+
+def command_batch(args, parser):
+    import batch
+    
+    batch.run(args, parser)
+
+
+def command_export(args, parser):
+    try:
+        historical_data = load_history(args.isin, args.input)
+    except (OSError, ValueError) as e:
+        print(f"Erreur lecture {args.input}: {e}")
+        return 1
+    
+    if not historical_data:
+        print(f"Aucune donnée pour {args.isin} dans {args.input}")
+        return 1
+    
+    for output in args.output:
+        write_history(args.isin, historical_data, output)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Scraping et analyse d'OPCVM")
+    parser.add_argument('--trace', help="Spans en lignes JSON (instrumentation)")
+    parser.add_argument('--metrics', help="Compteurs au format Prometheus (instrumentation)")
+    parser.add_argument('--profile', help="Répertoire des profils cProfile / tracemalloc")
+    parser.add_argument('--limits', help="Limites de débit, reprises et disjoncteurs (fichier JSON)")
+    sub = parser.add_subparsers(dest='command', metavar='commande')
+    sub.required = True
+    
+    scrape = sub.add_parser('scrape', help="Récupère l'historique d'un fonds")
+    scrape.add_argument('isin', nargs='?', default=DEFAULT_ISIN)
+    scrape.add_argument('--symbols', help="Symboles Yahoo Finance à essayer (SYM1,SYM2)")
+    scrape.add_argument('--json', default="opcvm_data.json", help="Fichier JSON ('' pour désactiver)")
+    scrape.add_argument('--csv', default="opcvm_data.csv", help="Fichier CSV ('' pour désactiver)")
+    scrape.add_argument('--sqlite', default="", help="Base SQLite des historiques")
+    scrape.add_argument('--incremental', action='store_true',
+                        help="Complète l'historique du fichier JSON au lieu de tout récupérer")
+    scrape.add_argument('--cache-dir', default=".cache_http", help="Cache des réponses HTTP ('' pour désactiver)")
+    scrape.set_defaults(func=command_scrape)
+    
+    analyse = sub.add_parser('analyse', help="Analyse financière d'un fonds")
+    analyse.add_argument('isin', nargs='?', default=DEFAULT_ISIN)
+    analyse.add_argument('--input', default="opcvm_data.json", help="Fichier JSON du scraper")
+    analyse.add_argument('--engine', default="python", choices=['python', 'numpy'])
+    analyse.add_argument('--extended', action='store_true', help="Périodes 1M, 5Y, 10Y et Origine")
+    analyse.add_argument('--no-scrape', action='store_true', help="Ne pas scraper si le fichier est absent")
+    analyse.add_argument('--cache-dir', default=".cache_http", help="Cache des réponses HTTP ('' pour désactiver)")
+    analyse.add_argument('--csv', default="analyse_opcvm.csv", help="Export CSV ('' pour désactiver)")
+    analyse.add_argument('--json', default="analyse_opcvm.json", help="Export JSON ('' pour désactiver)")
+    analyse.add_argument('--sqlite', default="opcvm.db", help="Base SQLite des métriques ('' pour désactiver)")
+    analyse.set_defaults(func=command_analyse)
+    
+    batch = sub.add_parser('batch', help="Analyse en lot de plusieurs fonds")
+    # Options définies dans batch.py (import local: la commande batch seule en a besoin)
+    from batch import add_arguments
+    add_arguments(batch)
+    batch.set_defaults(func=command_batch)
+    
+    export = sub.add_parser('export', help="Convertit l'historique d'un fonds entre formats "
+                                           "(.json, .csv, .db/.sqlite, répertoire du stockage binaire)")
+    export.add_argument('isin')
+    export.add_argument('--input', default="opcvm_data.json", help="Fichier ou répertoire source")
+    export.add_argument('--output', action='append', required=True, help="Destination (répétable)")
+    export.set_defaults(func=command_export)
+    
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    if args.limits:
+        from rate_limit import configure_limits
+        
+        try:
+            configure_limits(args.limits)
+        except (OSError, ValueError) as e:
+            parser.error(f"Fichier de limites {args.limits}: {e}")
+    
+    import instrumentation
+    
+    if args.trace or args.metrics or args.profile:
+        instrumentation.enable(args.trace, args.metrics, args.profile)
+    else:
+        # Variables d'environnement OPCVM_TRACE / OPCVM_METRICS / OPCVM_PROFILE
+        instrumentation.enable_from_env()
+    
+    return args.func(args, parser) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
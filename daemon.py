@@ -0,0 +1,411 @@
+"""
+Mode démon: mise à jour automatique et périodique d'un univers d'OPCVM
+Un seul processus garde en mémoire la session HTTP, les séries et les calculateurs.
+Chaque fonds est rafraîchi après la clôture de son marché (décalage propre au fonds + gigue),
+seuls les fonds ayant de nouveaux points sont recalculés. L'état (dernier point, prochaine
+mise à jour) est enregistré dans un fichier de reprise: un redémarrage ne relance pas tout le scraping
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import threading
+import zlib
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import instrumentation
+from batch import read_isin_file
+from calcul import FinancialCalculator
+from database import DEFAULT_DATABASE, OPCVMDatabase
+from rate_limit import configure_limits
+
+CHECKPOINT_FILE = "daemon_state.json"
+
+# Marchés: fuseau horaire et heure de clôture locale
+MARKETS = {
+    'paris': ('Europe/Paris', time(17, 30)),
+    'xetra': ('Europe/Berlin', time(17, 30)),
+    'londres': ('Europe/London', time(16, 30)),
+    'new_york': ('America/New_York', time(16, 0))
+}
+DEFAULT_MARKET = 'paris'
+
+# Marché déduit du suffixe du symbole Yahoo, sinon du pays de l'ISIN
+SUFFIX_MARKETS = {'.PA': 'paris', '.DE': 'xetra', '.F': 'xetra', '.L': 'londres'}
+COUNTRY_MARKETS = {'FR': 'paris', 'DE': 'xetra', 'GB': 'londres', 'US': 'new_york'}
+
+
+def market_for(isin, symbols=None):
+    """
+    Marché de référence d'un fonds (heure de publication de sa valeur liquidative)
+    """
+    for symbol in symbols or []:
+        for suffix, market in SUFFIX_MARKETS.items():
+            if symbol.upper().endswith(suffix):
+                return market
+    return COUNTRY_MARKETS.get(isin[:2].upper(), DEFAULT_MARKET)
+
+
+def spread_offset(isin, spread):
+    """
+    Décalage fixe d'un fonds dans la fenêtre de répartition (secondes, stable entre redémarrages)
+    """
+    if spread <= 0:
+        return 0
+    return zlib.crc32(isin.encode('utf-8')) % int(spread)
+
+
+def next_refresh(market, isin, now, delay=3600, spread=7200, jitter=300, rng=random):
+    """
+    Prochaine mise à jour d'un fonds: clôture du marché du prochain jour ouvré
+    + delay (publication des VL) + décalage du fonds dans spread + gigue aléatoire
+    now: datetime avec fuseau horaire
+    """
+    tz_name, close = MARKETS[market]
+    tz = ZoneInfo(tz_name)
+    jour = now.astimezone(tz).date()
+    
+    for i in range(8):
+        d = jour + timedelta(days=i)
+        if d.weekday() >= 5:
+            continue
+        moment = (datetime.combine(d, close, tz)
+                  + timedelta(seconds=delay + spread_offset(isin, spread) + rng.uniform(0, jitter)))
+        if moment > now:
+            return moment
+    
+    return now + timedelta(days=1)
+
+
+class FundState:
+    """
+    État en mémoire d'un fonds: scraper, dernier résultat, calculateur et planification
+    """
+    
+    def __init__(self, isin, symbols=None, market=None):
+        self.isin = isin
+        self.symbols = symbols
+        self.market = market or market_for(isin, symbols)
+        self.scraper = None
+        self.stored = None
+        self.calculator = None
+        self.results = None
+        self.last_point = None
+        self.last_refresh = None
+        self.next_run = None
+        self.failures = 0
+    
+    def to_checkpoint(self):
+        return {
+            'marche': self.market,
+            'dernier_point': self.last_point,
+            'derniere_maj': self.last_refresh.isoformat() if self.last_refresh else None,
+            'prochaine_maj': self.next_run.isoformat() if self.next_run else None,
+            'echecs': self.failures
+        }
+
+
+class RefreshDaemon:
+    def __init__(self, funds, data_dir="data", checkpoint=CHECKPOINT_FILE, database=DEFAULT_DATABASE,
+                 engine="numpy", delay=3600, spread=7200, jitter=300, retry_delay=1800,
+                 max_failures=3, seed=None, scraper_options=None):
+        """
+        funds: liste d'ISIN ou de tuples (isin, symboles)
+        data_dir: répertoire des séries <ISIN>.json (même format que batch.py)
+        checkpoint: fichier de reprise (JSON), database: base SQLite des métriques (None: pas d'export)
+        delay: délai après la clôture (secondes), spread: fenêtre de répartition des fonds,
+        jitter: gigue aléatoire, retry_delay: délai avant une nouvelle tentative après un échec
+        max_failures: échecs consécutifs avant de reporter le fonds à la clôture suivante
+        scraper_options: arguments supplémentaires d'OPCVMScraper (ex: yahoo_base_url)
+        """
+        self.data_dir = data_dir
+        self.checkpoint = checkpoint
+        self.database = database
+        self.engine = engine
+        self.delay = delay
+        self.spread = spread
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+        self.max_failures = max_failures
+        self.rng = random.Random(seed)
+        self.scraper_options = scraper_options or {}
+        self.session = None
+        self._stop = threading.Event()
+        
+        self.funds = {}
+        for fund in funds:
+            isin, symbols = fund if isinstance(fund, tuple) else (fund, None)
+            self.funds[isin] = FundState(isin, symbols)
+        
+        self.load_checkpoint()
+    
+    def now(self):
+        return datetime.now(timezone.utc)
+    
+    def load_checkpoint(self):
+        """
+        Reprend l'état enregistré: dernier point connu et prochaine mise à jour de chaque fonds
+        """
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return
+        
+        try:
+            with open(self.checkpoint, 'r', encoding='utf-8') as f:
+                etat = json.load(f).get('fonds', {})
+        except (OSError, ValueError) as e:
+            print(f"Fichier de reprise illisible ({e}): état ignoré")
+            return
+        
+        for isin, fund_state in etat.items():
+            state = self.funds.get(isin)
+            if state is None:
+                continue
+            state.last_point = fund_state.get('dernier_point')
+            state.failures = fund_state.get('echecs', 0)
+            if fund_state.get('derniere_maj'):
+                state.last_refresh = datetime.fromisoformat(fund_state['derniere_maj'])
+            if fund_state.get('prochaine_maj'):
+                state.next_run = datetime.fromisoformat(fund_state['prochaine_maj'])
+        
+        print(f"État repris depuis {self.checkpoint} ({len(etat)} fonds)")
+    
+    def save_checkpoint(self):
+        """
+        Enregistre l'état (fichier temporaire puis renommage: jamais de fichier tronqué)
+        """
+        if not self.checkpoint:
+            return
+        
+        etat = {
+            'sauvegarde': self.now().isoformat(),
+            'fonds': {isin: state.to_checkpoint() for isin, state in self.funds.items()}
+        }
+        tmp_path = f"{self.checkpoint}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(etat, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.checkpoint)
+        except OSError as e:
+            print(f"Erreur sauvegarde de l'état: {e}")
+    
+    def data_file(self, isin):
+        return os.path.join(self.data_dir, f"{isin}.json")
+    
+    def _warm(self, state):
+        """
+        Prépare le fonds: scraper (session HTTP partagée) et dernier résultat stocké
+        """
+        if state.scraper is None:
+            # Import local: requests n'est chargé qu'au premier rafraîchissement
+            from scraping import OPCVMScraper
+            
+            state.scraper = OPCVMScraper(state.isin, symbols=state.symbols, **self.scraper_options)
+            if self.session is None:
+                self.session = state.scraper.session
+            else:
+                state.scraper.session = self.session
+        
+        if state.stored is None and os.path.exists(self.data_file(state.isin)):
+            with open(self.data_file(state.isin), 'r', encoding='utf-8') as f:
+                state.stored = json.load(f)
+    
+    def _update_calculator(self, state, historical_data):
+        """
+        Ajoute les nouveaux points au calculateur en mémoire (mode incrémental)
+        ou le crée à partir de l'historique complet
+        """
+        if state.calculator is not None:
+            for item in historical_data:
+                if item['date'] > state.last_point:
+                    state.calculator.append(item['date'], item['price'])
+            return
+        
+        state.calculator = FinancialCalculator(historical_data, engine=self.engine, incremental=True)
+    
+    def refresh(self, state):
+        """
+        Met à jour un fonds: récupération incrémentale, puis recalcul s'il y a de nouveaux points
+        Retourne True si le fonds a été recalculé
+        """
+        with instrumentation.span('rafraichissement', isin=state.isin, marche=state.market) as span:
+            self._warm(state)
+            
+            if state.stored:
+                result = state.scraper.scrape_incremental(state.stored)
+            else:
+                result = state.scraper.scrape_all_sources()
+            
+            if not result or not result.get('historical_data'):
+                raise RuntimeError("Aucune donnée récupérée")
+            
+            historical_data = result['historical_data']
+            dernier_point = historical_data[-1]['date']
+            nouveau = dernier_point != state.last_point
+            span.set(dernier_point=dernier_point, recalcul=nouveau)
+            
+            if dernier_point != state.last_point or state.stored is None:
+                os.makedirs(self.data_dir, exist_ok=True)
+                state.scraper.save_to_json(result, self.data_file(state.isin))
+            state.stored = result
+            
+            if not nouveau:
+                print(f"   {state.isin}: pas de nouveau point ({dernier_point})")
+                return False
+            
+            self._update_calculator(state, historical_data)
+            state.results = state.calculator.analyze_all_periods()
+            state.last_point = dernier_point
+            
+            if self.database:
+                state.calculator.export_to_sqlite(state.results, state.isin, self.database)
+            
+            instrumentation.count('fonds_recalcules_total')
+            print(f"   {state.isin}: {len(state.results)} périodes recalculées (dernier point {dernier_point})")
+            return True
+    
+    def run_fund(self, state):
+        """
+        Rafraîchit un fonds et planifie sa prochaine mise à jour
+        (l'état est enregistré par l'appelant, une fois par lot de fonds)
+        """
+        now = self.now()
+        try:
+            self.refresh(state)
+            state.failures = 0
+            state.next_run = next_refresh(state.market, state.isin, now, self.delay, self.spread,
+                                          self.jitter, self.rng)
+        except Exception as e:
+            state.failures += 1
+            print(f"   {state.isin}: échec ({type(e).__name__}: {e})")
+            if state.failures < self.max_failures:
+                state.next_run = now + timedelta(seconds=self.retry_delay * state.failures)
+            else:
+                state.failures = 0
+                state.next_run = next_refresh(state.market, state.isin, now, self.delay, self.spread,
+                                              self.jitter, self.rng)
+        
+        state.last_refresh = now
+        print(f"   {state.isin}: prochaine mise à jour {state.next_run.astimezone():%Y-%m-%d %H:%M}")
+    
+    def schedule(self):
+        """
+        Planifie les fonds sans date de mise à jour: ceux dont la série est déjà à jour
+        attendent la prochaine clôture, les autres sont répartis sur la fenêtre de rattrapage
+        """
+        now = self.now()
+        for state in self.funds.values():
+            if state.next_run is not None:
+                continue
+            if state.last_point or os.path.exists(self.data_file(state.isin)):
+                state.next_run = next_refresh(state.market, state.isin, now, self.delay, self.spread,
+                                              self.jitter, self.rng)
+            else:
+                state.next_run = now + timedelta(seconds=spread_offset(state.isin, min(self.spread, 600)))
+    
+    def due(self):
+        """
+        Fonds dont la mise à jour est échue, du plus ancien au plus récent
+        """
+        now = self.now()
+        return sorted((s for s in self.funds.values() if s.next_run <= now), key=lambda s: s.next_run)
+    
+    def run_once(self):
+        """
+        Rafraîchit immédiatement tous les fonds (un passage, ex: tâche cron)
+        """
+        try:
+            for state in self.funds.values():
+                if self._stop.is_set():
+                    break
+                self.run_fund(state)
+        finally:
+            self.save_checkpoint()
+    
+    def stop(self, *args):
+        print("Arrêt demandé")
+        self._stop.set()
+    
+    def run(self):
+        """
+        Boucle principale: attend la prochaine échéance, rafraîchit les fonds échus
+        L'état est enregistré après chaque lot de fonds échus et à l'arrêt (SIGINT / SIGTERM)
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+        
+        self.schedule()
+        self.save_checkpoint()
+        print(f"Démon démarré: {len(self.funds)} fonds")
+        
+        try:
+            while not self._stop.is_set():
+                echus = self.due()
+                for state in echus:
+                    if self._stop.is_set():
+                        break
+                    self.run_fund(state)
+                if echus:
+                    self.save_checkpoint()
+                
+                prochain = min(state.next_run for state in self.funds.values())
+                attente = (prochain - self.now()).total_seconds()
+                if attente > 0:
+                    print(f"Prochaine mise à jour: {prochain.astimezone():%Y-%m-%d %H:%M} ({attente / 60:.0f} min)")
+                    self._stop.wait(attente)
+        finally:
+            self.save_checkpoint()
+            print("Démon arrêté")
+
+
+def main():
+    """
+    Point d'entrée: python daemon.py --file isins.txt [--once]
+    """
+    parser = argparse.ArgumentParser(description="Mise à jour automatique d'un univers d'OPCVM")
+    parser.add_argument('isins', nargs='*', help="ISIN à suivre")
+    parser.add_argument('--file', help="Fichier d'ISIN (un par ligne, ISIN;SYM1,SYM2)")
+    parser.add_argument('--data-dir', default="data", help="Répertoire des séries <ISIN>.json")
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE, help="Fichier de reprise")
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help="Base SQLite des métriques ('' pour désactiver)")
+    parser.add_argument('--engine', default="numpy", choices=['python', 'numpy'])
+    parser.add_argument('--delay', type=int, default=3600, help="Délai après la clôture (secondes)")
+    parser.add_argument('--spread', type=int, default=7200, help="Fenêtre de répartition des fonds (secondes)")
+    parser.add_argument('--jitter', type=int, default=300, help="Gigue aléatoire (secondes)")
+    parser.add_argument('--once', action='store_true', help="Un seul passage sur tous les fonds puis arrêt")
+    parser.add_argument('--limits', help="Limites de débit, reprises et disjoncteurs (fichier JSON)")
+    args = parser.parse_args()
+    
+    funds = [(isin, None) for isin in args.isins]
+    if args.file:
+        funds.extend(read_isin_file(args.file))
+    
+    if not funds:
+        parser.error("Aucun ISIN fourni")
+    
+    if args.limits:
+        try:
+            configure_limits(args.limits)
+        except (OSError, ValueError) as e:
+            parser.error(f"Fichier de limites {args.limits}: {e}")
+    
+    instrumentation.enable_from_env()
+    
+    database = OPCVMDatabase(args.database) if args.database else None
+    daemon = RefreshDaemon(funds, args.data_dir, args.checkpoint, database, args.engine,
+                           args.delay, args.spread, args.jitter)
+    
+    try:
+        if args.once:
+            daemon.run_once()
+        else:
+            daemon.run()
+    finally:
+        if database is not None:
+            database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Base SQLite partagée par le scraper et le calculateur
+Historique des prix indexé sur (isin, date) avec mises à jour incrémentales,
+et historique des métriques calculées par (isin, période, date d'arrêté)
+"""
+import sqlite3
+from datetime import datetime
+
+DEFAULT_DATABASE = "opcvm.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS funds (
+    isin TEXT PRIMARY KEY,
+    nom TEXT,
+    devise TEXT,
+    type TEXT
+);
+
+CREATE TABLE IF NOT EXISTS prices (
+    isin TEXT NOT NULL,
+    date TEXT NOT NULL,
+    price REAL NOT NULL,
+    source TEXT,
+    PRIMARY KEY (isin, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS metrics (
+    isin TEXT NOT NULL,
+    periode TEXT NOT NULL,
+    as_of_date TEXT NOT NULL,
+    performance REAL,
+    volatilite REAL,
+    rendement_espere REAL,
+    max_drawdown REAL,
+    nb_points INTEGER,
+    date_debut TEXT,
+    date_fin TEXT,
+    prix_debut REAL,
+    prix_fin REAL,
+    analyse_date TEXT,
+    PRIMARY KEY (isin, periode, as_of_date)
+) WITHOUT ROWID;
+"""
+
+# Colonnes des métriques (mêmes noms que les résultats de FinancialCalculator)
+METRIC_FIELDS = ['performance', 'volatilite', 'rendement_espere', 'max_drawdown',
+                 'nb_points', 'date_debut', 'date_fin', 'prix_debut', 'prix_fin']
+
+
+def _date_str(value):
+    """
+    Date au format 'YYYY-MM-DD' (ordre lexicographique = ordre chronologique)
+    """
+    if value is None or isinstance(value, str):
+        return value
+    return value.strftime('%Y-%m-%d')
+
+
+class OPCVMDatabase:
+    def __init__(self, filename=DEFAULT_DATABASE):
+        """
+        filename: fichier SQLite (créé avec son schéma s'il n'existe pas)
+        """
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+    
+    def close(self):
+        self.connection.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def save_fund_info(self, fund_info):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO funds (isin, nom, devise, type) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (isin) DO UPDATE SET nom = excluded.nom, "
+                "devise = excluded.devise, type = excluded.type",
+                (fund_info['isin'], fund_info.get('nom'), fund_info.get('devise_base'),
+                 fund_info.get('type')))
+    
+    def upsert_prices(self, isin, historical_data):
+        """
+        Insère ou met à jour les points d'un fonds en une seule transaction
+        Retourne le nombre de points écrits
+        """
+        rows = [(isin, item['date'], float(item['price']), item.get('source'))
+                for item in historical_data]
+        
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO prices (isin, date, price, source) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (isin, date) DO UPDATE SET price = excluded.price, source = excluded.source",
+                rows)
+        
+        return len(rows)
+    
+    def load_prices(self, isin, start_date=None, end_date=None):
+        """
+        Historique d'un fonds sur [start_date, end_date] (requête sur l'index (isin, date))
+        Retourne une liste de dictionnaires date/price/source triée par date
+        """
+        cursor = self.connection.execute(
+            "SELECT date, price, source FROM prices "
+            "WHERE isin = ? AND date >= ? AND date <= ? ORDER BY date",
+            (isin, _date_str(start_date) or '', _date_str(end_date) or '9999-12-31'))
+        
+        return [{'date': d, 'price': p, 'source': s} for d, p, s in cursor]
+    
+    def last_date(self, isin):
+        """
+        Date du dernier point stocké pour un fonds (None si aucun)
+        """
+        row = self.connection.execute("SELECT MAX(date) FROM prices WHERE isin = ?", (isin,)).fetchone()
+        return row[0]
+    
+    def isins(self):
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT isin FROM prices ORDER BY isin")]
+    
+    def save_result(self, result):
+        """
+        Enregistre un résultat du scraper (fund_info + historical_data)
+        """
+        isin = result['fund_info']['isin']
+        self.save_fund_info(result['fund_info'])
+        return self.upsert_prices(isin, result.get('historical_data', []))
+    
+    def save_metrics(self, isin, results, as_of_date=None):
+        """
+        Enregistre les métriques par période d'un fonds à la date d'arrêté as_of_date
+        (par défaut la dernière date des résultats) sans écraser les calculs précédents
+        """
+        if as_of_date is None:
+            as_of_date = max(metrics['date_fin'] for metrics in results.values())
+        
+        analyse_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [(isin, period, _date_str(as_of_date)) + tuple(metrics.get(field) for field in METRIC_FIELDS)
+                + (analyse_date,)
+                for period, metrics in results.items()]
+        
+        columns = ['isin', 'periode', 'as_of_date'] + METRIC_FIELDS + ['analyse_date']
+        updates = ', '.join(f"{c} = excluded.{c}" for c in METRIC_FIELDS + ['analyse_date'])
+        
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO metrics ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT (isin, periode, as_of_date) DO UPDATE SET {updates}",
+                rows)
+        
+        return len(rows)
+    
+    def load_metrics(self, isin, as_of_date=None):
+        """
+        Métriques par période d'un fonds à une date d'arrêté (par défaut la plus récente)
+        """
+        if as_of_date is None:
+            row = self.connection.execute("SELECT MAX(as_of_date) FROM metrics WHERE isin = ?", (isin,)).fetchone()
+            as_of_date = row[0]
+            if as_of_date is None:
+                return {}
+        
+        cursor = self.connection.execute(
+            f"SELECT periode, {', '.join(METRIC_FIELDS)} FROM metrics WHERE isin = ? AND as_of_date = ?",
+            (isin, _date_str(as_of_date)))
+        
+        return {row[0]: dict(zip(METRIC_FIELDS, row[1:])) for row in cursor}
+    
+    def metrics_history(self, isin, period):
+        """
+        Historique d'une période pour un fonds: liste de (date d'arrêté, métriques)
+        """
+        cursor = self.connection.execute(
+            f"SELECT as_of_date, {', '.join(METRIC_FIELDS)} FROM metrics "
+            f"WHERE isin = ? AND periode = ? ORDER BY as_of_date",
+            (isin, period))
+        
+        return [(row[0], dict(zip(METRIC_FIELDS, row[1:]))) for row in cursor]
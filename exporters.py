@@ -0,0 +1,200 @@
+"""
+Exports en flux pour les gros volumes de résultats: CSV, JSON par ligne (NDJSON), gzip optionnel
+Les lignes sont écrites au fur et à mesure de leur production (mémoire constante).
+L'écriture se fait dans un fichier temporaire renommé (ou ajouté au fichier existant) à la
+fermeture: une exécution interrompue laisse le fichier précédent intact
+"""
+import csv
+import gzip
+import json
+import os
+import shutil
+from abc import ABC, abstractmethod
+
+# Extensions reconnues (avant un éventuel .gz)
+FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+
+def is_gzip(filename):
+    return filename.lower().endswith('.gz')
+
+
+def export_format(filename):
+    """
+    Format d'export d'après l'extension: 'csv' ou 'ndjson' (.csv.gz, .ndjson.gz... compressés)
+    """
+    base = filename[:-3] if is_gzip(filename) else filename
+    extension = os.path.splitext(base)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Format d'export inconnu: {filename} (extensions: {', '.join(FORMATS)}, + .gz)")
+    return FORMATS[extension]
+
+
+class AtomicFile:
+    """
+    Fichier texte écrit dans un fichier temporaire puis renommé (os.replace) en cas de succès
+    with AtomicFile("rapport.json") as f: json.dump(rapport, f)
+    append: les nouvelles lignes sont écrites dans le fichier temporaire puis ajoutées à la fin
+    du fichier existant, sans le recopier (coût proportionnel aux seules lignes ajoutées);
+    si l'ajout échoue, le fichier est tronqué à sa taille d'origine
+    compress: gzip (par défaut d'après l'extension .gz); en ajout, un nouveau membre gzip est écrit
+    """
+    
+    def __init__(self, filename, append=False, compress=None):
+        self.filename = filename
+        self.compress = is_gzip(filename) if compress is None else compress
+        self.tmp_path = f"{filename}.{os.getpid()}.tmp"
+        self.appended = append and os.path.exists(filename) and os.path.getsize(filename) > 0
+        self.file = None
+    
+    def open(self):
+        if self.compress:
+            self.file = gzip.open(self.tmp_path, 'wt', encoding='utf-8', newline='')
+        else:
+            self.file = open(self.tmp_path, 'w', encoding='utf-8', newline='')
+        return self.file
+    
+    def commit(self):
+        """
+        Ferme le fichier temporaire et remplace le fichier final (ou l'y ajoute)
+        """
+        self.file.close()
+        if self.appended:
+            self._append_to_target()
+        else:
+            os.replace(self.tmp_path, self.filename)
+    
+    def _append_to_target(self):
+        try:
+            with open(self.filename, 'ab') as target:
+                taille = target.tell()
+                try:
+                    with open(self.tmp_path, 'rb') as source:
+                        shutil.copyfileobj(source, target)
+                    target.flush()
+                    os.fsync(target.fileno())
+                except BaseException:
+                    target.truncate(taille)
+                    raise
+        finally:
+            os.remove(self.tmp_path)
+    
+    def abort(self):
+        """
+        Abandonne l'écriture: le fichier final n'est pas modifié
+        """
+        if self.file is not None:
+            self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+    
+    def __enter__(self):
+        return self.open()
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+
+class StreamingExporter(ABC):
+    """
+    Export ligne par ligne (dictionnaires), à utiliser comme gestionnaire de contexte:
+    le fichier n'est remplacé qu'à la sortie sans erreur du bloc with
+    """
+    
+    def __init__(self, filename, fieldnames=None, append=False, compress=None):
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.target = AtomicFile(filename, append, compress)
+        self.count = 0
+    
+    def _start(self, f):
+        pass
+    
+    @abstractmethod
+    def _write(self, row):
+        """
+        Écrit une ligne (dictionnaire) dans le fichier ouvert par _start
+        """
+    
+    def open(self):
+        self._start(self.target.open())
+        return self
+    
+    def write(self, row):
+        self._write(row)
+        self.count += 1
+    
+    def write_rows(self, rows):
+        for row in rows:
+            self.write(row)
+    
+    def close(self):
+        self.target.commit()
+    
+    def abort(self):
+        self.target.abort()
+    
+    def __enter__(self):
+        return self.open()
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class CSVExporter(StreamingExporter):
+    """
+    CSV (en-tête écrit seulement si le fichier est nouveau ou vide), colonnes en trop ignorées
+    """
+    
+    def __init__(self, filename, fieldnames, append=False, compress=None):
+        super().__init__(filename, fieldnames, append, compress)
+    
+    def _start(self, f):
+        self.writer = csv.DictWriter(f, fieldnames=self.fieldnames, extrasaction='ignore')
+        if not self.target.appended:
+            self.writer.writeheader()
+    
+    def _write(self, row):
+        self.writer.writerow(row)
+
+
+class NDJSONExporter(StreamingExporter):
+    """
+    Un objet JSON compact par ligne (lecture et ajout ligne par ligne)
+    """
+    
+    def _start(self, f):
+        self.file = f
+    
+    def _write(self, row):
+        self.file.write(json.dumps(row, ensure_ascii=False, separators=(',', ':'), default=str))
+        self.file.write('\n')
+
+
+def open_exporter(filename, fieldnames=None, append=False):
+    """
+    Exporteur adapté à l'extension du fichier (.csv, .ndjson, .jsonl, suivis ou non de .gz)
+    """
+    if export_format(filename) == 'csv':
+        if not fieldnames:
+            raise ValueError("Colonnes requises pour un export CSV")
+        return CSVExporter(filename, fieldnames, append)
+    return NDJSONExporter(filename, fieldnames, append)
+
+
+def period_rows(results, isin=None):
+    """
+    Lignes d'export des résultats par période (une ligne par période, ISIN en tête si fourni)
+    """
+    for period, metrics in results.items():
+        row = {'isin': isin, 'periode': period} if isin else {'periode': period}
+        row.update(metrics)
+        yield row
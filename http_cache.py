@@ -0,0 +1,240 @@
+"""
+Cache disque des réponses HTTP du scraper
+Clé = méthode + URL + paramètres, durée de vie (TTL), revalidation ETag/Last-Modified
+et éviction LRU bornée par la taille totale
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_CACHE_DIR = ".cache_http"
+
+
+class CachedResponse:
+    """
+    Réponse servie depuis le cache (même interface que requests.Response pour le scraper)
+    """
+    
+    def __init__(self, status_code, headers, content, url):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.from_cache = True
+    
+    @property
+    def ok(self):
+        return self.status_code < 400
+    
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+    
+    def json(self):
+        return json.loads(self.content)
+    
+    def iter_content(self, chunk_size=65536, decode_unicode=False):
+        data = self.text if decode_unicode else self.content
+        for i in range(0, len(data), chunk_size):
+            yield data[i:i + chunk_size]
+    
+    def close(self):
+        pass
+
+
+class ResponseCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=3600, max_bytes=200 * 1024 * 1024):
+        """
+        directory: répertoire du cache (un fichier .body et un fichier .meta par réponse)
+        ttl: durée de fraîcheur d'une réponse (secondes), revalidée ensuite
+        max_bytes: taille totale maximale des corps de réponse (éviction LRU au-delà)
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        
+        # Compteurs
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(size for _, size, _ in self._entries())
+    
+    def key(self, method, url, params=None, data=None):
+        """
+        Clé d'une requête: méthode, URL et paramètres triés
+        """
+        raw = json.dumps([method.upper(), url, sorted((params or {}).items()),
+                          sorted((data or {}).items())], default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + '.body', base + '.meta'
+    
+    def _entries(self):
+        """
+        Parcourt les entrées du cache: (clé, taille, dernier accès)
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith('.body'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield name[:-len('.body')], stat.st_size, stat.st_mtime
+    
+    def load(self, key):
+        """
+        Charge une entrée: (métadonnées, corps) ou None
+        """
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                content = f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+        
+        # Dernier accès = date de modification du corps (ordre LRU)
+        try:
+            os.utime(body_path)
+        except FileNotFoundError:
+            return None
+        
+        return meta, content
+    
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
+    def store(self, key, response):
+        """
+        Enregistre une réponse 200 avec ses validateurs (ETag, Last-Modified)
+        """
+        content = response.content
+        if len(content) > self.max_bytes:
+            return
+        
+        body_path, meta_path = self._paths(key)
+        meta = {
+            'url': response.url,
+            'status_code': response.status_code,
+            'headers': {k: v for k, v in response.headers.items()
+                        if k.lower() in ('content-type', 'etag', 'last-modified')},
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'expires': time.time() + self.ttl
+        }
+        
+        with self._lock:
+            try:
+                old_size = os.path.getsize(body_path)
+            except FileNotFoundError:
+                old_size = 0
+            
+            self._write_atomic(body_path, content)
+            self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+            self.total_bytes += len(content) - old_size
+            
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+    
+    def _refresh(self, key, meta):
+        """
+        Prolonge la fraîcheur d'une entrée après une réponse 304
+        """
+        meta['expires'] = time.time() + self.ttl
+        _, meta_path = self._paths(key)
+        self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+    
+    def _evict(self):
+        """
+        Supprime les entrées les moins récemment utilisées jusqu'à repasser sous max_bytes
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self.total_bytes = sum(size for _, size, _ in entries)
+        
+        for key, size, _ in entries:
+            if self.total_bytes <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self.total_bytes -= size
+            self.evictions += 1
+    
+    def fetch(self, session, method, url, params=None, data=None, headers=None,
+              before_request=None, **kwargs):
+        """
+        Exécute une requête via le cache
+        - entrée fraîche: servie sans requête réseau
+        - entrée expirée: requête conditionnelle (If-None-Match / If-Modified-Since), 304 = cache
+        - sinon: requête normale, réponse 200 mise en cache
+        before_request: fonction appelée juste avant un accès réseau (limitation de débit)
+        """
+        key = self.key(method, url, params, data)
+        entry = self.load(key)
+        
+        if entry:
+            meta, content = entry
+            cached = CachedResponse(meta['status_code'], meta['headers'], content, meta['url'])
+            
+            if meta['expires'] > time.time():
+                with self._lock:
+                    self.hits += 1
+                return cached
+            
+            headers = dict(headers or {})
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        
+        if before_request is not None:
+            before_request()
+        
+        response = session.request(method, url, params=params, data=data, headers=headers, **kwargs)
+        
+        if entry and response.status_code == 304:
+            response.close()
+            self._refresh(key, meta)
+            with self._lock:
+                self.revalidated += 1
+            return cached
+        
+        with self._lock:
+            self.misses += 1
+        
+        if response.status_code == 200:
+            self.store(key, response)
+        
+        return response
+    
+    def stats(self):
+        """
+        Compteurs du cache
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'evictions': self.evictions,
+            'total_bytes': self.total_bytes
+        }
+
+    def print_summary(self):
+        print(f"Cache HTTP ({self.directory}): {self.hits} réponses servies, "
+              f"{self.revalidated} revalidées (304), {self.misses} téléchargées, "
+              f"{self.evictions} évincées, {self.total_bytes / 1024:.0f} Ko")
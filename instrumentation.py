@@ -0,0 +1,280 @@
+"""
+Instrumentation du scraper et du calculateur: spans (durées), compteurs et profils
+Sortie en lignes JSON et/ou fichier texte au format Prometheus, profils cProfile/tracemalloc
+optionnels. Désactivée par défaut: span() retourne alors un objet vide partagé (coût quasi nul)
+
+Activation: enable(jsonl="trace.jsonl", prometheus="metriques.prom", profile_dir="profils")
+ou variables d'environnement OPCVM_TRACE, OPCVM_METRICS, OPCVM_PROFILE (enable_from_env)
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+PREFIX = "opcvm"
+
+
+class _NullSpan:
+    """
+    Span inactif (instrumentation désactivée)
+    """
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ('recorder', 'name', 'attrs', 'parent', 'start', 'wall')
+    
+    def __init__(self, recorder, name, attrs):
+        self.recorder = recorder
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+    
+    def set(self, **attrs):
+        """
+        Ajoute des attributs au span (ex: statut HTTP, octets, nombre de points)
+        """
+        self.attrs.update(attrs)
+    
+    def __enter__(self):
+        stack = self.recorder._stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        duree = time.perf_counter() - self.start
+        self.recorder._stack().pop()
+        self.recorder._end_span(self, duree, exc_type)
+        return False
+
+
+class Recorder:
+    def __init__(self, jsonl=None, prometheus=None, profile_dir=None):
+        """
+        jsonl: fichier de lignes JSON (un span par ligne, compteurs à la fermeture)
+        prometheus: fichier texte au format d'exposition Prometheus (écrit à la fermeture)
+        profile_dir: répertoire des profils cProfile / tracemalloc (profile())
+        """
+        self.jsonl = jsonl
+        self.prometheus = prometheus
+        self.profile_dir = profile_dir
+        self._file = open(jsonl, 'a', encoding='utf-8') if jsonl else None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        
+        self.counters = defaultdict(float)          # (nom, labels) -> valeur
+        self.durations = defaultdict(lambda: [0, 0.0])    # nom du span -> [nombre, somme]
+        
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+    
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+    
+    def _write(self, record):
+        if self._file is not None:
+            line = json.dumps(record, ensure_ascii=False, default=str)
+            with self._lock:
+                self._file.write(line + '\n')
+    
+    def _end_span(self, span, duree, exc_type):
+        with self._lock:
+            total = self.durations[span.name]
+            total[0] += 1
+            total[1] += duree
+        
+        record = {
+            'type': 'span',
+            'nom': span.name,
+            'parent': span.parent,
+            'debut': datetime.fromtimestamp(span.wall).isoformat(timespec='milliseconds'),
+            'duree_ms': round(duree * 1000, 3),
+            'thread': threading.current_thread().name
+        }
+        record.update(span.attrs)
+        if exc_type is not None:
+            record['erreur'] = exc_type.__name__
+        self._write(record)
+    
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self.counters[key] += value
+    
+    def write_prometheus(self, filename):
+        """
+        Écrit compteurs et durées cumulées des spans au format d'exposition Prometheus
+        """
+        lignes = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            durations = sorted(self.durations.items())
+        
+        declares = set()
+        for (name, labels), value in counters:
+            metric = f"{PREFIX}_{name}"
+            if metric not in declares:
+                lignes.append(f"# TYPE {metric} counter")
+                declares.add(metric)
+            label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+            lignes.append(f"{metric}{{{label_text}}} {value:g}" if labels else f"{metric} {value:g}")
+        
+        if durations:
+            metric = f"{PREFIX}_span_duration_seconds"
+            lignes.append(f"# TYPE {metric} summary")
+            for name, (nombre, somme) in durations:
+                lignes.append(f'{metric}_count{{span="{name}"}} {nombre}')
+                lignes.append(f'{metric}_sum{{span="{name}"}} {somme:.6f}')
+        
+        tmp_path = f"{filename}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lignes) + '\n')
+        os.replace(tmp_path, filename)
+    
+    def close(self):
+        """
+        Écrit les compteurs (lignes JSON et fichier Prometheus) et ferme les fichiers
+        """
+        with self._lock:
+            counters = list(self.counters.items())
+        for (name, labels), value in counters:
+            self._write({'type': 'compteur', 'nom': name, 'labels': dict(labels), 'valeur': value})
+        
+        if self.prometheus:
+            self.write_prometheus(self.prometheus)
+        
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_recorder = None
+
+
+def enabled():
+    return _recorder is not None
+
+
+def enable(jsonl=None, prometheus=None, profile_dir=None):
+    """
+    Active l'instrumentation pour le processus (les sorties sont écrites à disable() ou à la sortie)
+    """
+    global _recorder
+    disable()
+    _recorder = Recorder(jsonl, prometheus, profile_dir)
+    atexit.register(disable)
+    return _recorder
+
+
+def enable_from_env():
+    """
+    Active l'instrumentation si OPCVM_TRACE, OPCVM_METRICS ou OPCVM_PROFILE est défini
+    """
+    jsonl = os.environ.get('OPCVM_TRACE')
+    prometheus = os.environ.get('OPCVM_METRICS')
+    profile_dir = os.environ.get('OPCVM_PROFILE')
+    if jsonl or prometheus or profile_dir:
+        return enable(jsonl, prometheus, profile_dir)
+    return None
+
+
+def disable():
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.close()
+
+
+def span(name, **attrs):
+    """
+    Mesure la durée d'un bloc: with span('http_requete', source='yahoo') as s: ... s.set(statut=200)
+    """
+    recorder = _recorder
+    if recorder is None:
+        return NULL_SPAN
+    return Span(recorder, name, attrs)
+
+
+def count(name, value=1, **labels):
+    """
+    Incrémente un compteur (ex: count('http_requetes_total', source='yahoo', statut=200))
+    """
+    recorder = _recorder
+    if recorder is not None:
+        recorder.count(name, value, **labels)
+
+
+def traced(name):
+    """
+    Décorateur: un span par appel de la fonction
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            if recorder is None:
+                return func(*args, **kwargs)
+            with Span(recorder, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profiled(run_name):
+    """
+    Décorateur: profil cProfile (.prof) et allocations tracemalloc (.txt) de chaque appel,
+    écrits dans profile_dir si l'instrumentation est activée avec un répertoire de profils
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            if recorder is None or not recorder.profile_dir:
+                return func(*args, **kwargs)
+            
+            # Import local: profilage uniquement sur demande
+            import cProfile
+            import tracemalloc
+            
+            base = os.path.join(recorder.profile_dir, f"{run_name}_{datetime.now():%Y%m%d_%H%M%S}")
+            profiler = cProfile.Profile()
+            tracemalloc.start()
+            profiler.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                
+                profiler.dump_stats(f"{base}.prof")
+                with open(f"{base}_memoire.txt", 'w', encoding='utf-8') as f:
+                    f.write(f"Mémoire maximale: {peak / 1e6:.1f} Mo\n\n")
+                    for stat in snapshot.statistics('lineno')[:30]:
+                        f.write(f"{stat}\n")
+                print(f"Profil enregistré: {base}.prof")
+        return wrapper
+    return decorator
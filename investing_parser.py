@@ -0,0 +1,170 @@
+"""
+Analyse des tableaux d'historique Investing.com (réponse HistoricalDataAjax)
+Analyseur HTML événementiel (html.parser) alimenté par morceaux, sans arbre DOM:
+seules les cellules date et clôture des lignes du tableau sont conservées
+"""
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+
+# Formats de date affichés selon la version et la langue du site
+DATE_FORMATS = ('%b %d, %Y', '%m/%d/%Y', '%d.%m.%Y', '%d/%m/%Y', '%Y-%m-%d')
+
+# En-têtes de colonnes reconnus (comparaison en minuscules)
+DATE_HEADERS = ('date',)
+PRICE_HEADERS = ('price', 'close', 'dernier', 'clôture')
+
+
+def _is_history_table(attrs):
+    return (attrs.get('id') == 'curr_table'
+            or attrs.get('data-test') == 'historical-data-table'
+            or 'historicalTbl' in (attrs.get('class') or '').split())
+
+
+def parse_investing_date(cell):
+    """
+    Date d'une cellule au format 'YYYY-MM-DD' (None si illisible)
+    Priorité: <time datetime>, data-real-value (timestamp), puis texte affiché
+    """
+    if cell['datetime']:
+        try:
+            return datetime.strptime(cell['datetime'][:10], '%Y-%m-%d').strftime('%Y-%m-%d')
+        except ValueError:
+            pass
+    
+    if cell['value'] and cell['value'].isdigit():
+        return datetime.fromtimestamp(int(cell['value']), tz=timezone.utc).strftime('%Y-%m-%d')
+    
+    text = ''.join(cell['text']).strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    
+    return None
+
+
+def parse_investing_price(cell):
+    """
+    Prix d'une cellule (None si illisible), séparateurs de milliers ignorés
+    """
+    for raw in (cell['value'], ''.join(cell['text'])):
+        if raw:
+            try:
+                return float(raw.strip().replace(',', ''))
+            except ValueError:
+                continue
+    
+    return None
+
+
+class InvestingTableParser(HTMLParser):
+    """
+    Analyseur incrémental: feed() peut être appelé morceau par morceau pendant le téléchargement,
+    les lignes complètes sont ajoutées à self.rows au format historical_data du scraper
+    """
+    
+    def __init__(self, source='Investing.com'):
+        super().__init__(convert_charrefs=True)
+        self.source = source
+        self.rows = []
+        self.date_column = 0
+        self.price_column = 1
+        self._depth = 0         # profondeur des <table> depuis le tableau d'historique
+        self._row = None
+        self._cell = None
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            if self._depth:
+                self._depth += 1
+            elif _is_history_table(dict(attrs)):
+                self._depth = 1
+            return
+        
+        if self._depth != 1:
+            return
+        
+        if tag == 'tr':
+            self._end_row()
+            self._row = []
+        elif tag in ('td', 'th') and self._row is not None:
+            self._end_cell()
+            attrs = dict(attrs)
+            self._cell = {'tag': tag, 'text': [], 'value': attrs.get('data-real-value'), 'datetime': None}
+        elif tag == 'time' and self._cell is not None:
+            self._cell['datetime'] = dict(attrs).get('datetime')
+    
+    def handle_endtag(self, tag):
+        if not self._depth:
+            return
+        
+        if tag == 'table':
+            self._depth -= 1
+            if not self._depth:
+                self._end_row()
+        elif self._depth != 1:
+            return
+        elif tag in ('td', 'th'):
+            self._end_cell()
+        elif tag == 'tr':
+            self._end_row()
+    
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell['text'].append(data)
+    
+    def _end_cell(self):
+        if self._cell is not None and self._row is not None:
+            self._row.append(self._cell)
+        self._cell = None
+    
+    def _end_row(self):
+        self._end_cell()
+        row, self._row = self._row, None
+        if not row:
+            return
+        
+        # Ligne d'en-tête: repérage des colonnes date et clôture
+        if all(cell['tag'] == 'th' for cell in row):
+            headers = [''.join(cell['text']).strip().lower() for cell in row]
+            for i, header in enumerate(headers):
+                if header in DATE_HEADERS:
+                    self.date_column = i
+                elif header in PRICE_HEADERS:
+                    self.price_column = i
+            return
+        
+        if len(row) <= max(self.date_column, self.price_column):
+            return
+        
+        date = parse_investing_date(row[self.date_column])
+        price = parse_investing_price(row[self.price_column])
+        if date is not None and price is not None:
+            self.rows.append({
+                'date': date,
+                'price': round(price, 4),
+                'source': self.source
+            })
+
+
+def parse_investing_table(html, source='Investing.com'):
+    """
+    Extrait l'historique (date, prix, source) d'un tableau Investing.com
+    """
+    parser = InvestingTableParser(source)
+    parser.feed(html)
+    parser.close()
+    return parser.rows
+
+
+def parse_investing_file(filename, source='Investing.com', chunk_size=65536):
+    """
+    Extrait l'historique d'une page Investing.com enregistrée (lecture par morceaux)
+    """
+    parser = InvestingTableParser(source)
+    with open(filename, 'r', encoding='utf-8') as f:
+        for chunk in iter(lambda: f.read(chunk_size), ''):
+            parser.feed(chunk)
+    parser.close()
+    return parser.rows
@@ -0,0 +1,32 @@
+"""
+Import différé des modules lourds (numpy, requests): le module n'est importé qu'au premier
+accès à l'un de ses attributs, pour que les commandes qui ne s'en servent pas démarrent vite
+"""
+import importlib
+
+
+class LazyModule:
+    """
+    Remplace un module importé: np = LazyModule('numpy') puis np.array(...) comme d'habitude
+    """
+    
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+    
+    @property
+    def loaded(self):
+        return self._module is not None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        value = getattr(self._module, attr)
+        
+        # Attribut mémorisé: les accès suivants sont des accès d'attribut ordinaires
+        setattr(self, attr, value)
+        return value
+    
+    def __repr__(self):
+        etat = "importé" if self._module is not None else "non importé"
+        return f"<module {self._name} différé ({etat})>"
@@ -0,0 +1,207 @@
+"""
+Test de charge du scraper contre le serveur local (stub_server.py)
+Mesure le débit (requêtes/s côté serveur, symboles/s côté client) et la latence p50/p90/p99
+d'une récupération de symbole (attentes du limiteur et reprises comprises)
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from rate_limit import RequestPolicy
+from scraping import OPCVMScraper
+from scraping_async import AsyncOPCVMScraper
+from stub_server import StubConfig, start_stub_server
+
+
+def percentile(valeurs, p):
+    """
+    Percentile p (0-100) par rang le plus proche d'une liste triée
+    """
+    if not valeurs:
+        return None
+    rang = min(len(valeurs) - 1, max(0, int(round(p / 100 * len(valeurs) + 0.5)) - 1))
+    return valeurs[rang]
+
+
+def load_test_policy(rate=1000.0, max_retries=3):
+    """
+    Politique de requêtes du test: débit élevé vers le serveur local, reprises courtes
+    """
+    return RequestPolicy({
+        'hosts': {},
+        'default_host': {'rate': rate, 'burst': max(1, int(rate))},
+        'retry': {'max_retries': max_retries, 'backoff_base': 0.05, 'backoff_max': 2.0,
+                  'retry_statuses': [429, 500, 502, 503, 504]},
+        'circuit_breaker': {'failure_threshold': 1000000, 'reset_timeout': 1.0}
+    })
+
+
+class TimedScraper(OPCVMScraper):
+    """
+    Scraper synchrone qui mesure chaque récupération de symbole
+    """
+    
+    def __init__(self, *args, latencies=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = latencies if latencies is not None else []
+    
+    def _fetch_yahoo_symbol(self, symbol, start=None, typed=False):
+        debut = time.perf_counter()
+        try:
+            return super()._fetch_yahoo_symbol(symbol, start, typed)
+        finally:
+            self.latencies.append(time.perf_counter() - debut)
+
+
+class TimedAsyncScraper(AsyncOPCVMScraper):
+    """
+    Scraper asynchrone qui mesure chaque récupération de symbole
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+    
+    async def fetch_yahoo_symbol(self, session, symbol):
+        debut = time.perf_counter()
+        try:
+            return await super().fetch_yahoo_symbol(session, symbol)
+        finally:
+            self.latencies.append(time.perf_counter() - debut)
+
+
+def run_sync(base_url, symbols, concurrency, policy):
+    latencies = []
+    
+    def fetch(symbol):
+        scraper = TimedScraper(symbol, symbols=[symbol], yahoo_base_url=base_url, investing_base_url=base_url,
+                               preferences_file=None, policy=policy, latencies=latencies)
+        try:
+            return bool(scraper._fetch_yahoo_symbol(symbol))
+        except Exception:
+            return False
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        succes = sum(executor.map(fetch, symbols))
+    
+    return succes, latencies
+
+
+def run_async(base_url, symbols, concurrency, policy):
+    scraper = TimedAsyncScraper(concurrency=concurrency, per_host=concurrency, yahoo_base_url=base_url,
+                                preferences_file=None, policy=policy)
+    results = scraper.scrape_many([(symbol, [symbol]) for symbol in symbols])
+    succes = sum(1 for result in results.values() if result)
+    return succes, scraper.latencies
+
+
+def server_stats(base_url):
+    try:
+        return requests.get(f"{base_url}/stats", timeout=5).json()
+    except (requests.RequestException, ValueError):
+        return {}
+
+
+def run_load_test(base_url, nb_symbols=200, concurrency=20, client='sync', policy=None):
+    """
+    Récupère nb_symbols symboles distincts avec concurrency requêtes simultanées
+    Retourne le rapport (dictionnaire)
+    """
+    policy = policy or load_test_policy()
+    symbols = [f"LOAD{i:05d}" for i in range(nb_symbols)]
+    avant = server_stats(base_url)
+    
+    debut = time.perf_counter()
+    if client == 'async':
+        succes, latencies = run_async(base_url, symbols, concurrency, policy)
+    else:
+        succes, latencies = run_sync(base_url, symbols, concurrency, policy)
+    duree = time.perf_counter() - debut
+    
+    apres = server_stats(base_url)
+    statuts = {status: count - avant.get(status, 0) for status, count in apres.items() if status != 'requests'}
+    nb_requetes = apres.get('requests', 0) - avant.get('requests', 0)
+    
+    latencies = sorted(latencies)
+    return {
+        'client': client,
+        'concurrence': concurrency,
+        'nb_symboles': nb_symbols,
+        'nb_succes': succes,
+        'nb_echecs': nb_symbols - succes,
+        'duree_s': round(duree, 3),
+        'requetes_serveur': nb_requetes,
+        'statuts': statuts,
+        'requetes_par_seconde': round(nb_requetes / duree, 1) if duree > 0 else None,
+        'symboles_par_seconde': round(nb_symbols / duree, 1) if duree > 0 else None,
+        'latence_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+            'p90': round(percentile(latencies, 90) * 1000, 1) if latencies else None,
+            'p99': round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+            'max': round(latencies[-1] * 1000, 1) if latencies else None
+        }
+    }
+
+
+def print_report(report):
+    print(f"\nRÉSULTATS ({report['client']}, concurrence {report['concurrence']})")
+    print("=" * 50)
+    print(f"   Symboles: {report['nb_succes']}/{report['nb_symboles']} récupérés en {report['duree_s']}s")
+    print(f"   Requêtes serveur: {report['requetes_serveur']} {report['statuts']}")
+    print(f"   Débit: {report['requetes_par_seconde']} requêtes/s, {report['symboles_par_seconde']} symboles/s")
+    latence = report['latence_ms']
+    print(f"   Latence: p50 {latence['p50']} ms, p90 {latence['p90']} ms, p99 {latence['p99']} ms, max {latence['max']} ms")
+
+
+def main():
+    """
+    Point d'entrée: python load_test.py --symbols 500 --concurrency 50 --latency 0.05 --rate-429 0.02
+    Sans --url, un serveur stub est démarré dans le processus avec les paramètres donnés
+    """
+    parser = argparse.ArgumentParser(description="Test de charge du scraper contre un serveur local")
+    parser.add_argument('--url', help="URL d'un serveur stub déjà démarré")
+    parser.add_argument('--symbols', type=int, default=200, help="Nombre de symboles à récupérer")
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--client', default='sync', choices=['sync', 'async'])
+    parser.add_argument('--rate', type=float, default=1000.0, help="Débit maximal du limiteur (requêtes/s)")
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=int, default=0)
+    parser.add_argument('--slow-body', type=float, default=0.0)
+    parser.add_argument('--output', help="Fichier JSON du rapport")
+    args = parser.parse_args()
+    
+    server = None
+    base_url = args.url
+    if not base_url:
+        config = StubConfig(args.latency, args.jitter, args.error_rate, args.rate_429,
+                            args.retry_after, args.slow_body)
+        server = start_stub_server(config)
+        base_url = server.base_url
+    
+    print(f"TEST DE CHARGE - {args.symbols} symboles sur {base_url}")
+    print("=" * 50)
+    
+    try:
+        report = run_load_test(base_url, args.symbols, args.concurrency, args.client,
+                               load_test_policy(args.rate, args.retries))
+    finally:
+        if server is not None:
+            server.shutdown()
+    
+    print_report(report)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as jsonfile:
+            json.dump(report, jsonfile, indent=2, ensure_ascii=False)
+        print(f"\nRapport enregistré dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Limitation de débit, reprises et disjoncteurs pour les sources du scraper
+Seau à jetons adaptatif par hôte, backoff exponentiel avec gigue (Retry-After respecté)
+et disjoncteur par source
+Les limites se configurent par un fichier JSON (load_limits), passé par --limits ou par la
+variable d'environnement OPCVM_LIMITS (héritée par les processus d'une analyse en lot)
+"""
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Configuration par défaut (surchargée par un fichier JSON, voir load_limits)
+DEFAULT_LIMITS = {
+    'hosts': {
+        'query1.finance.yahoo.com': {'rate': 2.0, 'burst': 5},
+        'www.investing.com': {'rate': 0.5, 'burst': 2}
+    },
+    'default_host': {'rate': 5.0, 'burst': 10},
+    'retry': {
+        'max_retries': 3,
+        'backoff_base': 0.5,
+        'backoff_max': 30.0,
+        'max_retry_after': 300.0,
+        'retry_statuses': [429, 500, 502, 503, 504]
+    },
+    'circuit_breaker': {
+        'failure_threshold': 5,
+        'reset_timeout': 300.0
+    }
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Requête refusée: le disjoncteur de la source est ouvert
+    """
+
+
+class TokenBucket:
+    """
+    Seau à jetons adaptatif: le débit baisse après un 429 et remonte après les succès
+    """
+    
+    def __init__(self, rate, burst):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self):
+        """
+        Réserve un jeton et retourne l'attente nécessaire (secondes) avant de l'utiliser
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+    
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+    
+    def penalize(self):
+        """
+        Réduction multiplicative du débit (réponse 429)
+        """
+        with self._lock:
+            self.rate = max(self.rate / 2, self.max_rate / 64)
+    
+    def reward(self):
+        """
+        Remontée additive du débit après un succès
+        """
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class RateLimiter:
+    """
+    Un seau à jetons par hôte
+    """
+    
+    def __init__(self, hosts=None, default_host=None):
+        self.host_limits = hosts or {}
+        self.default_host = default_host or DEFAULT_LIMITS['default_host']
+        self.buckets = {}
+        self._lock = threading.Lock()
+    
+    def bucket(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self.buckets:
+                limits = self.host_limits.get(host, self.default_host)
+                self.buckets[host] = TokenBucket(limits['rate'], limits['burst'])
+            return self.buckets[host]
+    
+    def reserve(self, url):
+        return self.bucket(url).reserve()
+    
+    def acquire(self, url):
+        self.bucket(url).acquire()
+    
+    def penalize(self, url):
+        self.bucket(url).penalize()
+    
+    def reward(self, url):
+        self.bucket(url).reward()
+
+
+class RetryPolicy:
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_max=30.0, max_retry_after=300.0,
+                 retry_statuses=(429, 500, 502, 503, 504)):
+        """
+        backoff_max: plafond du backoff exponentiel (secondes)
+        max_retry_after: attente maximale acceptée depuis un en-tête Retry-After, au-delà la
+        source est abandonnée plutôt que de la solliciter avant la date autorisée
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = set(retry_statuses)
+    
+    def delay(self, attempt, retry_after=None):
+        """
+        Attente avant la tentative suivante: backoff exponentiel avec gigue complète,
+        au moins la valeur complète de Retry-After si le serveur l'indique
+        Retourne None si Retry-After dépasse max_retry_after (pas de nouvelle tentative)
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        
+        retry_after = parse_retry_after(retry_after)
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            delay = max(delay, retry_after)
+        
+        return delay
+
+
+def parse_retry_after(value):
+    """
+    Convertit un en-tête Retry-After (secondes ou date HTTP) en secondes
+    """
+    if not value:
+        return None
+    
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'une source: ouvert après failure_threshold échecs consécutifs,
+    une seule tentative d'essai est autorisée après reset_timeout secondes (semi-ouvert)
+    """
+    
+    def __init__(self, failure_threshold=5, reset_timeout=300.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probe_at = None
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'fermé'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'semi-ouvert'
+        return 'ouvert'
+    
+    def _probe_pending(self):
+        # Une tentative d'essai sans réponse après reset_timeout est considérée comme perdue
+        return self.probe_at is not None and time.monotonic() - self.probe_at < self.reset_timeout
+    
+    def available(self):
+        """
+        La source peut être essayée (sans réserver la tentative d'essai)
+        """
+        state = self.state
+        return state == 'fermé' or (state == 'semi-ouvert' and not self._probe_pending())
+    
+    def allow(self):
+        """
+        Autorise une requête; en semi-ouvert, seule la première requête passe (tentative d'essai)
+        jusqu'à record_success ou record_failure
+        """
+        with self._lock:
+            state = self.state
+            if state == 'fermé':
+                return True
+            if state == 'ouvert' or self._probe_pending():
+                return False
+            self.probe_at = time.monotonic()
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_at = None
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probe_at = None
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class RequestPolicy:
+    """
+    Politique de requêtes partagée: limiteur par hôte, reprises et disjoncteurs par source
+    """
+    
+    def __init__(self, limits=None):
+        limits = limits or DEFAULT_LIMITS
+        self.limiter = RateLimiter(limits.get('hosts'), limits.get('default_host'))
+        self.retry = RetryPolicy(**limits.get('retry', {}))
+        self.breaker_config = limits.get('circuit_breaker', {})
+        self.breakers = {}
+        self._lock = threading.Lock()
+    
+    def breaker(self, source):
+        with self._lock:
+            if source not in self.breakers:
+                self.breakers[source] = CircuitBreaker(**self.breaker_config)
+            return self.breakers[source]
+
+
+def load_limits(filename):
+    """
+    Charge une configuration JSON et la fusionne avec DEFAULT_LIMITS
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        overrides = json.load(f)
+    
+    limits = json.loads(json.dumps(DEFAULT_LIMITS))
+    for section, values in overrides.items():
+        if isinstance(values, dict) and isinstance(limits.get(section), dict):
+            limits[section].update(values)
+        else:
+            limits[section] = values
+    
+    return limits
+
+
+_default_policy = None
+
+
+def get_default_policy():
+    """
+    Politique partagée par tous les scrapers du processus (disjoncteurs communs aux ISIN)
+    Limites lues dans le fichier OPCVM_LIMITS s'il est défini
+    """
+    global _default_policy
+    if _default_policy is None:
+        filename = os.environ.get('OPCVM_LIMITS')
+        _default_policy = RequestPolicy(load_limits(filename) if filename else None)
+    return _default_policy
+
+
+def configure_limits(filename):
+    """
+    Remplace les limites de la politique partagée par celles du fichier JSON filename
+    Le fichier est aussi transmis aux processus fils (variable OPCVM_LIMITS)
+    """
+    global _default_policy
+    _default_policy = RequestPolicy(load_limits(filename))
+    os.environ['OPCVM_LIMITS'] = filename
+    return _default_policy
@@ -0,0 +1,156 @@
+"""
+Réconciliation de plusieurs sources / cotations d'un même fonds
+Alignement par jointure fusionnée (séries triées, temps linéaire) sur un calendrier de jours ouvrés,
+détection des trous et des valeurs aberrantes, comblement depuis les sources secondaires
+et provenance de chaque point (champ 'source')
+"""
+from datetime import date
+
+
+class ReconciliationReport:
+    """
+    Bilan d'une réconciliation: origine des points, valeurs aberrantes et trous restants
+    """
+    
+    def __init__(self, primary_source, secondary_sources):
+        self.primary_source = primary_source
+        self.secondary_sources = secondary_sources
+        self.nb_points = 0
+        self.nb_primary = 0
+        self.filled = {source: 0 for source in secondary_sources}
+        self.outliers = []      # (date, prix rejeté, source)
+        self.gaps = []          # (dernière date avant le trou, première date après, jours calendaires)
+    
+    def to_dict(self):
+        return {
+            'source_principale': self.primary_source,
+            'sources_secondaires': self.secondary_sources,
+            'nb_points': self.nb_points,
+            'nb_points_source_principale': self.nb_primary,
+            'points_combles': self.filled,
+            'valeurs_aberrantes': [{'date': d, 'prix': p, 'source': s} for d, p, s in self.outliers],
+            'trous': [{'debut': a, 'fin': b, 'jours': n} for a, b, n in self.gaps]
+        }
+    
+    def print_summary(self):
+        print(f"Réconciliation: {self.nb_points} points, {self.nb_primary} de {self.primary_source}")
+        for source, count in self.filled.items():
+            if count:
+                print(f"   {count} points comblés depuis {source}")
+        if self.outliers:
+            print(f"   {len(self.outliers)} valeurs aberrantes écartées")
+        if self.gaps:
+            print(f"   {len(self.gaps)} trous restants (plus long: {max(n for _, _, n in self.gaps)} jours)")
+
+
+def _label(series, default):
+    return series[0].get('source', default) if series else default
+
+
+def align(series_list):
+    """
+    Jointure fusionnée de séries triées par date
+    Produit (date, [prix ou None par série]) pour chaque date présente dans au moins une série,
+    en un seul passage (une date en double dans une série: la dernière valeur l'emporte)
+    """
+    positions = [0] * len(series_list)
+    lengths = [len(series) for series in series_list]
+    
+    while True:
+        current = None
+        for k, series in enumerate(series_list):
+            if positions[k] < lengths[k]:
+                d = series[positions[k]]['date']
+                if current is None or d < current:
+                    current = d
+        if current is None:
+            return
+        
+        prices = [None] * len(series_list)
+        for k, series in enumerate(series_list):
+            while positions[k] < lengths[k] and series[positions[k]]['date'] == current:
+                prices[k] = series[positions[k]]['price']
+                positions[k] += 1
+        
+        yield current, prices
+
+
+def reconcile(primary, secondaries=(), outlier_threshold=0.15, max_gap_days=5, trading_days_only=True):
+    """
+    Fusionne une série principale et des séries secondaires (listes historical_data triées)
+    - calendrier: union des dates des sources (jours ouvrés seulement si trading_days_only)
+    - un prix principal qui s'écarte de plus de outlier_threshold de la médiane des secondaires
+      (ramenées au niveau de la principale) est écarté s'il y a au moins deux secondaires ce jour-là;
+      sinon seul un pic isolé aller-retour de la principale est écarté (une secondaire unique
+      erronée ne fait pas rejeter un prix principal correct)
+    - un jour manquant ou écarté est comblé par la première source secondaire disponible,
+      ajustée par le rapport de niveau principale/secondaire du dernier jour commun
+      (cotations dans des devises ou sur des places différentes), source notée '<source> ajusté'
+    - les écarts de plus de max_gap_days jours calendaires restants sont signalés
+    Retourne (historical_data, ReconciliationReport)
+    """
+    series_list = [primary] + list(secondaries)
+    sources = [_label(series, f"source {k}") for k, series in enumerate(series_list)]
+    report = ReconciliationReport(sources[0], sources[1:])
+    
+    rows = []
+    for d, prices in align(series_list):
+        if trading_days_only and date.fromisoformat(d).weekday() >= 5:
+            continue
+        rows.append((d, prices))
+    
+    # Rapport de niveau initial: premier jour commun avec la principale
+    ratios = [None] * len(series_list)
+    for _, prices in rows:
+        if prices[0] is None:
+            continue
+        for k in range(1, len(series_list)):
+            if ratios[k] is None and prices[k]:
+                ratios[k] = prices[0] / prices[k]
+        if all(r is not None for r in ratios[1:]):
+            break
+    
+    merged = []
+    for i, (d, prices) in enumerate(rows):
+        # Prix secondaires ramenés au niveau de la source principale
+        ajustes = [(k, prices[k] * ratios[k]) for k in range(1, len(series_list))
+                   if prices[k] is not None and ratios[k] is not None]
+        
+        prix = prices[0]
+        if prix is not None:
+            rejete = False
+            if len(ajustes) >= 2:
+                valeurs = sorted(v for _, v in ajustes)
+                mediane = valeurs[len(valeurs) // 2]
+                rejete = abs(prix / mediane - 1) > outlier_threshold
+            elif merged and i + 1 < len(rows) and rows[i + 1][1][0] is not None:
+                # Moins de deux références: pic isolé (aller-retour de plus de outlier_threshold)
+                precedent = merged[-1]['price']
+                suivant = rows[i + 1][1][0]
+                rejete = (abs(prix / precedent - 1) > outlier_threshold
+                          and abs(suivant / prix - 1) > outlier_threshold
+                          and (prix - precedent) * (suivant - prix) < 0)
+            
+            if rejete:
+                report.outliers.append((d, prix, sources[0]))
+            else:
+                for k in range(1, len(series_list)):
+                    if prices[k]:
+                        ratios[k] = prix / prices[k]
+                merged.append({'date': d, 'price': prix, 'source': sources[0]})
+                report.nb_primary += 1
+                continue
+        
+        if ajustes:
+            k, valeur = ajustes[0]
+            merged.append({'date': d, 'price': round(valeur, 4), 'source': f"{sources[k]} ajusté"})
+            report.filled[sources[k]] += 1
+    
+    # Trous restants
+    for precedent, point in zip(merged, merged[1:]):
+        ecart = (date.fromisoformat(point['date']) - date.fromisoformat(precedent['date'])).days
+        if ecart > max_gap_days:
+            report.gaps.append((precedent['date'], point['date'], ecart))
+    
+    report.nb_points = len(merged)
+    return merged, report
@@ -0,0 +1,107 @@
+"""
+Cache des métriques calculées par FinancialCalculator
+Clé = empreinte de la série (longueur, dernière date, CRC de la fenêtre) + bornes de la période,
+LRU en mémoire avec persistance disque optionnelle (un fichier JSON par entrée)
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class ResultsCache:
+    def __init__(self, maxsize=1024, directory=None):
+        """
+        maxsize: nombre maximal d'entrées gardées en mémoire (éviction LRU)
+        directory: répertoire de persistance (None: cache en mémoire uniquement)
+        """
+        self.maxsize = maxsize
+        self.directory = directory
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # Compteurs
+        self.hits = 0
+        self.misses = 0
+        
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+    
+    def _remember(self, key, metrics):
+        self.entries[key] = metrics
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+    
+    def get(self, key):
+        """
+        Métriques associées à la clé (copie) ou None
+        """
+        with self._lock:
+            metrics = self.entries.get(key)
+            if metrics is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return dict(metrics)
+        
+        if self.directory:
+            try:
+                with open(self._path(key), 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, ValueError):
+                entry = None
+            
+            # Vérification de la clé complète (collision de nom de fichier)
+            if entry and entry.get('key') == key:
+                with self._lock:
+                    self._remember(key, entry['metrics'])
+                    self.hits += 1
+                return dict(entry['metrics'])
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def put(self, key, metrics):
+        """
+        Enregistre les métriques d'une clé (en mémoire et sur disque si activé)
+        """
+        metrics = dict(metrics)
+        with self._lock:
+            self._remember(key, metrics)
+        
+        if self.directory:
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'metrics': metrics}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+    
+    def clear(self):
+        """
+        Vide le cache (mémoire et disque)
+        """
+        with self._lock:
+            self.entries.clear()
+        
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        pass
+    
+    def stats(self):
+        """
+        Compteurs du cache
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self.entries)
+        }
@@ -4,131 +4,670 @@ Scraper pour récupérer les données de l'OPCVM IE0002XZSHO1
 """
 import requests
 import json
+import os
+from contextlib import closing, contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
 from datetime import datetime, timedelta
+from functools import partial
+import threading
 import time
-import csv
+import re
+
+import instrumentation
+from database import DEFAULT_DATABASE, OPCVMDatabase
+from http_cache import DEFAULT_CACHE_DIR, ResponseCache
+from exporters import AtomicFile, CSVExporter, NDJSONExporter
+from investing_parser import InvestingTableParser
+from lazy_import import LazyModule
+from rate_limit import CircuitOpenError, get_default_policy
+from reconcile import reconcile
+
+# numpy n'est importé que pour les séries typées (scrape_series, typed=True)
+np = LazyModule('numpy')
+
+# Symboles Yahoo Finance connus par ISIN (sinon l'ISIN est essayé tel quel)
+YAHOO_SYMBOLS = {
+    'IE0002XZSHO1': ["IWDA.AS", "IWDA.L", "IWDA.DE", "IWDA.MI"]
+}
+
+# Identifiants Investing.com connus par ISIN
+INVESTING_IDS = {
+    'IE0002XZSHO1': {
+        'url': "https://www.investing.com/etfs/ishares-msci-world-ucits-etf-dist-historical-data",
+        'curr_id': '997650',
+        'smlID': '300004',
+        'header': 'IWDA Historical Data'
+    }
+}
+
+# Informations descriptives connues par ISIN
+FUND_INFO = {
+    'IE0002XZSHO1': {
+        'nom': 'iShares Core MSCI World UCITS ETF',
+        'ticker_principal': 'IWDA',
+        'gestionnaire': 'BlackRock',
+        'type': 'ETF',
+        'devise_base': 'USD'
+    }
+}
+
+# Nombre minimal de points pour qu'une source soit retenue
+MIN_POINTS = 10
+
+# URL de base de l'API Yahoo Finance (modifiable pour un serveur local)
+YAHOO_BASE_URL = "https://query1.finance.yahoo.com"
+
+# URL de base d'Investing.com (modifiable pour un serveur local)
+INVESTING_BASE_URL = "https://www.investing.com"
+INVESTING_AJAX_PATH = "/instruments/HistoricalDataAjax"
+
+# Historique Investing.com: une requête par tranche de INVESTING_PAGE_DAYS jours,
+# au plus INVESTING_WORKERS tranches en cours simultanément
+INVESTING_PAGE_DAYS = 365
+INVESTING_WORKERS = 3
+
+# Headers pour éviter le blocage
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+}
+
+
+def yahoo_chart_params(days=1095, start=None):
+    """
+    Paramètres de la requête chart Yahoo Finance (3 ans = 1095 jours par défaut)
+    start: date de début explicite (récupération incrémentale)
+    """
+    # Bornes arrondies au jour: requêtes identiques dans la journée (cache HTTP)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    end_time = int((today + timedelta(days=1)).timestamp())
+    if start is None:
+        start = today - timedelta(days=days)
+    start_time = int(start.timestamp())
+    
+    return {
+        'period1': start_time,
+        'period2': end_time,
+        'interval': '1d',
+        'includePrePost': 'false'
+    }
+
+
+# Origine des timestamps Yahoo Finance (secondes UTC)
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+def parse_yahoo_chart(data, symbol):
+    """
+    Extrait l'historique (date, prix, source) d'une réponse chart Yahoo Finance
+    Dates locales de la place (gmtoffset), comme parse_yahoo_chart_series
+    """
+    if not data.get('chart', {}).get('result'):
+        return []
+    
+    result = data['chart']['result'][0]
+    
+    # Extraction des données
+    timestamps = result.get('timestamp', [])
+    prices_data = result.get('indicators', {}).get('quote', [{}])[0]
+    closes = prices_data.get('close', [])
+    gmtoffset = result.get('meta', {}).get('gmtoffset') or 0
+    
+    # Formatage des données
+    historical_data = []
+    for i, timestamp in enumerate(timestamps):
+        if i < len(closes) and closes[i] is not None:
+            historical_data.append({
+                'date': (UNIX_EPOCH + timedelta(seconds=timestamp + gmtoffset)).strftime('%Y-%m-%d'),
+                'price': round(float(closes[i]), 4),
+                'source': f'Yahoo Finance ({symbol})'
+            })
+    
+    return historical_data
+
+
+def _json_number_array(content, key):
+    """
+    Décode directement le tableau numérique "key": [...] d'un corps JSON brut en float64
+    (null devient NaN), sans construire l'arbre JSON complet. None si la clé est absente
+    """
+    match = re.search(rb'"' + key + rb'"\s*:\s*\[', content)
+    if match is None:
+        return None
+    
+    fin = content.index(b']', match.end())
+    valeurs = content[match.end():fin].replace(b'null', b'nan')
+    if not valeurs.strip():
+        return np.empty(0, dtype=np.float64)
+    
+    return np.fromstring(valeurs, dtype=np.float64, sep=',')
+
+
+def parse_yahoo_chart_series(content, symbol):
+    """
+    Extrait l'historique d'une réponse chart Yahoo Finance (corps brut) en série typée:
+    jours depuis 1970 (int32, date locale de la place via gmtoffset) et clôtures (float64)
+    Les dates ne sont jamais formatées en chaînes
+    """
+    from timeseries_store import PriceSeries
+    
+    source = f'Yahoo Finance ({symbol})'
+    
+    timestamps = _json_number_array(content, b'timestamp')
+    closes = _json_number_array(content, b'close')
+    if timestamps is None or closes is None:
+        return PriceSeries(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64), source)
+    
+    match = re.search(rb'"gmtoffset"\s*:\s*(-?\d+)', content)
+    gmtoffset = int(match.group(1)) if match else 0
+    
+    # Points sans clôture filtrés en une seule opération
+    n = min(len(timestamps), len(closes))
+    valides = ~np.isnan(closes[:n])
+    days = ((timestamps[:n][valides].astype(np.int64) + gmtoffset) // 86400).astype(np.int32)
+    prices = np.round(closes[:n][valides], 4)
+    
+    # Un seul point par jour (le dernier, ex: cotation en cours de séance)
+    if len(days) > 1:
+        derniers = np.append(days[1:] != days[:-1], True)
+        days, prices = days[derniers], prices[derniers]
+    
+    return PriceSeries(days, prices, source)
+
+
+# Symbole gagnant mémorisé par ISIN (essayé en premier aux exécutions suivantes)
+PREFERRED_SYMBOLS_FILE = "symboles_preferes.json"
+
+
+def load_preferred_symbols(filename=PREFERRED_SYMBOLS_FILE):
+    """
+    Charge les symboles gagnants mémorisés (ISIN -> symbole)
+    """
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+@contextmanager
+def file_lock(filename, timeout=10.0, stale=60.0):
+    """
+    Verrou inter-processus par création exclusive de <filename>.lock
+    Un verrou plus vieux que stale secondes (processus interrompu) est repris
+    Lève TimeoutError si le verrou n'est pas obtenu en timeout secondes
+    """
+    lock = f"{filename}.lock"
+    limite = time.monotonic() + timeout
+    
+    while True:
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock) > stale:
+                    os.remove(lock)
+                    continue
+            except FileNotFoundError:
+                continue
+            
+            if time.monotonic() > limite:
+                raise TimeoutError(f"Verrou {lock} non obtenu")
+            time.sleep(0.01)
+    
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock)
+        except FileNotFoundError:
+            pass
+
+
+def save_preferred_symbols(winners, filename=PREFERRED_SYMBOLS_FILE):
+    """
+    Mémorise les symboles gagnants (ISIN -> symbole, écriture atomique)
+    La lecture-modification-écriture se fait sous verrou: les processus d'une analyse en lot
+    (batch.py) n'écrasent pas les symboles mémorisés par les autres
+    """
+    if all(load_preferred_symbols(filename).get(isin) == symbol for isin, symbol in winners.items()):
+        return
+    
+    with file_lock(filename):
+        preferred = load_preferred_symbols(filename)
+        preferred.update(winners)
+        tmp_filename = f"{filename}.{os.getpid()}.tmp"
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
+            json.dump(preferred, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_filename, filename)
+
+
+def order_symbols(symbols, preferred):
+    """
+    Place le symbole mémorisé en tête de liste
+    """
+    if preferred in symbols:
+        return [preferred] + [s for s in symbols if s != preferred]
+    return list(symbols)
+
+
+def symbol_from_source(source):
+    """
+    Extrait le symbole d'une source 'Yahoo Finance (SYMBOLE)' (None sinon)
+    """
+    if source and source.startswith('Yahoo Finance (') and source.endswith(')'):
+        return source[len('Yahoo Finance ('):-1]
+    return None
+
+
+def investing_date_ranges(start, end, page_days=INVESTING_PAGE_DAYS):
+    """
+    Découpe [start, end] en tranches consécutives de page_days jours au plus
+    """
+    ranges = []
+    while start <= end:
+        page_end = min(start + timedelta(days=page_days - 1), end)
+        ranges.append((start, page_end))
+        start = page_end + timedelta(days=1)
+    
+    return ranges
+
+
+def merge_historical_data(existing, new):
+    """
+    Fusionne deux historiques (une valeur par date, les nouveaux points l'emportent)
+    """
+    merged = {item['date']: item for item in existing}
+    for item in new:
+        merged[item['date']] = item
+    
+    return [merged[date] for date in sorted(merged)]
+
+
+def get_fund_info(isin):
+    """
+    Informations de base d'un fonds à partir de son ISIN
+    """
+    fund_info = {'isin': isin}
+    fund_info.update(FUND_INFO.get(isin, {'nom': isin}))
+    fund_info.update({
+        'periode_historique': '3 ans',
+        'date_recuperation': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+    
+    return fund_info
+
+
+def build_result(fund_info, data):
+    """
+    Construit le résultat de scraping (historique trié et période couverte)
+    """
+    # Dates ISO: l'ordre des chaînes est l'ordre chronologique, seules les bornes sont converties
+    dates = [d['date'] for d in data]
+    oldest_date = datetime.strptime(min(dates), '%Y-%m-%d')
+    newest_date = datetime.strptime(max(dates), '%Y-%m-%d')
+    period_covered = (newest_date - oldest_date).days
+    
+    return {
+        'fund_info': fund_info,
+        'historical_data': sorted(data, key=lambda x: x['date']),
+        'date_debut': oldest_date.strftime('%Y-%m-%d'),
+        'date_fin': newest_date.strftime('%Y-%m-%d'),
+        'periode_jours': period_covered,
+        'periode_annees': round(period_covered/365, 1)
+    }
+
+
+def response_size(response):
+    """
+    Taille de la réponse en octets: en-tête Content-Length (corps lu en flux non chargé),
+    sinon taille du corps déjà en mémoire (réponses du cache)
+    """
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit():
+        return int(length)
+    if getattr(response, 'from_cache', False):
+        return len(response.content or b'')
+    return None
+
+
+def source_name(result):
+    """
+    Nom de la source d'un résultat sans le symbole (ex: "Yahoo Finance (0P0001)" -> "Yahoo Finance")
+    """
+    return result['historical_data'][-1]['source'].split(' (')[0]
+
+
+class RaceCancelled(Exception):
+    """
+    Requête abandonnée avant envoi: la course (requêtes couvertes) a déjà un gagnant
+    """
+
 
 class OPCVMScraper:
-    def __init__(self, isin="IE0002XZSHO1"):
+    def __init__(self, isin="IE0002XZSHO1", symbols=None, yahoo_base_url=YAHOO_BASE_URL,
+                 hedge_delay=None, preferences_file=PREFERRED_SYMBOLS_FILE, cache=None,
+                 policy=None, investing_base_url=INVESTING_BASE_URL):
+        """
+        yahoo_base_url, investing_base_url: URL de base des sources (ex: serveur local stub_server.py)
+        hedge_delay: None pour essayer symboles et sources l'un après l'autre,
+                     sinon délai (secondes) avant de lancer le candidat suivant en parallèle
+                     (0: tous les candidats sont lancés en même temps)
+        preferences_file: fichier des symboles gagnants mémorisés (None pour désactiver)
+        cache: cache des réponses HTTP (http_cache.ResponseCache), None pour désactiver
+        policy: limites de débit, reprises et disjoncteurs (rate_limit.RequestPolicy),
+                par défaut la politique partagée par tout le processus
+        """
         self.isin = isin
+        # Symboles Yahoo Finance à essayer pour cet ISIN (le gagnant précédent en premier)
+        self.symbols = symbols or YAHOO_SYMBOLS.get(isin, [isin])
+        self.preferences_file = preferences_file
+        if preferences_file:
+            self.symbols = order_symbols(self.symbols, load_preferred_symbols(preferences_file).get(isin))
+        self.yahoo_base_url = yahoo_base_url.rstrip('/')
+        self.investing_base_url = investing_base_url.rstrip('/')
+        self.hedge_delay = hedge_delay
         self.session = requests.Session()
-        # Headers pour éviter le blocage
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-        })
+        self.session.headers.update(DEFAULT_HEADERS)
         self.timeout = 15
+        self.cache = cache
+        self.policy = policy or get_default_policy()
+        # Signaux d'arrêt des courses auxquelles participe le thread courant
+        self._race_stops = threading.local()
     
-    def scrape_yahoo_finance(self):
+    def _with_race_stops(self, func, *stops):
         """
-        Méthode 1: Yahoo Finance API 
+        func à exécuter dans un autre thread: elle hérite des signaux d'arrêt du thread courant
+        (courses imbriquées, tranches Investing.com), complétés par stops
         """
-        print("Tentative avec Yahoo Finance...")
+        events = getattr(self._race_stops, 'events', ()) + stops
+        
+        def run(*args, **kwargs):
+            previous = getattr(self._race_stops, 'events', ())
+            self._race_stops.events = events
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._race_stops.events = previous
         
-        # Symboles possibles pour cet ETF
-        symbols = ["IWDA.AS", "IWDA.L", "IWDA.DE", "IWDA.MI"]
+        return run
+    
+    def _check_race_stops(self):
+        if any(event.is_set() for event in getattr(self._race_stops, 'events', ())):
+            raise RaceCancelled("Requête abandonnée: course déjà gagnée")
+    
+    def _request(self, method, url, source=None, **kwargs):
+        """
+        Exécute une requête HTTP, via le cache de réponses s'il est configuré
+        - débit limité par hôte (seau à jetons)
+        - reprises avec backoff exponentiel et gigue sur erreur réseau, 429 et 5xx
+        - disjoncteur de la source: échecs répétés = source ignorée pendant un temps
+        - candidat d'une course déjà gagnée (_race): RaceCancelled avant chaque envoi ou reprise
+        """
+        kwargs.setdefault('timeout', self.timeout)
         
-        for symbol in symbols:
+        breaker = self.policy.breaker(source) if source else None
+        if breaker and not breaker.allow():
+            raise CircuitOpenError(f"Source {source} désactivée (disjoncteur ouvert)")
+        
+        limiter = self.policy.limiter
+        retry = self.policy.retry
+        
+        for attempt in range(retry.max_retries + 1):
+            self._check_race_stops()
             try:
-                print(f"   Essai du symbole: {symbol}")
+                with instrumentation.span('http_requete', source=source, methode=method, url=url,
+                                          tentative=attempt) as span:
+                    if self.cache is not None:
+                        response = self.cache.fetch(self.session, method, url,
+                                                    before_request=partial(limiter.acquire, url), **kwargs)
+                    else:
+                        limiter.acquire(url)
+                        response = self.session.request(method, url, **kwargs)
+                    
+                    octets = response_size(response)
+                    span.set(statut=response.status_code, octets=octets,
+                             cache=bool(getattr(response, 'from_cache', False)))
+                
+                instrumentation.count('http_requetes_total', source=source, statut=response.status_code)
+                if octets:
+                    instrumentation.count('http_octets_total', octets, source=source)
+            
+            except requests.RequestException as e:
+                instrumentation.count('http_erreurs_total', source=source, erreur=type(e).__name__)
+                if attempt == retry.max_retries:
+                    if breaker:
+                        breaker.record_failure()
+                    raise
+                
+                delay = retry.delay(attempt)
+                instrumentation.count('http_reprises_total', source=source)
+                print(f"   {type(e).__name__}, nouvelle tentative dans {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            
+            if response.status_code in retry.retry_statuses:
+                # Trop de requêtes: l'hôte est ralenti
+                if response.status_code == 429:
+                    limiter.penalize(url)
                 
-                # Récupération des données historiques (3 ans = 1095 jours)
-                end_time = int(time.time())
-                start_time = int((datetime.now() - timedelta(days=1095)).timestamp())
+                if attempt < retry.max_retries:
+                    delay = retry.delay(attempt, response.headers.get('Retry-After'))
+                    if delay is not None:
+                        # Réponse abandonnée: connexion rendue au pool avant la reprise
+                        response.close()
+                        instrumentation.count('http_reprises_total', source=source)
+                        print(f"   HTTP {response.status_code}, nouvelle tentative dans {delay:.1f}s")
+                        time.sleep(delay)
+                        continue
+                    print(f"   HTTP {response.status_code}, Retry-After trop long: source abandonnée")
                 
-                url = "https://query1.finance.yahoo.com/v8/finance/chart/" + symbol
-                params = {
-                    'period1': start_time,
-                    'period2': end_time,
-                    'interval': '1d',
-                    'includePrePost': 'false'
-                }
+                if breaker:
+                    breaker.record_failure()
+                return response
+            
+            limiter.reward(url)
+            if breaker:
+                breaker.record_success()
+            return response
+    
+    def _fetch_yahoo_symbol(self, symbol, start=None, typed=False):
+        """
+        Récupère l'historique d'un symbole Yahoo Finance (None si la réponse n'est pas 200)
+        start: date de début, sinon les 3 dernières années
+        typed: série typée (PriceSeries) décodée depuis le corps brut au lieu de dictionnaires
+        """
+        # Récupération des données historiques (3 ans = 1095 jours)
+        url = f"{self.yahoo_base_url}/v8/finance/chart/{symbol}"
+        params = yahoo_chart_params(start=start)
+        
+        response = self._request('GET', url, source='yahoo', params=params)
+        
+        if response.status_code == 200:
+            if typed:
+                return parse_yahoo_chart_series(response.content, symbol)
+            return parse_yahoo_chart(response.json(), symbol)
+        return None
+    
+    def _race(self, candidates, hedge_delay):
+        """
+        Requêtes couvertes: lance les candidats (label, fonction) en décalé de hedge_delay
+        secondes et retourne (label, données) du premier résultat valide
+        Les candidats non démarrés sont annulés; ceux en cours terminent leur requête HTTP
+        mais n'en envoient plus (ni reprise): RaceCancelled, ignorée ici
+        """
+        if not candidates:
+            return None, None
+        
+        executor = ThreadPoolExecutor(max_workers=len(candidates))
+        remaining = list(candidates)
+        pending = {}
+        stop = threading.Event()
+        
+        try:
+            while remaining or pending:
+                # Lancement du candidat suivant (immédiat si plus rien n'est en cours)
+                if remaining:
+                    label, func = remaining.pop(0)
+                    pending[executor.submit(self._with_race_stops(func, stop))] = label
                 
-                response = self.session.get(url, params=params, timeout=self.timeout)
+                done, _ = wait(pending, timeout=hedge_delay if remaining else None,
+                               return_when=FIRST_COMPLETED)
                 
-                if response.status_code == 200:
-                    data = response.json()
+                for future in done:
+                    label = pending.pop(future)
+                    try:
+                        data = future.result()
+                    except RaceCancelled:
+                        continue
+                    except Exception as e:
+                        print(f"   Erreur avec {label}: {e}")
+                        continue
                     
-                    if data.get('chart', {}).get('result'):
-                        result = data['chart']['result'][0]
-                        
-                        # Extraction des données
-                        timestamps = result.get('timestamp', [])
-                        prices_data = result.get('indicators', {}).get('quote', [{}])[0]
-                        closes = prices_data.get('close', [])
-                        
-                        # Formatage des données
-                        historical_data = []
-                        for i, timestamp in enumerate(timestamps):
-                            if i < len(closes) and closes[i] is not None:
-                                historical_data.append({
-                                    'date': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d'),
-                                    'price': round(float(closes[i]), 4),
-                                    'source': f'Yahoo Finance ({symbol})'
-                                })
-                        
-                        if historical_data:
-                            print(f"Données trouvées: {len(historical_data)} points")
-                            print(f"   Période: {historical_data[0]['date']} à {historical_data[-1]['date']}")
-                            return historical_data
+                    if data and len(data) > MIN_POINTS:
+                        return label, data
+            
+            return None, None
+        
+        finally:
+            # Les candidats non démarrés sont annulés, ceux en cours s'arrêtent à leur prochaine requête
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _remember_symbol(self, symbol):
+        if self.preferences_file:
+            try:
+                save_preferred_symbols({self.isin: symbol}, self.preferences_file)
+            except OSError as e:
+                print(f"   Impossible de mémoriser le symbole {symbol}: {e}")
+    
+    @instrumentation.traced('scraping_yahoo')
+    def scrape_yahoo_finance(self, typed=False):
+        """
+        Méthode 1: Yahoo Finance API 
+        typed: retourne une série typée (PriceSeries) au lieu d'une liste de dictionnaires
+        """
+        print("Tentative avec Yahoo Finance...")
+        
+        if self.hedge_delay is not None:
+            print(f"   Symboles en parallèle: {', '.join(self.symbols)}")
+            candidates = [(symbol, partial(self._fetch_yahoo_symbol, symbol, typed=typed))
+                          for symbol in self.symbols]
+            symbol, historical_data = self._race(candidates, self.hedge_delay)
                 
-            except Exception as e:
-                print(f"   Erreur avec {symbol}: {e}")
-                continue
+            if historical_data:
+                print(f"Données trouvées: {len(historical_data)} points ({symbol})")
+                self._remember_symbol(symbol)
+                return historical_data
+                
+        else:
+            for symbol in self.symbols:
+                try:
+                    print(f"   Essai du symbole: {symbol}")
+                    historical_data = self._fetch_yahoo_symbol(symbol, typed=typed)
+                    
+                    if historical_data:
+                        print(f"Données trouvées: {len(historical_data)} points")
+                        print(f"   Période: {historical_data[0]['date']} à {historical_data[-1]['date']}")
+                        self._remember_symbol(symbol)
+                        return historical_data
+                
+                except Exception as e:
+                    print(f"   Erreur avec {symbol}: {e}")
+                    continue
         
         print("Échec Yahoo Finance")
         return None
     
-    def scrape_investing_com(self):
+    def _fetch_investing_page(self, instrument, start, end):
         """
-        Méthode 2: Investing.com 
+        Récupère une tranche [start, end] de l'historique Investing.com
+        Le tableau HTML est analysé au fil du téléchargement (None si la réponse n'est pas 200)
+        """
+        headers = {
+            'X-Requested-With': 'XMLHttpRequest',
+            'Referer': instrument['url']
+        }
+        
+        # Paramètres pour récupérer les données historiques 
+        data = {
+            'curr_id': instrument['curr_id'],
+            'smlID': instrument['smlID'],
+            'header': instrument['header'],
+            'st_date': start.strftime('%m/%d/%Y'),
+            'end_date': end.strftime('%m/%d/%Y'),
+            'interval_sec': 'Daily',
+            'sort_col': 'date',
+            'sort_ord': 'DESC',
+            'action': 'historical_data'
+        }
+        
+        url = f"{self.investing_base_url}{INVESTING_AJAX_PATH}"
+        response = self._request('POST', url, source='investing', data=data, headers=headers, stream=True)
         
+        # Réponse en flux: connexion libérée dans tous les cas (erreur, corps lu ou exception)
+        with closing(response):
+            if response.status_code != 200:
+                return None
+        
+            if getattr(response, 'encoding', 'utf-8') is None:
+                response.encoding = 'utf-8'
+        
+            parser = InvestingTableParser('Investing.com')
+            for chunk in response.iter_content(chunk_size=65536, decode_unicode=True):
+                parser.feed(chunk)
+            parser.close()
+        
+        return parser.rows
+    
+    @instrumentation.traced('scraping_investing')
+    def scrape_investing_com(self, start=None):
+        """
+        Méthode 2: Investing.com 
+        start: date de début, sinon les 3 dernières années
+        Les tranches de dates sont demandées en parallèle et fusionnées à leur arrivée
         """
         print(" Tentative avec Investing.com...")
         
+        instrument = INVESTING_IDS.get(self.isin)
+        if not instrument:
+            print(f"   Pas d'identifiant Investing.com pour {self.isin}")
+            return None
+        
+        end = datetime.now()
+        pages = investing_date_ranges(start or end - timedelta(days=1095), end)
+        historical_data = []
+        
         try:
-            # URL pour l'ETF IWDA sur Investing.com
-            base_url = "https://www.investing.com/etfs/ishares-msci-world-ucits-etf-dist-historical-data"
+            with ThreadPoolExecutor(max_workers=min(len(pages), INVESTING_WORKERS)) as executor:
+                fetch_page = self._with_race_stops(self._fetch_investing_page)
+                futures = {executor.submit(fetch_page, instrument, debut, fin): (debut, fin)
+                           for debut, fin in pages}
             
-            headers = {
-                'X-Requested-With': 'XMLHttpRequest',
-                'Referer': base_url
-            }
+                for future in as_completed(futures):
+                    debut, fin = futures[future]
+                    try:
+                        rows = future.result()
+                    except RaceCancelled:
+                        return None
+                    except Exception as e:
+                        print(f"   Erreur Investing.com ({debut:%d/%m/%Y} - {fin:%d/%m/%Y}): {e}")
+                        continue
             
-            # Paramètres pour récupérer les données historiques 
-            data = {
-                'curr_id': '997650',  # ID de l'ETF IWDA
-                'smlID': '300004',
-                'header': 'IWDA Historical Data',
-                'st_date': (datetime.now() - timedelta(days=1095)).strftime('%m/%d/%Y'),
-                'end_date': datetime.now().strftime('%m/%d/%Y'),
-                'interval_sec': 'Daily',
-                'sort_col': 'date',
-                'sort_ord': 'DESC',
-                'action': 'historical_data'
-            }
-            
-            response = self.session.post(
-                "https://www.investing.com/instruments/HistoricalDataAjax",
-                data=data,
-                headers=headers,
-                timeout=self.timeout
-            )
-            
-            if response.status_code == 200:
-                # Parse HTML response (simplifié)
-                content = response.text
-                if 'table' in content and 'data-test="historical-data-table"' in content:
-                    print("Données HTML récupérées d'Investing.com")
-                    # Ici on pourrait parser le HTML, mais c'est plus complexe
-                    return []
+                    if rows:
+                        historical_data = merge_historical_data(historical_data, rows)
             
         except Exception as e:
             print(f"Erreur Investing.com: {e}")
         
+        if historical_data:
+            print(f"Données HTML récupérées d'Investing.com: {len(historical_data)} points")
+            return historical_data
+        
         return None
     
     
@@ -137,19 +676,9 @@ class OPCVMScraper:
         Récupère les informations de base du fonds
         """
         
-        fund_info = {
-            'isin': self.isin,
-            'nom': 'iShares Core MSCI World UCITS ETF',
-            'ticker_principal': 'IWDA',
-            'gestionnaire': 'BlackRock',
-            'type': 'ETF',
-            'devise_base': 'USD',
-            'periode_historique': '3 ans',
-            'date_recuperation': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        return fund_info
+        return get_fund_info(self.isin)
     
+    @instrumentation.traced('scraping')
     def scrape_all_sources(self):
         """
         Essaie toutes les sources et retourne la première qui fonctionne
@@ -160,40 +689,193 @@ class OPCVMScraper:
         # Informations du fonds
         fund_info = self.get_fund_info()
         
-        # Essai des différentes sources
-        sources = [
-            self.scrape_yahoo_finance,
-            self.scrape_investing_com
-        ]
+        # Essai des différentes sources (celles dont le disjoncteur est ouvert sont ignorées)
+        sources = []
+        for name, source_func in [('yahoo', self.scrape_yahoo_finance),
+                                  ('investing', self.scrape_investing_com)]:
+            if self.policy.breaker(name).available():
+                sources.append(source_func)
+            else:
+                print(f"Source {name} ignorée (disjoncteur ouvert)")
+        
+        # Mode couvert: les sources sont mises en concurrence
+        if self.hedge_delay is not None:
+            _, data = self._race([(f.__name__, f) for f in sources], self.hedge_delay)
+            if data:
+                result = build_result(fund_info, data)
+                instrumentation.count('sources_choisies_total', source=source_name(result))
+                
+                print(f"Scraping réussi!")
+                print(f"Période couverte: {result['periode_jours']} jours ({result['periode_jours']/365:.1f} ans)")
+                
+                return result
+            
+            print("Échec de toutes les sources")
+            return None
         
         for source_func in sources:
             try:
                 data = source_func()
-                if data and len(data) > 10:  # Au moins 10 points de données
+                if data and len(data) > MIN_POINTS:  # Au moins 10 points de données
                     # Vérification de la période couverte
-                    dates = [datetime.strptime(d['date'], '%Y-%m-%d') for d in data]
-                    oldest_date = min(dates)
-                    newest_date = max(dates)
-                    period_covered = (newest_date - oldest_date).days
+                    result = build_result(fund_info, data)
+                    instrumentation.count('sources_choisies_total', source=source_name(result))
                     
                     print(f"Scraping réussi!")
-                    print(f"Période couverte: {period_covered} jours ({period_covered/365:.1f} ans)")
+                    print(f"Période couverte: {result['periode_jours']} jours ({result['periode_jours']/365:.1f} ans)")
                     
-                    return {
-                        'fund_info': fund_info,
-                        'historical_data': sorted(data, key=lambda x: x['date']),
-                        'date_debut': oldest_date.strftime('%Y-%m-%d'),
-                        'date_fin': newest_date.strftime('%Y-%m-%d'),
-                        'periode_jours': period_covered,
-                        'periode_annees': round(period_covered/365, 1)
-                    }
+                    return result
             except Exception as e:
                 print(f"Erreur avec une source: {e}")
                 continue
         
         print("Échec de toutes les sources")
+        instrumentation.count('sources_choisies_total', source='aucune')
         return None
     
+    @instrumentation.traced('scraping_reconcilie')
+    def scrape_reconciled(self, outlier_threshold=0.15, max_gap_days=5):
+        """
+        Récupère toutes les cotations Yahoo et Investing.com en parallèle et les réconcilie:
+        la première cotation disponible (ordre des symboles) est la référence, les autres
+        comblent ses jours manquants et servent à écarter ses valeurs aberrantes
+        Le résultat contient le bilan de la réconciliation ('reconciliation')
+        """
+        print(f"Début du scraping multi-sources pour l'ISIN: {self.isin}")
+        print("="*60)
+        
+        fund_info = self.get_fund_info()
+        
+        candidates = []
+        if self.policy.breaker('yahoo').available():
+            candidates += [(symbol, partial(self._fetch_yahoo_symbol, symbol)) for symbol in self.symbols]
+        if self.policy.breaker('investing').available() and self.isin in INVESTING_IDS:
+            candidates.append(('Investing.com', self.scrape_investing_com))
+        
+        if not candidates:
+            print("Échec de toutes les sources")
+            return None
+        
+        series = {}
+        with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+            futures = {executor.submit(func): label for label, func in candidates}
+            for future in as_completed(futures):
+                label = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    print(f"   Erreur avec {label}: {e}")
+                    continue
+                
+                if data and len(data) > MIN_POINTS:
+                    print(f"   {label}: {len(data)} points")
+                    series[label] = sorted(data, key=lambda x: x['date'])
+        
+        # Ordre de priorité: symboles (préféré en premier) puis Investing.com
+        ordered = [series[label] for label, _ in candidates if label in series]
+        if not ordered:
+            print("Échec de toutes les sources")
+            return None
+        
+        historical_data, report = reconcile(ordered[0], ordered[1:], outlier_threshold, max_gap_days)
+        report.print_summary()
+        
+        result = build_result(fund_info, historical_data)
+        result['reconciliation'] = report.to_dict()
+        return result
+    
+    def scrape_series(self):
+        """
+        Historique sous forme de série typée (PriceSeries), à passer directement au calculateur
+        via series.to_calculator(): aucune date n'est formatée puis relue entre les étapes
+        Seul Yahoo Finance fournit une série typée
+        """
+        print(f"Début du scraping pour l'ISIN: {self.isin}")
+        print("="*60)
+        
+        if not self.policy.breaker('yahoo').available():
+            print("Source yahoo ignorée (disjoncteur ouvert)")
+            return None
+        
+        try:
+            series = self.scrape_yahoo_finance(typed=True)
+        except Exception as e:
+            print(f"Erreur avec une source: {e}")
+            return None
+        
+        if series is None or len(series) <= MIN_POINTS:
+            print("Échec de toutes les sources")
+            return None
+        
+        print(f"Scraping réussi!")
+        return series
+    
+    @instrumentation.traced('scraping_incremental')
+    def scrape_incremental(self, stored):
+        """
+        Récupération incrémentale: ne demande que les points postérieurs au dernier point stocké
+        stored: résultat précédent (format de scrape_all_sources / save_to_json)
+        Retourne le résultat fusionné et dédoublonné
+        """
+        historical_data = (stored or {}).get('historical_data') or []
+        stored_isin = (stored or {}).get('fund_info', {}).get('isin')
+        
+        if not historical_data or (stored_isin and stored_isin != self.isin):
+            print("Aucun historique stocké: récupération complète")
+            return self.scrape_all_sources()
+        
+        last_point = max(historical_data, key=lambda x: x['date'])
+        last_date = datetime.strptime(last_point['date'], '%Y-%m-%d')
+        
+        if last_date.date() >= datetime.now().date():
+            print(f"Historique déjà à jour ({last_point['date']})")
+            return build_result(stored.get('fund_info', self.get_fund_info()), historical_data)
+        
+        # Même cotation que l'historique stocké, pour ne pas mélanger places et devises
+        symbol = symbol_from_source(last_point.get('source'))
+        if not symbol:
+            print("Source stockée non incrémentale: récupération complète")
+            return self.scrape_all_sources()
+        
+        start = last_date + timedelta(days=1)
+        print(f"Mise à jour incrémentale de {symbol} depuis le {start.strftime('%Y-%m-%d')}")
+        
+        try:
+            new_data = self._fetch_yahoo_symbol(symbol, start=start)
+        except Exception as e:
+            print(f"   Erreur avec {symbol}: {e}")
+            new_data = None
+        
+        if new_data is None:
+            print("Échec de la mise à jour incrémentale")
+            return None
+        
+        # Yahoo peut renvoyer le dernier point connu: on ne garde que les nouvelles dates
+        new_data = [item for item in new_data if item['date'] > last_point['date']]
+        print(f"   {len(new_data)} nouveaux points")
+        
+        merged = merge_historical_data(historical_data, new_data)
+        return build_result(stored.get('fund_info', self.get_fund_info()), merged)
+    
+    def update_from_file(self, filename="opcvm_data.json"):
+        """
+        Met à jour un fichier JSON existant avec les seuls points manquants
+        """
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            stored = None
+        except Exception as e:
+            print(f"Erreur lecture fichier: {e}")
+            stored = None
+        
+        result = self.scrape_incremental(stored)
+        if result:
+            self.save_to_json(result, filename)
+        
+        return result
+    
     def save_to_csv(self, result, filename="opcvm_data.csv"):
         """
         Sauvegarde les données en CSV
@@ -203,13 +885,9 @@ class OPCVMScraper:
             return
         
         try:
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['date', 'price', 'source']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for row in result['historical_data']:
-                    writer.writerow(row)
+            # Fichier temporaire renommé en fin d'écriture: une erreur laisse l'ancien fichier intact
+            with CSVExporter(filename, ['date', 'price', 'source']) as exporter:
+                exporter.write_rows(result['historical_data'])
             
             print(f"Données sauvées dans {filename}")
             
@@ -225,26 +903,77 @@ class OPCVMScraper:
             return
         
         try:
-            with open(filename, 'w', encoding='utf-8') as jsonfile:
+            with AtomicFile(filename) as jsonfile:
                 json.dump(result, jsonfile, indent=2, ensure_ascii=False)
             
             print(f"Données enregsitées dans {filename}")
             
         except Exception as e:
             print(f"Erreur sauvegarde JSON: {e}")
+    
+    def save_to_ndjson(self, result, filename="opcvm_data.ndjson", append=False):
+        """
+        Sauvegarde l'historique en JSON par ligne (un point par ligne, avec l'ISIN); .gz: compressé
+        append: ajoute les points au fichier existant (plusieurs fonds dans un même fichier)
+        """
+        if not result or not result.get('historical_data'):
+            print("Aucune donnée à sauvegarder")
+            return
+        
+        try:
+            with NDJSONExporter(filename, append=append) as exporter:
+                for point in result['historical_data']:
+                    exporter.write({'isin': self.isin, **point})
+            
+            print(f"{exporter.count} points sauvés dans {filename}")
+        
+        except Exception as e:
+            print(f"Erreur sauvegarde NDJSON: {e}")
 
-def main():
+    def save_to_sqlite(self, result, database=DEFAULT_DATABASE):
+        """
+        Sauvegarde les données dans la base SQLite (mise à jour des points existants)
+        database: nom de fichier ou OPCVMDatabase déjà ouverte
+        """
+        if not result or not result.get('historical_data'):
+            print("Aucune donnée à sauvegarder")
+            return
+        
+        try:
+            db = database if isinstance(database, OPCVMDatabase) else OPCVMDatabase(database)
+            try:
+                nb = db.save_result(result)
+            finally:
+                if db is not database:
+                    db.close()
+            
+            print(f"{nb} points enregistrés dans {db.filename}")
+        
+        except Exception as e:
+            print(f"Erreur sauvegarde SQLite: {e}")
+
+def main(isin="IE0002XZSHO1", symbols=None, csv_file="opcvm_data.csv", json_file="opcvm_data.json",
+         database=None, incremental=False, cache_dir=DEFAULT_CACHE_DIR):
     """
     Fonction principale de test
+    csv_file, json_file, database: sauvegardes du résultat (None pour désactiver)
+    incremental: complète l'historique de json_file au lieu de tout récupérer
+    cache_dir: cache disque des réponses HTTP (une nouvelle exécution ne retélécharge que
+    les réponses expirées), None pour désactiver
     """
     print("SCRAPER OPCVM")
     print("="*60)
     
     # Création du scraper
-    scraper = OPCVMScraper("IE0002XZSHO1")
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    scraper = OPCVMScraper(isin, symbols=symbols, cache=cache)
     
     # Scraping des données
-    result = scraper.scrape_all_sources()
+    stored = None
+    if incremental and json_file and os.path.exists(json_file):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    result = scraper.scrape_incremental(stored) if stored else scraper.scrape_all_sources()
     
     if result:
         print("\n RÉSULTATS:")
@@ -256,13 +985,20 @@ def main():
         
         
         # Sauvegarde
-        scraper.save_to_csv(result)
-        scraper.save_to_json(result)
+        if csv_file:
+            scraper.save_to_csv(result, csv_file)
+        if json_file:
+            scraper.save_to_json(result, json_file)
+        if database:
+            scraper.save_to_sqlite(result, database)
         
         print("\n Scraping terminé avec succès!")
         
     else:
         print("\n Impossible de récupérer les données")
 
+    if cache is not None:
+        cache.print_summary()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""
+Scraper asynchrone pour récupérer les données de nombreux OPCVM en parallèle
+Pool de connexions partagé, concurrence bornée par hôte et délai global
+"""
+import asyncio
+
+import aiohttp
+
+from rate_limit import CircuitOpenError, get_default_policy
+from scraping import (YAHOO_BASE_URL, YAHOO_SYMBOLS, DEFAULT_HEADERS, MIN_POINTS,
+                      PREFERRED_SYMBOLS_FILE, yahoo_chart_params, parse_yahoo_chart,
+                      get_fund_info, build_result, load_preferred_symbols,
+                      save_preferred_symbols, order_symbols)
+
+
+class AsyncOPCVMScraper:
+    def __init__(self, concurrency=20, per_host=8, timeout=15, deadline=None,
+                 yahoo_base_url=YAHOO_BASE_URL, hedge_delay=None,
+                 preferences_file=PREFERRED_SYMBOLS_FILE, policy=None):
+        """
+        concurrency: nombre maximal de fonds traités simultanément (et de connexions)
+        per_host: nombre maximal de connexions ouvertes vers un même hôte
+        timeout: délai maximal d'une requête (secondes)
+        deadline: délai global du scraping (secondes), les fonds non terminés sont abandonnés
+        hedge_delay: None pour essayer les symboles l'un après l'autre, sinon délai
+                     (secondes) avant de lancer le symbole suivant en concurrence
+        preferences_file: fichier des symboles gagnants mémorisés (None pour désactiver)
+        policy: limites de débit, reprises et disjoncteurs (rate_limit.RequestPolicy)
+        """
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.deadline = deadline
+        self.yahoo_base_url = yahoo_base_url.rstrip('/')
+        self.hedge_delay = hedge_delay
+        self.preferences_file = preferences_file
+        self.preferred = load_preferred_symbols(preferences_file) if preferences_file else {}
+        self.winners = {}
+        self.policy = policy or get_default_policy()
+        # aiohttp ne décode pas brotli sans dépendance supplémentaire
+        self.headers = {k: v for k, v in DEFAULT_HEADERS.items() if k != 'Accept-Encoding'}
+    
+    async def fetch_yahoo_symbol(self, session, symbol):
+        """
+        Récupère l'historique d'un symbole Yahoo Finance (None si la réponse n'est pas 200)
+        """
+        url = f"{self.yahoo_base_url}/v8/finance/chart/{symbol}"
+        
+        breaker = self.policy.breaker('yahoo')
+        if not breaker.allow():
+            raise CircuitOpenError("Source yahoo désactivée (disjoncteur ouvert)")
+        
+        limiter = self.policy.limiter
+        retry = self.policy.retry
+        
+        for attempt in range(retry.max_retries + 1):
+            # Débit limité par hôte: attente du prochain jeton
+            delay = limiter.reserve(url)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            try:
+                async with session.get(url, params=yahoo_chart_params()) as response:
+                    status = response.status
+                    retry_after = response.headers.get('Retry-After')
+                    data = await response.json(content_type=None) if status == 200 else None
+            
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == retry.max_retries:
+                    breaker.record_failure()
+                    raise
+                await asyncio.sleep(retry.delay(attempt))
+                continue
+            
+            if status in retry.retry_statuses:
+                if status == 429:
+                    limiter.penalize(url)
+                if attempt < retry.max_retries:
+                    delay = retry.delay(attempt, retry_after)
+                    if delay is not None:
+                        await asyncio.sleep(delay)
+                        continue
+                    print(f"   HTTP {status}, Retry-After trop long: {symbol} abandonné")
+                breaker.record_failure()
+                return None
+        
+            limiter.reward(url)
+            breaker.record_success()
+            return parse_yahoo_chart(data, symbol) if data is not None else None
+    
+    async def _race_symbols(self, session, isin, symbols):
+        """
+        Requêtes couvertes: symboles lancés en décalé de hedge_delay secondes,
+        le premier résultat valide l'emporte et les autres requêtes sont annulées
+        """
+        remaining = list(symbols)
+        tasks = {}
+        
+        try:
+            while remaining or tasks:
+                if remaining:
+                    symbol = remaining.pop(0)
+                    tasks[asyncio.create_task(self.fetch_yahoo_symbol(session, symbol))] = symbol
+                
+                done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay if remaining else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    symbol = tasks.pop(task)
+                    if task.exception() is not None:
+                        print(f"   {isin}: erreur avec {symbol}: {task.exception()!r}")
+                        continue
+                    
+                    data = task.result()
+                    if data and len(data) > MIN_POINTS:
+                        return symbol, data
+            
+            return None, None
+        
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def scrape_isin(self, session, semaphore, isin, symbols=None):
+        """
+        Essaie les symboles d'un ISIN et retourne le même résultat que scrape_all_sources
+        """
+        symbols = order_symbols(symbols or YAHOO_SYMBOLS.get(isin, [isin]), self.preferred.get(isin))
+        
+        async with semaphore:
+            if self.hedge_delay is not None:
+                symbol, data = await self._race_symbols(session, isin, symbols)
+                if data:
+                    self.winners[isin] = symbol
+                    return build_result(get_fund_info(isin), data)
+                
+            else:
+                for symbol in symbols:
+                    try:
+                        data = await self.fetch_yahoo_symbol(session, symbol)
+                    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, CircuitOpenError) as e:
+                        print(f"   {isin}: erreur avec {symbol}: {e!r}")
+                        continue
+                    
+                    if data and len(data) > MIN_POINTS:
+                        self.winners[isin] = symbol
+                        return build_result(get_fund_info(isin), data)
+        
+        print(f"   {isin}: échec Yahoo Finance")
+        return None
+    
+    async def scrape_many_async(self, funds):
+        """
+        Scrape tous les fonds en parallèle
+        funds: liste d'ISIN ou de tuples (isin, symboles)
+        Retourne un dictionnaire ISIN -> résultat (None en cas d'échec)
+        """
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = {}
+        
+        async with aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=timeout) as session:
+            tasks = {}
+            for fund in funds:
+                isin, symbols = fund if isinstance(fund, tuple) else (fund, None)
+                task = asyncio.create_task(self.scrape_isin(session, semaphore, isin, symbols))
+                tasks[task] = isin
+            
+            if not tasks:
+                return results
+            
+            done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+            
+            # Délai global dépassé: abandon des fonds restants
+            for task in pending:
+                task.cancel()
+            if pending:
+                print(f"Délai global dépassé: {len(pending)} fonds abandonnés")
+                await asyncio.gather(*pending, return_exceptions=True)
+            
+            for task, isin in tasks.items():
+                if task in done and task.exception() is None:
+                    results[isin] = task.result()
+                else:
+                    if task in done:
+                        print(f"   {isin}: erreur {task.exception()}")
+                    results[isin] = None
+        
+        # Mémorisation des symboles gagnants pour les prochaines exécutions
+        if self.preferences_file and self.winners:
+            try:
+                save_preferred_symbols(self.winners, self.preferences_file)
+                self.preferred.update(self.winners)
+            except OSError as e:
+                print(f"Impossible de mémoriser les symboles: {e}")
+        
+        return results
+    
+    def scrape_many(self, funds):
+        """
+        Point d'entrée synchrone de scrape_many_async
+        """
+        return asyncio.run(self.scrape_many_async(funds))
+
+
+def main():
+    """
+    Fonction principale de test
+    """
+    print("SCRAPER OPCVM ASYNCHRONE")
+    print("="*60)
+    
+    scraper = AsyncOPCVMScraper(concurrency=10, deadline=60)
+    results = scraper.scrape_many(["IE0002XZSHO1"])
+    
+    for isin, result in results.items():
+        if result:
+            print(f"   {isin}: {len(result['historical_data'])} points ({result['date_debut']} à {result['date_fin']})")
+        else:
+            print(f"   {isin}: aucune donnée")
+
+if __name__ == "__main__":
+    main()
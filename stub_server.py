@@ -0,0 +1,287 @@
+"""
+Serveur local imitant Yahoo Finance et Investing.com pour tester le scraper hors ligne
+- GET  /v8/finance/chart/<symbole>          réponse chart (period1 / period2 respectés)
+- POST /instruments/HistoricalDataAjax      tableau HTML d'historique (st_date / end_date)
+- GET  /stats                               compteurs de requêtes par statut
+Données issues de fichiers (fixtures) ou de séries synthétiques déterministes par symbole,
+latence, erreurs 5xx, réponses 429 et corps lents configurables
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from synthetic import generate_gbm
+
+CHART_PATH = "/v8/finance/chart/"
+INVESTING_PATH = "/instruments/HistoricalDataAjax"
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class StubConfig:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_429=0.0, retry_after=1,
+                 slow_body=0.0, history_days=2600, fixtures=None, seed=0):
+        """
+        latency: délai moyen avant la réponse (secondes), jitter: variation uniforme +/- jitter
+        error_rate: proportion de réponses 503, rate_429: proportion de réponses 429
+        retry_after: valeur de l'en-tête Retry-After des réponses 429 (secondes)
+        slow_body: durée d'envoi du corps (secondes), envoyé par morceaux
+        history_days: nombre de jours ouvrés des séries synthétiques
+        fixtures: répertoire de réponses enregistrées (<symbole>.json, investing_<curr_id>.html)
+        seed: graine du tirage des erreurs (séquence reproductible)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.slow_body = slow_body
+        self.history_days = history_days
+        self.fixtures = fixtures
+        self.seed = seed
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self, address, config):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.stats = Counter()
+        self.series = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def draw(self):
+        """
+        Tirage de l'issue d'une requête: (délai, statut forcé ou None)
+        """
+        config = self.config
+        with self._lock:
+            delay = max(0.0, config.latency + self.random.uniform(-config.jitter, config.jitter))
+            tirage = self.random.random()
+        
+        if tirage < config.rate_429:
+            return delay, 429
+        if tirage < config.rate_429 + config.error_rate:
+            return delay, 503
+        return delay, None
+    
+    def get_series(self, key):
+        """
+        Série synthétique d'un symbole (même symbole = même série)
+        """
+        with self._lock:
+            if key not in self.series:
+                self.series[key] = generate_gbm(self.config.history_days, seed=zlib.crc32(key.encode('utf-8')),
+                                                source=key)
+            return self.series[key]
+    
+    def record(self, status):
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats[str(status)] += 1
+
+
+def chart_body(series, symbol, period1=None, period2=None):
+    """
+    Réponse chart Yahoo Finance d'une série sur [period1, period2] (timestamps en secondes)
+    """
+    timestamps = series.days.astype(np.int64) * 86400 + 9 * 3600
+    masque = np.ones(len(timestamps), dtype=bool)
+    if period1 is not None:
+        masque &= timestamps >= period1
+    if period2 is not None:
+        masque &= timestamps <= period2
+    
+    return json.dumps({'chart': {'result': [{
+        'meta': {'symbol': symbol, 'currency': 'EUR', 'gmtoffset': 0},
+        'timestamp': timestamps[masque].tolist(),
+        'indicators': {'quote': [{'close': series.prices[masque].tolist()}]}
+    }], 'error': None}}).encode('utf-8')
+
+
+def investing_body(series, start=None, end=None):
+    """
+    Tableau HTML d'historique Investing.com (ordre décroissant) sur [start, end]
+    """
+    days = series.days
+    masque = np.ones(len(days), dtype=bool)
+    if start is not None:
+        masque &= days >= (start - EPOCH).days
+    if end is not None:
+        masque &= days <= (end - EPOCH).days
+    
+    lignes = []
+    for day, price in zip(days[masque][::-1].tolist(), series.prices[masque][::-1].tolist()):
+        d = EPOCH + timedelta(days=day)
+        lignes.append(f'<tr><td class="first left bold noWrap" data-real-value="{day * 86400}">'
+                      f'{d:%b %d, %Y}</td><td data-real-value="{price}">{price:,.2f}</td></tr>')
+    
+    return ('<table class="genTbl closedTbl historicalTbl" id="curr_table">'
+            '<thead><tr><th>Date</th><th>Price</th></tr></thead><tbody>'
+            + ''.join(lignes) + '</tbody></table>').encode('utf-8')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _fixture(self, name):
+        directory = self.server.config.fixtures
+        if not directory:
+            return None
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def _send(self, status, body=b'', content_type='application/json', headers=None):
+        self.server.record(status)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        
+        # Corps lent: envoyé en 10 morceaux répartis sur slow_body secondes
+        slow_body = self.server.config.slow_body
+        if slow_body > 0 and body:
+            taille = max(1, len(body) // 10)
+            for i in range(0, len(body), taille):
+                self.wfile.write(body[i:i + taille])
+                self.wfile.flush()
+                time.sleep(slow_body / 10)
+        else:
+            self.wfile.write(body)
+    
+    def _simulate(self):
+        """
+        Latence et erreurs simulées; True si une réponse d'erreur a été envoyée
+        """
+        delay, status = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        if status == 429:
+            self._send(429, b'{"error": "Too Many Requests"}',
+                       headers={'Retry-After': str(self.server.config.retry_after)})
+            return True
+        if status is not None:
+            self._send(status, b'{"error": "Service Unavailable"}')
+            return True
+        return False
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        
+        if url.path == '/stats':
+            with self.server._lock:
+                body = json.dumps(dict(self.server.stats)).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        
+        if not url.path.startswith(CHART_PATH):
+            self._send(404, b'{"error": "Not Found"}')
+            return
+        
+        if self._simulate():
+            return
+        
+        symbol = url.path[len(CHART_PATH):]
+        body = self._fixture(f"{symbol}.json")
+        if body is None:
+            query = parse_qs(url.query)
+            period1 = int(query['period1'][0]) if 'period1' in query else None
+            period2 = int(query['period2'][0]) if 'period2' in query else None
+            body = chart_body(self.server.get_series(symbol), symbol, period1, period2)
+        
+        self._send(200, body)
+    
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        
+        if url.path != INVESTING_PATH:
+            self._send(404, b'{"error": "Not Found"}')
+            return
+        
+        if self._simulate():
+            return
+        
+        curr_id = form.get('curr_id', ['0'])[0]
+        body = self._fixture(f"investing_{curr_id}.html")
+        if body is None:
+            start = datetime.strptime(form['st_date'][0], '%m/%d/%Y') if 'st_date' in form else None
+            end = datetime.strptime(form['end_date'][0], '%m/%d/%Y') if 'end_date' in form else None
+            body = investing_body(self.server.get_series(f"investing-{curr_id}"), start, end)
+        
+        self._send(200, body, content_type='text/html; charset=utf-8')
+
+
+def start_stub_server(config=None, host='127.0.0.1', port=0):
+    """
+    Démarre le serveur dans un thread (port 0: port libre choisi par le système)
+    Retourne le serveur (server.base_url, server.stats, server.shutdown())
+    """
+    server = StubServer((host, port), config or StubConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """
+    Point d'entrée: python stub_server.py --port 8765 --latency 0.05 --rate-429 0.05
+    """
+    parser = argparse.ArgumentParser(description="Serveur local Yahoo Finance / Investing.com")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Latence moyenne (secondes)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Variation de la latence (secondes)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Proportion de réponses 503")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="Proportion de réponses 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After des réponses 429 (secondes)")
+    parser.add_argument('--slow-body', type=float, default=0.0, help="Durée d'envoi du corps (secondes)")
+    parser.add_argument('--fixtures', help="Répertoire de réponses enregistrées")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    config = StubConfig(args.latency, args.jitter, args.error_rate, args.rate_429, args.retry_after,
+                        args.slow_body, fixtures=args.fixtures, seed=args.seed)
+    server = StubServer((args.host, args.port), config)
+    
+    print(f"Serveur stub sur {server.base_url}")
+    print(f"   OPCVMScraper(yahoo_base_url=\"{server.base_url}\", investing_base_url=\"{server.base_url}\")")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Générateur déterministe de séries de valeurs liquidatives synthétiques
+Mouvement brownien géométrique sur un calendrier de jours ouvrés (benchmarks et essais hors ligne)
+"""
+from datetime import date
+
+import numpy as np
+
+from timeseries_store import PriceSeries, to_day_number
+
+
+def business_days(n, end_date=None):
+    """
+    Les n derniers jours ouvrés (lundi-vendredi) jusqu'à end_date inclus, en jours depuis 1970
+    """
+    fin = to_day_number(end_date or date.today())
+    debut = fin - (n * 7) // 5 - 7
+    days = np.arange(debut, fin + 1, dtype=np.int32)
+    
+    # Le 01/01/1970 était un jeudi (jour 3 de la semaine)
+    days = days[(days + 3) % 7 < 5]
+    return days[-n:]
+
+
+def generate_gbm(n, seed=0, start_price=100.0, mu=0.07, sigma=0.18, end_date=None,
+                 source='Synthétique'):
+    """
+    Série de n prix quotidiens suivant un mouvement brownien géométrique
+    mu: rendement annuel moyen, sigma: volatilité annuelle
+    Même graine = même série
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1 / 252
+    
+    chocs = rng.standard_normal(n - 1)
+    log_rendements = (mu - sigma ** 2 / 2) * dt + sigma * np.sqrt(dt) * chocs
+    prices = start_price * np.exp(np.concatenate(([0.0], np.cumsum(log_rendements))))
+    
+    return PriceSeries(business_days(n, end_date), np.round(prices, 4), source)
+
+
+def generate_historical_data(n, seed=0, **kwargs):
+    """
+    Même série au format historical_data du scraper (dates en chaînes)
+    """
+    return generate_gbm(n, seed, **kwargs).to_historical_data()
+
+
+def synthetic_isin(i):
+    return f"XS{i:010d}"
+
+
+def generate_universe(nb_funds, n, seed=0, **kwargs):
+    """
+    Univers de nb_funds fonds synthétiques (ISIN fictifs XS..., une graine par fonds)
+    Retourne un dictionnaire ISIN -> PriceSeries
+    """
+    rng = np.random.default_rng(seed)
+    universe = {}
+    for i in range(nb_funds):
+        params = {'mu': float(rng.uniform(-0.02, 0.12)), 'sigma': float(rng.uniform(0.05, 0.35))}
+        params.update(kwargs)
+        universe[synthetic_isin(i)] = generate_gbm(n, seed=seed * 100003 + i, **params)
+    
+    return universe
@@ -0,0 +1,23 @@
+"""
+Analyse complète: repli sur toutes les sources quand la série typée Yahoo est indisponible
+"""
+import csv
+
+import analyse
+import scraping
+from synthetic import generate_historical_data
+
+
+def test_main_falls_back_to_all_sources(tmp_path, monkeypatch):
+    historical_data = generate_historical_data(800, seed=4, source='Investing.com')
+    monkeypatch.setattr(scraping.OPCVMScraper, 'scrape_series', lambda self: None)
+    monkeypatch.setattr(scraping.OPCVMScraper, 'scrape_all_sources',
+                        lambda self: scraping.build_result(self.get_fund_info(), historical_data))
+    
+    csv_file = tmp_path / "analyse.csv"
+    analyse.main(data_file=str(tmp_path / "absent.json"), csv_file=str(csv_file), json_file=None,
+                 database=None, cache_dir=None)
+    
+    with open(csv_file, newline='', encoding='utf-8') as f:
+        periodes = [row['periode'] for row in csv.DictReader(f)]
+    assert periodes == ['YTD', '3M', '6M', '1Y', '3Y']
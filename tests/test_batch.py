@@ -0,0 +1,79 @@
+"""
+Analyse en lot: ordre des résultats et export en flux
+"""
+import concurrent.futures
+import csv
+import json
+import threading
+import time
+
+import batch
+from batch import BATCH_FIELDS, iter_batch, stream_batch
+from synthetic import generate_historical_data, synthetic_isin
+
+
+def write_universe(data_dir, nb_funds):
+    isins = [synthetic_isin(i) for i in range(nb_funds)]
+    for i, isin in enumerate(isins):
+        with open(data_dir / f"{isin}.json", 'w', encoding='utf-8') as f:
+            json.dump({'historical_data': generate_historical_data(300, seed=i)}, f)
+    return isins
+
+
+def test_iter_batch_keeps_fund_order(tmp_path):
+    isins = write_universe(tmp_path, 7)
+    
+    results = list(iter_batch(iter(isins), workers=2, chunksize=2, data_dir=str(tmp_path), engine="python"))
+    
+    assert [isin for isin, _, _ in results] == isins
+    assert all(error is None and metrics for _, metrics, error in results)
+
+
+def test_iter_batch_refills_while_first_chunk_runs(monkeypatch):
+    # Paquets exécutés dans des threads: le premier reste bloqué jusqu'à sa libération
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', concurrent.futures.ThreadPoolExecutor)
+    libere = threading.Event()
+    executes = []
+    
+    def analyze(chunk):
+        isin = chunk[0][0]
+        if isin == 'F0':
+            libere.wait(5)
+        executes.append(isin)
+        return [(isin, {'1Y': {}}, None)]
+    
+    monkeypatch.setattr(batch, '_analyze_fund_chunk', analyze)
+    isins = [f"F{i}" for i in range(40)]
+    generateur = iter_batch(isins, workers=2, chunksize=1)
+    premier = []
+    consommateur = threading.Thread(target=lambda: premier.append(next(generateur)))
+    consommateur.start()
+    
+    # Fenêtre de 4 paquets complétée à chaque fin de paquet, jusqu'à 4 résultats en avance
+    time.sleep(0.3)
+    en_avance = len(executes)
+    assert 4 <= en_avance < 8
+    assert not premier
+    
+    libere.set()
+    consommateur.join(5)
+    resultats = premier + list(generateur)
+    assert [isin for isin, _, _ in resultats] == isins
+    assert sorted(executes) == sorted(isins)
+
+
+def test_stream_batch_appends_rows(tmp_path):
+    isins = write_universe(tmp_path, 3)
+    csv_file = str(tmp_path / "analyse.csv")
+    
+    for append in (False, True):
+        batch = iter_batch(isins, workers=1, data_dir=str(tmp_path), engine="python")
+        nb_succes, errors = stream_batch(batch, csv_file, append=append)
+        assert (nb_succes, errors) == (3, {})
+    
+    with open(csv_file, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == BATCH_FIELDS
+    moitie = len(rows) // 2
+    assert rows[:moitie] == rows[moitie:]
+    assert list(dict.fromkeys(row['isin'] for row in rows[:moitie])) == isins
@@ -0,0 +1,82 @@
+"""
+Métriques glissantes comparées au calcul direct de chaque fenêtre
+"""
+import pytest
+
+from calcul import FinancialCalculator
+from synthetic import generate_historical_data
+
+
+def brute_force_drawdown(prices):
+    pic = prices[0]
+    pire = 0.0
+    for price in prices:
+        pic = max(pic, price)
+        pire = min(pire, price / pic - 1)
+    return pire * 100
+
+
+@pytest.mark.parametrize('engine', ['python', 'numpy'])
+def test_rolling_max_drawdown_matches_brute_force(engine):
+    data = generate_historical_data(600, seed=5)
+    window = 60
+    rolling = FinancialCalculator(data, engine=engine).rolling_metrics(window)
+    prices = [item['price'] for item in data]
+    
+    assert len(rolling) == len(data) - window
+    for k, valeur in enumerate(rolling['max_drawdown']):
+        attendu = brute_force_drawdown(prices[k:k + window + 1])
+        assert valeur == pytest.approx(attendu, abs=1e-9), k + window
+
+
+def test_rolling_metrics_match_compute_metrics():
+    data = generate_historical_data(300, seed=2)
+    window = 40
+    calculator = FinancialCalculator(data)
+    rolling = calculator.rolling_metrics(window)
+    
+    for k in range(len(rolling)):
+        metrics = calculator.compute_metrics(data[k:k + window + 1])
+        assert rolling['volatilite'][k] == pytest.approx(metrics['volatilite'], abs=0.006)
+        assert rolling['rendement'][k] == pytest.approx(metrics['performance'], abs=0.006)
+        assert rolling['max_drawdown'][k] == pytest.approx(metrics['max_drawdown'], abs=0.006)
+
+
+def test_rolling_metrics_skip_returns_after_zero_price():
+    data = generate_historical_data(120, seed=1)
+    data[50]['price'] = 0.0
+    window = 20
+    calculator = FinancialCalculator(data)
+    rolling = calculator.rolling_metrics(window)
+    
+    assert len(rolling) == len(data) - window
+    for k in range(len(rolling)):
+        if k == 50:
+            continue    # compute_metrics ne traite pas une période qui commence à un prix nul
+        metrics = calculator.compute_metrics(data[k:k + window + 1])
+        assert rolling['volatilite'][k] == pytest.approx(metrics['volatilite'], abs=0.006)
+
+
+def test_incremental_matches_full_recompute_on_falling_series():
+    # Série en baisse: le pic est le point le plus ancien et sort de la fenêtre chaque jour
+    data = generate_historical_data(900, seed=3, mu=-0.6, sigma=0.1)
+    historique, nouveaux = data[:800], data[800:]
+    calculator = FinancialCalculator(historique, incremental=True)
+    
+    for item in nouveaux:
+        calculator.append(item['date'], item['price'])
+        complet = FinancialCalculator(calculator.data)
+        assert calculator.analyze_all_periods() == complet.analyze_all_periods()
+
+
+def test_daily_returns_is_a_list_for_both_engines():
+    data = generate_historical_data(50, seed=6)
+    data[10]['price'] = 0.0
+    
+    python = FinancialCalculator(data).calculate_daily_returns(data)
+    numpy = FinancialCalculator(data, engine='numpy')
+    returns = numpy.calculate_daily_returns(numpy.filter_data_by_period(numpy._first_date()))
+    
+    assert isinstance(returns, list)
+    assert returns == pytest.approx(python)
+    assert not FinancialCalculator(data[:1], engine='numpy').calculate_daily_returns(data[:1])
@@ -0,0 +1,147 @@
+"""
+Démon: planification après la clôture, fichier de reprise, recalcul seulement sur nouveau point
+"""
+import json
+import random
+import signal
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from daemon import RefreshDaemon, next_refresh, spread_offset
+from synthetic import generate_historical_data
+
+PARIS = ZoneInfo('Europe/Paris')
+ISIN = 'FR0000000001'
+
+
+class ZeroRandom:
+    def uniform(self, a, b):
+        return a
+
+
+@pytest.mark.parametrize('now, attendu', [
+    # Mercredi matin: clôture du jour (17:30) + 1 h
+    (datetime(2026, 10, 14, 10, 0, tzinfo=PARIS), datetime(2026, 10, 14, 18, 30, tzinfo=PARIS)),
+    # Mercredi soir, mise à jour passée: jeudi
+    (datetime(2026, 10, 14, 19, 0, tzinfo=PARIS), datetime(2026, 10, 15, 18, 30, tzinfo=PARIS)),
+    # Vendredi soir et samedi: lundi
+    (datetime(2026, 10, 16, 19, 0, tzinfo=PARIS), datetime(2026, 10, 19, 18, 30, tzinfo=PARIS)),
+    (datetime(2026, 10, 17, 12, 0, tzinfo=PARIS), datetime(2026, 10, 19, 18, 30, tzinfo=PARIS)),
+])
+def test_next_refresh_after_market_close(now, attendu):
+    moment = next_refresh('paris', ISIN, now, delay=3600, spread=0, jitter=0, rng=ZeroRandom())
+    assert moment == attendu
+
+
+def test_next_refresh_in_market_time_zone():
+    now = datetime(2026, 10, 14, 12, 0, tzinfo=timezone.utc)
+    moment = next_refresh('new_york', ISIN, now, delay=0, spread=0, jitter=0, rng=ZeroRandom())
+    assert moment == datetime(2026, 10, 14, 20, 0, tzinfo=timezone.utc)
+
+
+def test_next_refresh_spread_and_jitter():
+    now = datetime(2026, 10, 14, 10, 0, tzinfo=PARIS)
+    cloture = datetime(2026, 10, 14, 18, 30, tzinfo=PARIS)
+    
+    decalage = spread_offset(ISIN, 7200)
+    assert 0 <= decalage < 7200
+    assert decalage == spread_offset(ISIN, 7200)
+    assert next_refresh('paris', ISIN, now, spread=7200, jitter=0, rng=ZeroRandom()) \
+        == cloture + timedelta(seconds=decalage)
+    
+    gigue = random.Random(3).uniform(0, 300)
+    moment = next_refresh('paris', ISIN, now, spread=7200, jitter=300, rng=random.Random(3))
+    assert moment == cloture + timedelta(seconds=decalage + gigue)
+
+
+def test_checkpoint_save_and_restore(tmp_path):
+    checkpoint = str(tmp_path / "etat.json")
+    daemon = RefreshDaemon([ISIN, 'FR0000000002'], str(tmp_path), checkpoint, database=None, seed=1)
+    state = daemon.funds[ISIN]
+    state.last_point = '2026-10-16'
+    state.last_refresh = datetime(2026, 10, 16, 19, 0, tzinfo=timezone.utc)
+    state.next_run = datetime(2026, 10, 19, 17, 30, tzinfo=timezone.utc)
+    state.failures = 2
+    daemon.save_checkpoint()
+    
+    # Fonds retiré de l'univers: ignoré à la reprise
+    repris = RefreshDaemon([ISIN, 'FR0000000003'], str(tmp_path), checkpoint, database=None)
+    restored = repris.funds[ISIN]
+    
+    assert (restored.last_point, restored.last_refresh, restored.next_run, restored.failures) \
+        == ('2026-10-16', state.last_refresh, state.next_run, 2)
+    assert repris.funds['FR0000000003'].next_run is None
+    assert list(tmp_path.iterdir()) == [tmp_path / "etat.json"]
+
+
+class FakeScraper:
+    """
+    Scraper rejouant des historiques successifs
+    """
+    
+    def __init__(self, *historiques):
+        self.historiques = list(historiques)
+    
+    def _result(self):
+        return {'historical_data': self.historiques.pop(0)}
+    
+    def scrape_all_sources(self):
+        return self._result()
+    
+    def scrape_incremental(self, stored):
+        return self._result()
+    
+    def save_to_json(self, result, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+
+
+def test_no_new_point_no_recompute(tmp_path):
+    data = generate_historical_data(400, seed=4)
+    daemon = RefreshDaemon([ISIN], str(tmp_path), None, database=None)
+    state = daemon.funds[ISIN]
+    state.scraper = FakeScraper(data[:-1], data[:-1], data)
+    
+    assert daemon.refresh(state)
+    calculator, results = state.calculator, state.results
+    
+    assert not daemon.refresh(state)
+    assert state.calculator is calculator and state.results is results
+    
+    assert daemon.refresh(state)
+    assert state.calculator is calculator and state.last_point == data[-1]['date']
+    assert len(calculator) == len(data)
+
+
+def test_checkpoint_saved_once_per_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(signal, 'signal', lambda *args: None)
+    isins = [f"FR{i:010d}" for i in range(5)]
+    daemon = RefreshDaemon(isins, str(tmp_path), str(tmp_path / "etat.json"), database=None)
+    sauvegardes = []
+    monkeypatch.setattr(daemon, 'save_checkpoint', lambda: sauvegardes.append(1))
+    
+    rafraichis = []
+    
+    def refresh(state):
+        rafraichis.append(state.isin)
+        if len(rafraichis) == len(isins):
+            daemon.stop()
+        return True
+    
+    monkeypatch.setattr(daemon, 'refresh', refresh)
+    for state in daemon.funds.values():
+        state.next_run = daemon.now() - timedelta(minutes=1)
+    
+    daemon.run()
+    
+    # Démarrage, lot des 5 fonds échus, arrêt
+    assert sorted(rafraichis) == isins
+    assert len(sauvegardes) == 3
+    
+    sauvegardes.clear()
+    daemon._stop.clear()
+    daemon.run_once()
+    assert len(rafraichis) == 2 * len(isins)
+    assert len(sauvegardes) == 1
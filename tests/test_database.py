@@ -0,0 +1,14 @@
+"""
+Base SQLite des fonds
+"""
+from database import OPCVMDatabase
+from scraping import get_fund_info
+
+
+def test_save_fund_info_stores_base_currency(tmp_path):
+    with OPCVMDatabase(str(tmp_path / "opcvm.db")) as db:
+        db.save_fund_info(get_fund_info("IE0002XZSHO1"))
+        row = db.connection.execute("SELECT nom, devise, type FROM funds WHERE isin = ?",
+                                    ("IE0002XZSHO1",)).fetchone()
+    
+    assert tuple(row) == ('iShares Core MSCI World UCITS ETF', 'USD', 'ETF')
@@ -0,0 +1,53 @@
+"""
+Parité des moteurs de calcul: python, numpy, from_arrays et mode incrémental
+"""
+import pytest
+
+from calcul import FinancialCalculator
+from synthetic import generate_gbm
+
+
+def series_cases():
+    for seed in (0, 1, 7, 42):
+        yield f"graine{seed}", generate_gbm(2800, seed=seed)
+    # Prix nul au milieu de l'historique (aucun début de période dessus)
+    series = generate_gbm(2800, seed=3)
+    series.prices[-100] = 0.0
+    yield "prix_nul", series
+
+
+CASES = dict(series_cases())
+
+
+def assert_same_results(results, reference):
+    assert list(results) == list(reference)
+    for period, metrics in reference.items():
+        for key, valeur in metrics.items():
+            if isinstance(valeur, float):
+                # Arrondis à 2 décimales: un écart d'arrondi est toléré
+                assert results[period][key] == pytest.approx(valeur, abs=0.011), (period, key)
+            else:
+                assert results[period][key] == valeur, (period, key)
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+@pytest.mark.parametrize('extended', [False, True])
+def test_engines_agree(name, extended):
+    series = CASES[name]
+    data = series.to_historical_data()
+    reference = FinancialCalculator(data).analyze_all_periods(extended)
+    assert reference
+    
+    variantes = {
+        'numpy': FinancialCalculator(data, engine='numpy'),
+        'from_arrays': FinancialCalculator.from_arrays(series.days, series.prices),
+        'from_arrays_python': FinancialCalculator.from_arrays(series.days, series.prices, engine='python'),
+    }
+    for engine in ('python', 'numpy'):
+        incremental = FinancialCalculator(data[:-30], engine=engine, incremental=True)
+        for item in data[-30:]:
+            incremental.append(item['date'], item['price'])
+        variantes[f'incremental_{engine}'] = incremental
+    
+    for variante, calculator in variantes.items():
+        assert_same_results(calculator.analyze_all_periods(extended), reference)
@@ -0,0 +1,95 @@
+"""
+Exports en flux: écriture atomique, ajout, gzip
+"""
+import csv
+import gzip
+import json
+import os
+
+import pytest
+
+import exporters
+from exporters import CSVExporter, NDJSONExporter, StreamingExporter, open_exporter
+
+
+def read_csv(path, opener=open):
+    with opener(path, 'rt', newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+def test_error_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "rapport.csv")
+    with CSVExporter(path, ['x']) as exporter:
+        exporter.write({'x': 1})
+    
+    with pytest.raises(RuntimeError):
+        with CSVExporter(path, ['x']) as exporter:
+            exporter.write({'x': 2})
+            raise RuntimeError
+    
+    assert read_csv(path) == [['x'], ['1']]
+    assert [p.name for p in tmp_path.iterdir()] == ["rapport.csv"]
+
+
+@pytest.mark.parametrize('name', ["rapport.csv", "rapport.csv.gz"])
+def test_append_writes_header_once(tmp_path, name):
+    path = str(tmp_path / name)
+    for valeur in (1, 2, 3):
+        with open_exporter(path, ['x'], append=True) as exporter:
+            exporter.write({'x': valeur})
+    
+    opener = gzip.open if name.endswith('.gz') else open
+    assert read_csv(path, opener) == [['x'], ['1'], ['2'], ['3']]
+
+
+def test_append_does_not_copy_existing_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "lignes.ndjson")
+    with NDJSONExporter(path) as exporter:
+        exporter.write_rows({'i': i} for i in range(1000))
+    
+    copies = []
+    copyfileobj = exporters.shutil.copyfileobj
+    
+    def copie(source, target, *args):
+        copies.append(source.name)
+        copyfileobj(source, target, *args)
+    
+    monkeypatch.setattr(exporters.shutil, 'copyfileobj', copie)
+    with NDJSONExporter(path, append=True) as exporter:
+        exporter.write({'i': 1000})
+    
+    # Seul le fichier temporaire (nouvelles lignes) est copié
+    assert copies == [f"{path}.{os.getpid()}.tmp"]
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line)['i'] for line in f] == list(range(1001))
+
+
+def test_failed_append_truncates_to_original_size(tmp_path, monkeypatch):
+    path = str(tmp_path / "lignes.ndjson")
+    with NDJSONExporter(path) as exporter:
+        exporter.write({'i': 0})
+    with open(path, 'rb') as f:
+        contenu = f.read()
+    
+    def copie_interrompue(source, target, *args):
+        target.write(b'{"i":')
+        raise OSError("disque plein")
+    
+    monkeypatch.setattr(exporters.shutil, 'copyfileobj', copie_interrompue)
+    with pytest.raises(OSError):
+        with NDJSONExporter(path, append=True) as exporter:
+            exporter.write({'i': 1})
+    
+    with open(path, 'rb') as f:
+        assert f.read() == contenu
+    assert [p.name for p in tmp_path.iterdir()] == ["lignes.ndjson"]
+
+
+def test_streaming_exporter_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        StreamingExporter(str(tmp_path / "x.csv"))
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        open_exporter("rapport.txt")
@@ -0,0 +1,94 @@
+"""
+Analyse des tableaux Investing.com enregistrés (tests/fixtures), en une fois et par morceaux
+"""
+import os
+from datetime import datetime
+
+import pytest
+
+from investing_parser import InvestingTableParser, parse_investing_file, parse_investing_table
+from scraping import INVESTING_IDS, OPCVMScraper
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+EXPECTED = {
+    # Ancienne page: id="curr_table", data-real-value, ligne sans prix, tableau de pied ignoré
+    'investing_curr_table.html': [
+        ('2024-03-01', 93.12), ('2024-02-29', 92.46), ('2024-02-28', 92.13), ('2024-02-26', 1234.5)
+    ],
+    # Nouvelle page: data-test="historical-data-table", <time datetime>, colonne Close,
+    # cellules non fermées et tableau imbriqué dans une cellule
+    'investing_historical_data_table.html': [
+        ('2024-03-01', 4720.5), ('2024-02-29', 4701.0), ('2024-02-28', 4688.75), ('2024-02-27', 4690.0)
+    ],
+}
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('name', sorted(EXPECTED))
+def test_parse_fixture(name):
+    rows = parse_investing_table(read_fixture(name))
+    assert [(row['date'], row['price']) for row in rows] == EXPECTED[name]
+    assert {row['source'] for row in rows} == {'Investing.com'}
+
+
+@pytest.mark.parametrize('name', sorted(EXPECTED))
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 1000])
+def test_chunked_feed_matches_single_feed(name, chunk_size):
+    html = read_fixture(name)
+    parser = InvestingTableParser()
+    for i in range(0, len(html), chunk_size):
+        parser.feed(html[i:i + chunk_size])
+    parser.close()
+    
+    assert parser.rows == parse_investing_table(html)
+
+
+def test_parse_file_by_chunks():
+    rows = parse_investing_file(os.path.join(FIXTURES, 'investing_curr_table.html'), chunk_size=5)
+    assert [(row['date'], row['price']) for row in rows] == EXPECTED['investing_curr_table.html']
+
+
+def test_no_history_table():
+    assert parse_investing_table('<table><tr><th>Date</th><th>Price</th></tr>'
+                                 '<tr><td>Mar 01, 2024</td><td>1.0</td></tr></table>') == []
+
+
+class StreamedResponse:
+    def __init__(self, status_code, html, fail=False):
+        self.status_code = status_code
+        self.headers = {}
+        self.encoding = 'utf-8'
+        self.html = html
+        self.fail = fail
+        self.closed = False
+    
+    def iter_content(self, chunk_size=65536, decode_unicode=False):
+        yield self.html[:100]
+        if self.fail:
+            raise ConnectionError("connexion coupée")
+        yield self.html[100:]
+    
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize('status_code, fail', [(200, False), (404, False), (200, True)])
+def test_streamed_page_is_always_closed(monkeypatch, status_code, fail):
+    scraper = OPCVMScraper(preferences_file=None)
+    response = StreamedResponse(status_code, read_fixture('investing_curr_table.html'), fail)
+    monkeypatch.setattr(scraper, '_request', lambda *args, **kwargs: response)
+    instrument = INVESTING_IDS['IE0002XZSHO1']
+    
+    if fail:
+        with pytest.raises(ConnectionError):
+            scraper._fetch_investing_page(instrument, datetime(2024, 1, 1), datetime(2024, 3, 1))
+    else:
+        rows = scraper._fetch_investing_page(instrument, datetime(2024, 1, 1), datetime(2024, 3, 1))
+        assert (rows is None) == (status_code != 200)
+    
+    assert response.closed
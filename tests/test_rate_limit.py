@@ -0,0 +1,66 @@
+"""
+Reprises (Retry-After) et disjoncteur
+"""
+import time
+
+from load_test import load_test_policy
+from rate_limit import CircuitBreaker, RetryPolicy
+from scraping import OPCVMScraper
+
+
+def test_retry_after_is_honoured_in_full():
+    retry = RetryPolicy(backoff_max=30.0, max_retry_after=300.0)
+    assert retry.delay(0, '120') == 120.0
+    assert retry.delay(0, '1000') is None
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {'Retry-After': '0'}
+        self.closed = False
+    
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, statuses):
+        self.responses = [FakeResponse(status) for status in statuses]
+        self.sent = iter(self.responses)
+    
+    def request(self, method, url, **kwargs):
+        return next(self.sent)
+
+
+def test_retried_responses_are_closed():
+    scraper = OPCVMScraper(preferences_file=None, policy=load_test_policy())
+    scraper.session = FakeSession([503, 429, 200])
+    
+    response = scraper._request('GET', 'http://127.0.0.1/chart', source='yahoo')
+    
+    assert response.status_code == 200 and not response.closed
+    assert [r.closed for r in scraper.session.responses] == [True, True, False]
+
+
+def test_half_open_breaker_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.allow()
+    
+    time.sleep(0.06)
+    assert breaker.available()
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert not breaker.available()
+    
+    # Échec de la tentative d'essai: le disjoncteur se rouvre
+    breaker.record_failure()
+    assert breaker.state == 'ouvert'
+    
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'fermé'
+    assert breaker.allow() and breaker.allow()
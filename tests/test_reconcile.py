@@ -0,0 +1,41 @@
+"""
+Réconciliation multi-sources: rejet des valeurs aberrantes
+"""
+from reconcile import reconcile
+
+DATES = ['2024-03-04', '2024-03-05', '2024-03-06', '2024-03-07', '2024-03-08']
+
+
+def series(prices, source):
+    return [{'date': d, 'price': p, 'source': source} for d, p in zip(DATES, prices)]
+
+
+def test_single_secondary_glitch_keeps_primary():
+    primary = series([100.0, 101.0, 102.0, 101.5, 102.5], 'Yahoo')
+    secondary = series([50.0, 50.5, 80.0, 50.75, 51.25], 'Investing')
+    
+    merged, report = reconcile(primary, [secondary])
+    
+    assert merged == primary
+    assert report.outliers == []
+
+
+def test_single_secondary_primary_spike_is_replaced():
+    primary = series([100.0, 101.0, 160.0, 101.5, 102.5], 'Yahoo')
+    secondary = series([50.0, 50.5, 51.0, 50.75, 51.25], 'Investing')
+    
+    merged, report = reconcile(primary, [secondary])
+    
+    assert report.outliers == [('2024-03-06', 160.0, 'Yahoo')]
+    assert merged[2] == {'date': '2024-03-06', 'price': 102.0, 'source': 'Investing ajusté'}
+
+
+def test_median_of_two_secondaries_rejects_primary():
+    primary = series([100.0, 101.0, 125.0, 126.0, 127.0], 'Yahoo')
+    secondaries = [series([50.0, 50.5, 51.0, 50.75, 51.25], 'Investing'),
+                   series([200.0, 202.0, 204.0, 203.0, 205.0], 'Autre')]
+    
+    merged, report = reconcile(primary, secondaries)
+    
+    assert ('2024-03-06', 125.0, 'Yahoo') in report.outliers
+    assert merged[2]['source'] == 'Investing ajusté'
@@ -0,0 +1,81 @@
+"""
+Cache des résultats: éviction LRU, persistance disque, invalidation par l'empreinte des fenêtres
+"""
+import pytest
+
+from calcul import FinancialCalculator
+from results_cache import ResultsCache
+from synthetic import generate_historical_data
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultsCache(maxsize=2)
+    cache.put('a', {'x': 1})
+    cache.put('b', {'x': 2})
+    assert cache.get('a') == {'x': 1}
+    
+    cache.put('c', {'x': 3})
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == {'x': 1}
+    assert cache.get('c') == {'x': 3}
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'entries': 2}
+
+
+def test_entries_persist_across_instances(tmp_path):
+    ResultsCache(directory=str(tmp_path)).put('cle', {'performance': 12.5})
+    
+    cache = ResultsCache(directory=str(tmp_path))
+    assert cache.get('cle') == {'performance': 12.5}
+    assert cache.get('autre') is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+    
+    cache.clear()
+    assert ResultsCache(directory=str(tmp_path)).get('cle') is None
+
+
+@pytest.mark.parametrize('engine', ['python', 'numpy'])
+def test_cached_results_match_uncached(tmp_path, engine):
+    data = generate_historical_data(900, seed=11)
+    attendu = FinancialCalculator(data, engine=engine).analyze_all_periods(extended=True)
+    
+    cache = ResultsCache(directory=str(tmp_path))
+    premier = FinancialCalculator(data, engine=engine, cache=cache).analyze_all_periods(extended=True)
+    # 5Y, 10Y et Origine couvrent la même fenêtre: calculée une seule fois
+    assert cache.stats()['misses'] < len(attendu)
+    
+    # Nouvelle instance: tout vient du disque
+    cache = ResultsCache(directory=str(tmp_path))
+    second = FinancialCalculator(data, engine=engine, cache=cache).analyze_all_periods(extended=True)
+    
+    assert premier == attendu
+    assert second == attendu
+    assert cache.stats()['misses'] == 0
+    assert cache.stats()['hits'] == len(attendu)
+
+
+@pytest.mark.parametrize('engine', ['python', 'numpy'])
+def test_changed_price_in_window_is_a_miss(engine):
+    data = generate_historical_data(900, seed=12)
+    cache = ResultsCache()
+    periodes = FinancialCalculator(data, engine=engine, cache=cache).analyze_all_periods()
+    
+    # Prix corrigé hors de la dernière année: seules les périodes qui le contiennent sont recalculées
+    modifie = [dict(item) for item in data]
+    modifie[-400]['price'] *= 1.01
+    calculator = FinancialCalculator(modifie, engine=engine, cache=cache)
+    avant = cache.stats()
+    resultats = calculator.analyze_all_periods()
+    apres = cache.stats()
+    
+    recalculees = apres['misses'] - avant['misses']
+    assert 0 < recalculees < len(periodes)
+    assert apres['hits'] - avant['hits'] == len(periodes) - recalculees
+    assert resultats == FinancialCalculator(modifie, engine=engine).analyze_all_periods()
+    
+    # Prix corrigé dans toutes les fenêtres: aucune période ne vient du cache
+    modifie[-3]['price'] *= 1.01
+    avant = cache.stats()
+    FinancialCalculator(modifie, engine=engine, cache=cache).analyze_all_periods()
+    assert cache.stats()['misses'] - avant['misses'] == len(periodes)
+    assert cache.stats()['hits'] == avant['hits']
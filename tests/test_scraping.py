@@ -0,0 +1,66 @@
+"""
+Scraper: analyse des réponses Yahoo Finance, mémorisation des symboles gagnants, requêtes couvertes
+"""
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from scraping import (OPCVMScraper, RaceCancelled, load_preferred_symbols, parse_yahoo_chart,
+                      parse_yahoo_chart_series, save_preferred_symbols)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def test_yahoo_chart_parsers_agree_on_local_dates():
+    # Tokyo (UTC+9): chaque séance commence la veille en UTC
+    with open(os.path.join(FIXTURES, "yahoo_chart_tokyo.json"), 'rb') as f:
+        content = f.read()
+    
+    historical_data = parse_yahoo_chart(json.loads(content), '1306.T')
+    series = parse_yahoo_chart_series(content, '1306.T')
+    
+    assert [item['date'] for item in historical_data] == ['2024-03-04', '2024-03-05', '2024-03-07', '2024-03-08']
+    assert series.to_historical_data() == historical_data
+
+
+def _save(args):
+    filename, i = args
+    save_preferred_symbols({f"FR{i:010d}": f"SYM{i}"}, filename)
+
+
+def test_save_preferred_symbols_concurrent_processes(tmp_path):
+    filename = str(tmp_path / "symboles.json")
+    
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_save, [(filename, i) for i in range(40)]))
+    
+    preferred = load_preferred_symbols(filename)
+    assert preferred == {f"FR{i:010d}": f"SYM{i}" for i in range(40)}
+    assert not (tmp_path / "symboles.json.lock").exists()
+
+
+def test_race_losers_stop_before_next_request():
+    scraper = OPCVMScraper(preferences_file=None)
+    course_finie, perdant_fini = threading.Event(), threading.Event()
+    erreurs = []
+    
+    def gagnant():
+        return list(range(20))
+    
+    def perdant():
+        # Encore en cours quand la course est gagnée: sa requête suivante n'est pas envoyée
+        course_finie.wait(5)
+        try:
+            scraper._request('GET', 'http://127.0.0.1:9/jamais', source='yahoo')
+        except RaceCancelled as e:
+            erreurs.append(e)
+        finally:
+            perdant_fini.set()
+    
+    label, data = scraper._race([('perdant', perdant), ('gagnant', gagnant)], hedge_delay=0)
+    course_finie.set()
+    
+    assert label == 'gagnant' and len(data) == 20
+    assert perdant_fini.wait(5)
+    assert len(erreurs) == 1
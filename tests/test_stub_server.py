@@ -0,0 +1,82 @@
+"""
+Scrapers synchrone et asynchrone contre le serveur local stub_server.py (sans réseau)
+"""
+import pytest
+
+from http_cache import ResponseCache
+from load_test import load_test_policy
+from scraping import MIN_POINTS, OPCVMScraper, symbol_from_source
+from scraping_async import AsyncOPCVMScraper
+from stub_server import StubConfig, start_stub_server
+from timeseries_store import to_day_number
+
+ISIN = "IE0002XZSHO1"
+
+
+@pytest.fixture
+def stub():
+    server = start_stub_server(StubConfig(history_days=1000))
+    yield server
+    server.shutdown()
+
+
+def make_scraper(server, **kwargs):
+    return OPCVMScraper(ISIN, yahoo_base_url=server.base_url, investing_base_url=server.base_url,
+                        preferences_file=None, policy=load_test_policy(), **kwargs)
+
+
+def assert_matches_stub(server, historical_data, key):
+    series = server.get_series(key)
+    attendu = dict(zip(series.days.tolist(), series.prices.tolist()))
+    
+    dates = [item['date'] for item in historical_data]
+    assert len(historical_data) > MIN_POINTS
+    assert dates == sorted(set(dates))
+    for item in historical_data:
+        assert item['price'] == pytest.approx(attendu[to_day_number(item['date'])])
+
+
+def test_sync_scraper_yahoo(stub):
+    historical_data = make_scraper(stub).scrape_yahoo_finance()
+    symbol = symbol_from_source(historical_data[0]['source'])
+    assert_matches_stub(stub, historical_data, symbol)
+
+
+def test_sync_scraper_investing(stub):
+    historical_data = make_scraper(stub).scrape_investing_com()
+    assert historical_data
+    assert {item['source'] for item in historical_data} == {'Investing.com'}
+    assert [item['date'] for item in historical_data] == sorted({item['date'] for item in historical_data})
+
+
+def test_sync_scraper_retries_server_errors():
+    server = start_stub_server(StubConfig(history_days=1000, error_rate=0.5, seed=4))
+    try:
+        result = make_scraper(server).scrape_all_sources()
+        assert result and len(result['historical_data']) > MIN_POINTS
+        assert server.stats['503'] > 0
+    finally:
+        server.shutdown()
+
+
+def test_sync_scraper_response_cache(stub, tmp_path):
+    make_scraper(stub, cache=ResponseCache(str(tmp_path))).scrape_yahoo_finance()
+    requetes = stub.stats['requests']
+    
+    cache = ResponseCache(str(tmp_path))
+    historical_data = make_scraper(stub, cache=cache).scrape_yahoo_finance()
+    assert historical_data
+    assert stub.stats['requests'] == requetes
+    assert cache.hits > 0
+
+
+@pytest.mark.parametrize('hedge_delay', [None, 0.05])
+def test_async_scraper(stub, hedge_delay):
+    scraper = AsyncOPCVMScraper(concurrency=4, yahoo_base_url=stub.base_url, hedge_delay=hedge_delay,
+                                preferences_file=None, policy=load_test_policy())
+    results = scraper.scrape_many([ISIN, ("SYNTH1", ["SYNTH1"]), ("SYNTH2", ["SYNTH2"])])
+    
+    assert set(results) == {ISIN, "SYNTH1", "SYNTH2"}
+    for isin, result in results.items():
+        symbol = scraper.winners[isin]
+        assert_matches_stub(stub, result['historical_data'], symbol)
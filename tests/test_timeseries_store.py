@@ -0,0 +1,88 @@
+"""
+Stockage colonnaire: écriture, relecture (mmap ou non), plage de dates, fusion, exports
+"""
+import numpy as np
+import pytest
+
+from synthetic import generate_gbm
+from timeseries_store import PriceSeries, TimeSeriesStore, from_day_number
+
+ISIN = 'FR0000000001'
+
+
+def empty_series(source=""):
+    return PriceSeries(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64), source)
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_write_load_slice_merge_round_trip(tmp_path, mmap):
+    store = TimeSeriesStore(str(tmp_path))
+    series = generate_gbm(300, seed=7, source='Yahoo Finance (TEST)')
+    store.write(ISIN, series)
+    
+    loaded = store.load(ISIN, mmap=mmap)
+    assert isinstance(loaded.days, np.memmap) == mmap
+    assert np.array_equal(loaded.days, series.days)
+    assert np.array_equal(loaded.prices, series.prices)
+    assert loaded.source == series.source
+    
+    # Plage de dates: bornes incluses
+    start, end = from_day_number(series.days[50]), from_day_number(series.days[99])
+    window = store.load(ISIN, start=start, end=end, mmap=mmap)
+    assert np.array_equal(window.days, series.days[50:100])
+    assert np.array_equal(window.prices, series.prices[50:100])
+    
+    # Fusion: les nouveaux points l'emportent sur les dates communes
+    jours = np.concatenate([series.days[-5:], series.days[-1] + np.arange(1, 6, dtype=np.int32)])
+    nouveaux = PriceSeries(jours, series.prices[-10:] * 2, series.source)
+    merged = store.merge(ISIN, nouveaux)
+    reloaded = store.load(ISIN, mmap=mmap)
+    
+    assert len(reloaded) == len(series) + 5
+    assert np.array_equal(reloaded.days, merged.days)
+    assert np.all(np.diff(reloaded.days) > 0)
+    assert np.array_equal(reloaded.prices[-10:], nouveaux.prices)
+    assert np.array_equal(reloaded.prices[:len(series) - 5], series.prices[:-5])
+
+
+def test_merge_empty_series_into_empty_file(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    store.write(ISIN, empty_series())
+    
+    merged = store.merge(ISIN, empty_series())
+    
+    assert len(merged) == 0
+    assert len(store.load(ISIN)) == 0
+
+
+def test_exports_round_trip(tmp_path):
+    store = TimeSeriesStore(str(tmp_path / "series"))
+    series = generate_gbm(120, seed=8, source='Investing.com')
+    store.write(ISIN, series)
+    
+    store.export_csv(ISIN, str(tmp_path / "serie.csv"))
+    store.export_json(ISIN, str(tmp_path / "serie.json"))
+    
+    for imported in (store.import_csv(str(tmp_path / "serie.csv"), 'CSV'),
+                     store.import_json(str(tmp_path / "serie.json"), 'JSON')):
+        assert np.array_equal(imported.days, series.days)
+        assert np.allclose(imported.prices, series.prices)
+        assert imported.source == series.source
+
+
+def test_failed_export_keeps_previous_file(tmp_path, monkeypatch):
+    store = TimeSeriesStore(str(tmp_path / "series"))
+    store.write(ISIN, generate_gbm(30, seed=9))
+    path = tmp_path / "serie.csv"
+    store.export_csv(ISIN, str(path))
+    previous = path.read_bytes()
+    
+    def failing(self):
+        raise RuntimeError("interruption")
+    
+    monkeypatch.setattr(PriceSeries, 'to_historical_data', failing)
+    with pytest.raises(RuntimeError):
+        store.export_csv(ISIN, str(path))
+    
+    assert path.read_bytes() == previous
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['serie.csv', 'series']
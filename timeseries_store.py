@@ -0,0 +1,259 @@
+"""
+Stockage colonnaire compact des séries de prix (un fichier binaire par ISIN)
+Jours en int32 + prix en float64, source stockée une seule fois,
+fichier projetable en mémoire (mmap) pour lire un fonds ou une plage de dates sans copie
+"""
+import csv
+import json
+import os
+import struct
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from exporters import AtomicFile
+
+# En-tête: magic, version, nombre de points, longueur de la source (little-endian)
+MAGIC = b'OPCV'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQI4x')
+
+EPOCH = date(1970, 1, 1)
+
+
+def to_day_number(value):
+    """
+    Convertit une date ('YYYY-MM-DD', date ou datetime) en nombre de jours depuis le 01/01/1970
+    """
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m-%d')
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH).days
+
+
+def from_day_number(day):
+    return EPOCH + timedelta(days=int(day))
+
+
+def _align8(offset):
+    return (offset + 7) & ~7
+
+
+def _sort_unique(days, prices):
+    """
+    Tri par date et dédoublonnage (la dernière valeur d'une date l'emporte)
+    """
+    ordre = np.argsort(days, kind='stable')
+    days, prices = days[ordre], prices[ordre]
+    if len(days) > 1:
+        derniers = np.append(days[1:] != days[:-1], True)
+        days, prices = days[derniers], prices[derniers]
+    return days, prices
+
+
+class PriceSeries:
+    """
+    Série de prix typée: days (int32, jours depuis 1970) et prices (float64), source unique
+    """
+    
+    def __init__(self, days, prices, source=""):
+        if len(days) != len(prices):
+            raise ValueError("Dates et prix de longueurs différentes")
+        self.days = days
+        self.prices = prices
+        self.source = source
+    
+    def __len__(self):
+        return len(self.days)
+    
+    def __getitem__(self, i):
+        """
+        Point i au format historique du scraper (dictionnaire date/price/source)
+        """
+        return {'date': str(np.datetime64(int(self.days[i]), 'D')),
+                'price': float(self.prices[i]),
+                'source': self.source}
+    
+    def dates(self):
+        """
+        Dates au format datetime64[D]
+        """
+        return self.days.astype('datetime64[D]')
+    
+    def slice(self, start=None, end=None):
+        """
+        Sous-série [start, end] par recherche binaire (vues, sans copie)
+        """
+        debut = 0 if start is None else int(np.searchsorted(self.days, to_day_number(start), side='left'))
+        fin = len(self.days) if end is None else int(np.searchsorted(self.days, to_day_number(end), side='right'))
+        return PriceSeries(self.days[debut:fin], self.prices[debut:fin], self.source)
+    
+    def to_calculator(self, engine='numpy', incremental=False):
+        """
+        Calculateur FinancialCalculator construit directement sur les tableaux
+        """
+        from calcul import FinancialCalculator
+        return FinancialCalculator.from_arrays(self.days, self.prices, engine=engine, incremental=incremental)
+    
+    def to_historical_data(self):
+        """
+        Conversion vers le format historique du scraper (liste de dictionnaires)
+        """
+        dates = self.dates().astype(str).tolist()
+        return [{'date': d, 'price': p, 'source': self.source}
+                for d, p in zip(dates, self.prices.tolist())]
+    
+    @classmethod
+    def from_historical_data(cls, historical_data, source=None):
+        """
+        Conversion depuis le format historique du scraper (triée, une valeur par date)
+        """
+        if source is None:
+            source = historical_data[0].get('source', "") if historical_data else ""
+        
+        days = np.array([to_day_number(item['date']) for item in historical_data], dtype=np.int32)
+        prices = np.array([float(item['price']) for item in historical_data], dtype=np.float64)
+        
+        days, prices = _sort_unique(days, prices)
+        return cls(days, prices, source)
+
+
+class TimeSeriesStore:
+    def __init__(self, directory="series"):
+        """
+        directory: répertoire des fichiers <ISIN>.opcv
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+    
+    def path(self, isin):
+        return os.path.join(self.directory, f"{isin}.opcv")
+    
+    def isins(self):
+        """
+        Liste des ISIN stockés
+        """
+        return sorted(name[:-len('.opcv')] for name in os.listdir(self.directory)
+                      if name.endswith('.opcv'))
+    
+    def write(self, isin, series):
+        """
+        Écrit la série d'un ISIN (écriture atomique: fichier temporaire puis renommage)
+        """
+        source = series.source.encode('utf-8')
+        n = len(series)
+        
+        days_offset = _align8(HEADER.size + len(source))
+        prices_offset = _align8(days_offset + 4 * n)
+        
+        tmp_path = f"{self.path(isin)}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, n, len(source)))
+            f.write(source)
+            f.write(b'\0' * (days_offset - HEADER.size - len(source)))
+            f.write(np.ascontiguousarray(series.days, dtype='<i4').tobytes())
+            f.write(b'\0' * (prices_offset - days_offset - 4 * n))
+            f.write(np.ascontiguousarray(series.prices, dtype='<f8').tobytes())
+        os.replace(tmp_path, self.path(isin))
+    
+    def load(self, isin, start=None, end=None, mmap=True):
+        """
+        Charge la série d'un ISIN, éventuellement restreinte à [start, end]
+        mmap=True: les tableaux sont des vues sur le fichier projeté en mémoire (aucune copie)
+        """
+        path = self.path(isin)
+        
+        with open(path, 'rb') as f:
+            magic, version, _, n, source_length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Format de fichier inconnu: {path}")
+            source = f.read(source_length).decode('utf-8')
+        
+        days_offset = _align8(HEADER.size + source_length)
+        prices_offset = _align8(days_offset + 4 * n)
+        
+        if n == 0:
+            series = PriceSeries(np.empty(0, dtype='<i4'), np.empty(0, dtype='<f8'), source)
+        elif mmap:
+            days = np.memmap(path, dtype='<i4', mode='r', offset=days_offset, shape=(n,))
+            prices = np.memmap(path, dtype='<f8', mode='r', offset=prices_offset, shape=(n,))
+            series = PriceSeries(days, prices, source)
+        else:
+            days = np.fromfile(path, dtype='<i4', count=n, offset=days_offset)
+            prices = np.fromfile(path, dtype='<f8', count=n, offset=prices_offset)
+            series = PriceSeries(days, prices, source)
+        
+        if start is not None or end is not None:
+            series = series.slice(start, end)
+        
+        return series
+    
+    def merge(self, isin, series):
+        """
+        Fusionne de nouveaux points avec la série stockée (les nouveaux l'emportent)
+        """
+        if not os.path.exists(self.path(isin)):
+            self.write(isin, series)
+            return series
+        
+        stored = self.load(isin, mmap=False)
+        days, prices = _sort_unique(np.concatenate([stored.days, series.days]),
+                                    np.concatenate([stored.prices, series.prices]))
+        
+        merged = PriceSeries(days, prices, series.source or stored.source)
+        self.write(isin, merged)
+        return merged
+    
+    def import_json(self, filename, isin=None):
+        """
+        Importe un fichier JSON du scraper (opcvm_data.json)
+        """
+        with open(filename, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        
+        isin = isin or result.get('fund_info', {}).get('isin')
+        if not isin:
+            raise ValueError(f"ISIN introuvable dans {filename}")
+        
+        series = PriceSeries.from_historical_data(result.get('historical_data', []))
+        self.write(isin, series)
+        print(f"{len(series)} points importés pour {isin}")
+        return series
+    
+    def import_csv(self, filename, isin):
+        """
+        Importe un fichier CSV du scraper (colonnes date, price, source)
+        """
+        with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+            historical_data = list(csv.DictReader(csvfile))
+        
+        series = PriceSeries.from_historical_data(historical_data)
+        self.write(isin, series)
+        print(f"{len(series)} points importés pour {isin}")
+        return series
+    
+    def export_json(self, isin, filename):
+        """
+        Exporte la série d'un ISIN au format JSON du scraper (écriture atomique)
+        """
+        from scraping import build_result, get_fund_info
+        
+        historical_data = self.load(isin).to_historical_data()
+        result = build_result(get_fund_info(isin), historical_data)
+        
+        with AtomicFile(filename) as jsonfile:
+            json.dump(result, jsonfile, indent=2, ensure_ascii=False)
+        
+        print(f"Série {isin} exportée vers {filename}")
+    
+    def export_csv(self, isin, filename):
+        """
+        Exporte la série d'un ISIN au format CSV du scraper (écriture atomique)
+        """
+        with AtomicFile(filename) as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=['date', 'price', 'source'])
+            writer.writeheader()
+            writer.writerows(self.load(isin).to_historical_data())
+        
+        print(f"Série {isin} exportée vers {filename}")
@@ -0,0 +1,379 @@
+"""
+Analyse d'un univers de fonds: matrice de prix dates x fonds
+Métriques de toutes les périodes pour tous les fonds, matrices de covariance / corrélation
+et classements (top K), calculés par blocs de colonnes pour borner la mémoire
+"""
+import argparse
+import json
+from datetime import datetime, time
+
+import numpy as np
+
+from calcul import period_start_dates
+from timeseries_store import TimeSeriesStore, from_day_number, to_day_number
+
+# Mémoire de travail visée par bloc de colonnes (octets)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+METRIC_FIELDS = ['performance', 'volatilite', 'rendement_espere', 'max_drawdown']
+
+# Classements: métrique -> True si les plus grandes valeurs sont les meilleures
+RANKINGS = {'performance': True, 'volatilite': False, 'max_drawdown': True}
+
+
+def _forward_fill(block):
+    """
+    Propage le dernier prix connu vers le bas de chaque colonne (NaN avant le premier prix)
+    """
+    lignes = np.arange(block.shape[0])[:, None]
+    index = np.where(np.isnan(block), 0, lignes)
+    np.maximum.accumulate(index, axis=0, out=index)
+    return np.take_along_axis(block, index, axis=0)
+
+
+def _returns_block(block):
+    """
+    Rendements d'un bloc de prix (NaN = pas de cotation) et masque des rendements valides
+    Un rendement valide relie deux cotations successives du même fonds (prix précédent > 0),
+    comme dans FinancialCalculator
+    """
+    filled = _forward_fill(block)
+    observes = ~np.isnan(block[1:])
+    precedents = filled[:-1]
+    
+    masque = observes & (precedents > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rendements = np.where(masque, block[1:] / precedents - 1, 0.0)
+    
+    return filled, rendements, masque
+
+
+def _block_metrics(block):
+    """
+    Métriques de chaque colonne d'un bloc de prix (mêmes définitions que FinancialCalculator)
+    """
+    filled, rendements, masque = _returns_block(block)
+    nb_points = (~np.isnan(block)).sum(axis=0)
+    nb_rendements = masque.sum(axis=0)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Performance: premier et dernier prix de la période
+        premiers = np.take_along_axis(block, np.argmax(~np.isnan(block), axis=0)[None, :], axis=0)[0]
+        derniers = filled[-1]
+        performance = np.where(premiers > 0, (derniers / premiers - 1) * 100, 0.0)
+        
+        # Rendement espéré et volatilité (variance de population, 252 jours de trading)
+        moyennes = rendements.sum(axis=0) / nb_rendements
+        ecarts = np.where(masque, rendements - moyennes, 0.0)
+        variances = (ecarts ** 2).sum(axis=0) / nb_rendements
+        rendement_espere = np.where(nb_rendements > 0, moyennes * 252 * 100, 0.0)
+        volatilite = np.where(nb_rendements > 1, np.sqrt(variances) * np.sqrt(252) * 100, 0.0)
+        
+        # Max drawdown: pic courant (les prix propagés ne modifient ni les pics ni les creux)
+        pics = np.fmax.accumulate(filled, axis=0)
+        drawdowns = np.nanmin(np.where(np.isnan(filled), 0.0, filled / pics - 1), axis=0) * 100
+        max_drawdown = np.minimum(drawdowns, 0.0)
+    
+    metrics = {
+        'performance': np.round(performance, 2),
+        'volatilite': np.round(volatilite, 2),
+        'rendement_espere': np.round(rendement_espere, 2),
+        'max_drawdown': np.round(max_drawdown, 2)
+    }
+    
+    # Moins de 2 points: période non analysable (comme FinancialCalculator)
+    insuffisants = nb_points < 2
+    for field in METRIC_FIELDS:
+        metrics[field][insuffisants] = np.nan
+    metrics['nb_points'] = nb_points
+    
+    return metrics
+
+
+class UniverseMatrix:
+    def __init__(self, days, isins, prices):
+        """
+        days: jours depuis le 01/01/1970 (int32, triés), isins: liste des fonds (colonnes)
+        prices: matrice float64 dates x fonds, NaN quand un fonds n'a pas de cotation
+        (tableau en mémoire ou np.memmap)
+        """
+        if prices.shape != (len(days), len(isins)):
+            raise ValueError(f"Matrice de prix {prices.shape} incompatible avec "
+                             f"{len(days)} dates et {len(isins)} fonds")
+        self.days = days
+        self.isins = list(isins)
+        self.prices = prices
+    
+    @classmethod
+    def from_series(cls, universe, filename=None):
+        """
+        Aligne les séries d'un univers (dictionnaire ISIN -> PriceSeries) sur le calendrier commun
+        filename: matrice écrite dans un fichier .npy projeté en mémoire (np.lib.format.open_memmap)
+        au lieu d'être allouée en mémoire
+        """
+        isins = list(universe)
+        if not isins:
+            raise ValueError("Univers vide")
+        
+        days = np.unique(np.concatenate([np.asarray(universe[isin].days, dtype=np.int32) for isin in isins]))
+        shape = (len(days), len(isins))
+        
+        if filename:
+            prices = np.lib.format.open_memmap(filename, mode='w+', dtype=np.float64, shape=shape)
+            prices[:] = np.nan
+        else:
+            prices = np.full(shape, np.nan)
+        
+        for j, isin in enumerate(isins):
+            series = universe[isin]
+            prices[np.searchsorted(days, series.days), j] = series.prices
+        
+        if filename:
+            prices.flush()
+        
+        print(f"Univers aligné: {len(isins)} fonds, {len(days)} dates")
+        return cls(days, isins, prices)
+    
+    @classmethod
+    def from_store(cls, store, isins=None, start=None, end=None, filename=None):
+        """
+        Univers construit depuis un TimeSeriesStore (tous les ISIN stockés par défaut)
+        """
+        if not isinstance(store, TimeSeriesStore):
+            store = TimeSeriesStore(store)
+        isins = isins or store.isins()
+        universe = {}
+        for isin in isins:
+            series = store.load(isin, start, end)
+            if len(series):
+                universe[isin] = series
+        return cls.from_series(universe, filename)
+    
+    @property
+    def shape(self):
+        return self.prices.shape
+    
+    def __len__(self):
+        return len(self.isins)
+    
+    def chunk_size(self, rows, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Nombre de colonnes par bloc: une dizaine de tableaux temporaires de rows x colonnes
+        """
+        return max(1, int(max_bytes // (max(rows, 1) * 8 * 10)))
+    
+    def iter_blocks(self, offset=0, chunk_size=None):
+        """
+        Blocs de colonnes (j0, j1, prix) à partir de la ligne offset, copiés en mémoire un par un
+        """
+        rows = self.shape[0] - offset
+        chunk_size = chunk_size or self.chunk_size(rows)
+        for j0 in range(0, len(self.isins), chunk_size):
+            j1 = min(j0 + chunk_size, len(self.isins))
+            yield j0, j1, np.array(self.prices[offset:, j0:j1], dtype=np.float64)
+    
+    def period_offset(self, start_date):
+        """
+        Première ligne de la matrice à partir de start_date (recherche binaire)
+        Comme dans FinancialCalculator, un début de période en cours de journée exclut ce jour
+        """
+        day = to_day_number(start_date)
+        if isinstance(start_date, datetime) and start_date.time() != time(0):
+            day += 1
+        return int(np.searchsorted(self.days, day, side='left'))
+    
+    def period_metrics(self, start_date, chunk_size=None):
+        """
+        Métriques de tous les fonds depuis start_date
+        Retourne un dictionnaire métrique -> tableau (un élément par fonds, NaN si < 2 points)
+        """
+        offset = self.period_offset(start_date)
+        n = len(self.isins)
+        metrics = {field: np.full(n, np.nan) for field in METRIC_FIELDS}
+        metrics['nb_points'] = np.zeros(n, dtype=np.int64)
+        
+        if self.shape[0] - offset < 2:
+            return metrics
+        
+        for j0, j1, block in self.iter_blocks(offset, chunk_size):
+            for field, values in _block_metrics(block).items():
+                metrics[field][j0:j1] = values
+        
+        return metrics
+    
+    def analyze_all_periods(self, extended=False, chunk_size=None):
+        """
+        Métriques de toutes les périodes pour tous les fonds
+        Retourne un dictionnaire période -> métriques (tableaux par fonds)
+        """
+        periods = period_start_dates(from_day_number(self.days[0]), extended)
+        results = {}
+        for period_name, start_date in periods.items():
+            print(f"   Analyse {period_name}...")
+            results[period_name] = self.period_metrics(start_date, chunk_size)
+        return results
+    
+    def to_results(self, period_results):
+        """
+        Résultats au format de batch.py: ISIN -> période -> métriques (périodes analysables seulement)
+        """
+        results = {isin: {} for isin in self.isins}
+        for period_name, metrics in period_results.items():
+            for j, isin in enumerate(self.isins):
+                if metrics['nb_points'][j] < 2:
+                    continue
+                row = {field: float(metrics[field][j]) for field in METRIC_FIELDS}
+                row['nb_points'] = int(metrics['nb_points'][j])
+                results[isin][period_name] = row
+        return results
+    
+    def covariance(self, start_date=None, chunk_size=None, out=None, correlation=False):
+        """
+        Matrice de covariance annualisée (x 252) des rendements quotidiens, ou de corrélation
+        Chaque paire de fonds utilise les dates où les deux fonds ont un rendement
+        La diagonale de la covariance correspond à la volatilité de FinancialCalculator
+        (racine x 100) sur la période commune
+        Calcul par paires de blocs de colonnes (produits matriciels)
+        out: None (matrice en mémoire), nom de fichier .npy (np.lib.format.open_memmap) ou tableau
+        """
+        offset = self.period_offset(start_date) if start_date is not None else 0
+        n = len(self.isins)
+        rows = max(self.shape[0] - offset - 1, 1)
+        chunk_size = chunk_size or self.chunk_size(rows)
+        
+        if out is None:
+            out = np.empty((n, n))
+        elif isinstance(out, str):
+            out = np.lib.format.open_memmap(out, mode='w+', dtype=np.float64, shape=(n, n))
+        
+        def returns(j0, j1):
+            block = np.array(self.prices[offset:, j0:j1], dtype=np.float64)
+            _, rendements, masque = _returns_block(block)
+            return rendements, masque.astype(np.float64)
+        
+        for i0 in range(0, n, chunk_size):
+            i1 = min(i0 + chunk_size, n)
+            x, mx = returns(i0, i1)
+            
+            for j0 in range(i0, n, chunk_size):
+                j1 = min(j0 + chunk_size, n)
+                y, my = (x, mx) if j0 == i0 else returns(j0, j1)
+                
+                # Sommes sur les dates communes à chaque paire (rendements absents = 0)
+                nb = mx.T @ my
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    moy_x = (x.T @ my) / nb
+                    moy_y = (mx.T @ y) / nb
+                    cov = (x.T @ y) / nb - moy_x * moy_y
+                    
+                    if correlation:
+                        var_x = ((x ** 2).T @ my) / nb - moy_x ** 2
+                        var_y = (mx.T @ (y ** 2)) / nb - moy_y ** 2
+                        bloc = cov / np.sqrt(var_x * var_y)
+                        np.clip(bloc, -1.0, 1.0, out=bloc)
+                    else:
+                        bloc = cov * 252
+                
+                bloc[nb < 2] = np.nan
+                out[i0:i1, j0:j1] = bloc
+                out[j0:j1, i0:i1] = bloc.T
+        
+        if correlation:
+            diagonale = np.arange(n)
+            valides = ~np.isnan(out[diagonale, diagonale])
+            out[diagonale[valides], diagonale[valides]] = 1.0
+        
+        if isinstance(out, np.memmap):
+            out.flush()
+        
+        return out
+    
+    def correlation(self, start_date=None, chunk_size=None, out=None):
+        """
+        Matrice de corrélation des rendements quotidiens (voir covariance)
+        """
+        return self.covariance(start_date, chunk_size, out, correlation=True)
+    
+    def top_k(self, metrics, field, k=10, largest=True):
+        """
+        Les k meilleurs fonds pour une métrique (np.argpartition puis tri des k retenus)
+        Retourne une liste de (ISIN, valeur), fonds sans valeur exclus
+        """
+        values = np.asarray(metrics[field], dtype=np.float64)
+        cles = -values if largest else values.copy()
+        cles[np.isnan(cles)] = np.inf
+        
+        k = min(k, int(np.count_nonzero(~np.isnan(values))))
+        if k <= 0:
+            return []
+        
+        selection = np.argpartition(cles, k - 1)[:k] if k < len(cles) else np.arange(len(cles))
+        selection = selection[np.argsort(cles[selection], kind='stable')]
+        return [(self.isins[j], float(values[j])) for j in selection]
+    
+    def rankings(self, metrics, k=10):
+        """
+        Classements d'une période: meilleures performances, plus faibles volatilités,
+        plus faibles drawdowns
+        """
+        return {field: self.top_k(metrics, field, k, largest) for field, largest in RANKINGS.items()}
+
+
+def main():
+    """
+    Point d'entrée: python universe.py --store series --period 1Y --top 10 --correlation correlation.npy
+    """
+    parser = argparse.ArgumentParser(description="Analyse d'un univers de fonds (métriques, corrélations, classements)")
+    parser.add_argument('isins', nargs='*', help="ISIN à analyser (défaut: tous les ISIN du stockage)")
+    parser.add_argument('--store', default="series", help="Répertoire du stockage binaire des séries")
+    parser.add_argument('--matrix', help="Fichier .npy de la matrice de prix (projeté en mémoire)")
+    parser.add_argument('--period', default="1Y", help="Période des classements et des corrélations")
+    parser.add_argument('--top', type=int, default=10, help="Nombre de fonds par classement")
+    parser.add_argument('--correlation', help="Fichier .npy de la matrice de corrélation")
+    parser.add_argument('--covariance', help="Fichier .npy de la matrice de covariance")
+    parser.add_argument('--json', default="analyse_univers.json")
+    args = parser.parse_args()
+    
+    universe = UniverseMatrix.from_store(args.store, args.isins or None, filename=args.matrix)
+    if not len(universe):
+        parser.error("Aucune série dans le stockage")
+    
+    print(f"ANALYSE DE L'UNIVERS - {len(universe)} fonds")
+    print("=" * 70)
+    
+    period_results = universe.analyze_all_periods(extended=True)
+    if args.period not in period_results:
+        parser.error(f"Période inconnue: {args.period} (choix: {', '.join(period_results)})")
+    
+    start_date = period_start_dates(from_day_number(universe.days[0]), extended=True)[args.period]
+    classements = universe.rankings(period_results[args.period], args.top)
+    
+    for field, top in classements.items():
+        print(f"\nTop {args.top} {field} ({args.period})")
+        for rang, (isin, value) in enumerate(top, 1):
+            print(f"   {rang:>3}. {isin}  {value:.2f}%")
+    
+    if args.correlation:
+        universe.correlation(start_date, out=args.correlation)
+        print(f"\nMatrice de corrélation enregistrée dans {args.correlation}")
+    if args.covariance:
+        universe.covariance(start_date, out=args.covariance)
+        print(f"Matrice de covariance enregistrée dans {args.covariance}")
+    
+    try:
+        rapport = {
+            'analyse_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'nb_fonds': len(universe),
+            'periode_classements': args.period,
+            'classements': classements,
+            'metriques_par_fonds': universe.to_results(period_results)
+        }
+        with open(args.json, 'w', encoding='utf-8') as jsonfile:
+            json.dump(rapport, jsonfile, indent=2, ensure_ascii=False)
+        print(f"\nRapport exporté vers {args.json}")
+    except Exception as e:
+        print(f"Erreur export JSON: {e}")
+
+
+if __name__ == "__main__":
+    main()